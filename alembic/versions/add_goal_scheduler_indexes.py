@@ -0,0 +1,49 @@
+"""Add composite indexes for goal scheduler queries
+
+Revision ID: add_goal_scheduler_indexes
+Revises: add_goals_module_tables
+Create Date: 2026-10-17 10:00:00.000000
+
+- goal(goal_type, auto_update_progress, status, is_archived): sales/project progress sweeps
+- goal(end_date, status) WHERE is_archived = false: overdue sweep
+- goal_reminder(is_active, next_reminder_at): due reminder lookup
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_goal_scheduler_indexes'
+down_revision: Union[str, None] = 'add_goals_module_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_goal_scheduler',
+        'goal',
+        ['goal_type', 'auto_update_progress', 'status', 'is_archived'],
+        unique=False
+    )
+    op.create_index(
+        'ix_goal_overdue',
+        'goal',
+        ['end_date', 'status'],
+        unique=False,
+        postgresql_where=sa.text('is_archived = false')
+    )
+    op.create_index(
+        'ix_goal_reminder_due',
+        'goal_reminder',
+        ['is_active', 'next_reminder_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_goal_reminder_due', table_name='goal_reminder')
+    op.drop_index('ix_goal_overdue', table_name='goal')
+    op.drop_index('ix_goal_scheduler', table_name='goal')
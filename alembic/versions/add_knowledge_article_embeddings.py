@@ -0,0 +1,26 @@
+"""Add embedding column to knowledge_articles for hybrid search
+
+Revision ID: add_knowledge_article_embeddings
+Revises: add_knowledge_articles_fts_index
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_knowledge_article_embeddings'
+down_revision: Union[str, None] = 'add_knowledge_articles_fts_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('knowledge_articles', sa.Column('embedding', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('knowledge_articles', 'embedding')
@@ -0,0 +1,26 @@
+"""
+Alembic migration: add FTS GIN index for knowledge article search
+- knowledge_articles(title, summary, content)
+The expression must stay in sync with ARTICLE_SEARCH_DOCUMENT in
+app/services/knowledge_integration_service.py so the planner can use it.
+Note: Run per-tenant DBs or rely on Base.metadata.create_all for dev.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_knowledge_articles_fts_index'
+down_revision = 'add_fts_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS knowledge_articles_fts_idx
+    ON knowledge_articles USING GIN (
+        to_tsvector('english', coalesce(title,'') || ' ' || coalesce(summary,'') || ' ' || coalesce(content,''))
+    );
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS knowledge_articles_fts_idx;")
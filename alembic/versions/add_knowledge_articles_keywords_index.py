@@ -0,0 +1,24 @@
+"""
+Alembic migration: add GIN index on knowledge article keywords
+- knowledge_articles((keywords::jsonb)) for ?| keyword-overlap lookups
+The expression must stay in sync with ARTICLE_KEYWORDS in
+app/services/knowledge_integration_service.py so the planner can use it.
+Note: Run per-tenant DBs or rely on Base.metadata.create_all for dev.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_knowledge_articles_keywords_index'
+down_revision = 'add_knowledge_article_embeddings'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS knowledge_articles_keywords_idx
+    ON knowledge_articles USING GIN ((keywords::jsonb));
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS knowledge_articles_keywords_idx;")
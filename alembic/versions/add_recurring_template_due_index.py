@@ -0,0 +1,34 @@
+"""Add partial index for due recurring task templates
+
+Revision ID: add_recurring_template_due_index
+Revises: add_goal_scheduler_indexes
+Create Date: 2026-10-17 12:00:00.000000
+
+- recurring_task_templates(next_due_date) WHERE is_active AND NOT is_paused:
+  the scheduler's per-tenant due-template lookup
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_recurring_template_due_index'
+down_revision: Union[str, None] = 'add_goal_scheduler_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_rtt_due_active',
+        'recurring_task_templates',
+        ['next_due_date'],
+        unique=False,
+        postgresql_where=sa.text('is_active = true AND is_paused = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rtt_due_active', table_name='recurring_task_templates')
@@ -0,0 +1,43 @@
+"""Index subscriptions by organization
+
+Revision ID: add_subscription_org_index
+Revises: add_recurring_template_due_index
+Create Date: 2026-10-17 14:00:00.000000
+
+- subscriptions(organization_id): the Stripe subscription.* webhook handlers
+  update the row by organization. stripe_subscription_id and
+  stripe_invoice_id already have unique constraints from the initial migration.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_subscription_org_index'
+down_revision: Union[str, None] = 'add_recurring_template_due_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build without blocking webhook writes; CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_subscriptions_organization_id',
+            'subscriptions',
+            ['organization_id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_subscriptions_organization_id',
+            table_name='subscriptions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -1,12 +1,11 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, case
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import uuid
-import io
 from datetime import datetime, timedelta, timezone
 
 from ...deps_tenant import get_tenant_db
@@ -549,7 +548,7 @@ async def download_invoice_pdf(
     current_user: User = Depends(get_current_active_user_master),
     db: AsyncSession = Depends(get_tenant_db),
     master_db: AsyncSession = Depends(get_master_db),
-) -> StreamingResponse:
+) -> Response:
     """Download invoice as PDF"""
     # Get invoice with relationships
     result = await db.execute(
@@ -610,11 +609,11 @@ async def download_invoice_pdf(
     org_res = await master_db.execute(select(Organization).where(Organization.id == current_user.organization_id))
     org_obj = org_res.scalar_one_or_none()
     org = {"name": org_obj.name, "settings": org_obj.settings or {}, "branding": org_obj.branding or {}} if org_obj else {}
-    pdf_buffer = pdf_service.generate_invoice_pdf(invoice_data, org=org)
+    pdf_buffer = await pdf_service.render_cached('invoice', invoice_data, org=org)
     
-    # Return as streaming response
-    return StreamingResponse(
-        io.BytesIO(pdf_buffer.read()),
+    # Return in one body with a Content-Length; a BytesIO body would be streamed line by line
+    return Response(
+        pdf_buffer.getvalue(),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=invoice_{invoice.invoice_number}.pdf"}
     )
@@ -20,6 +20,9 @@ from ....schemas.knowledge_base import (
     KnowledgeLink as KnowledgeLinkSchema
 )
 from ...deps import get_current_active_user, get_current_organization
+from ....services.knowledge_integration_service import (
+    fill_article_keywords, keywords_are_derived, refresh_article_embedding
+)
 
 router = APIRouter()
 
@@ -54,6 +57,8 @@ async def create_knowledge_article(
         **article_data.model_dump(),
         author_id=current_user.id
     )
+    fill_article_keywords(article)
+    await refresh_article_embedding(article)
     
     db.add(article)
     await db.commit()
@@ -189,10 +194,22 @@ async def update_knowledge_article(
             detail="Not authorized to edit this article"
         )
     
+    # Checked before the update: keywords derived from the old title/summary follow the new text
+    auto_keywords = keywords_are_derived(article)
+    
     # Update article
-    for field, value in article_update.model_dump(exclude_unset=True).items():
+    update_data = article_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(article, field, value)
     
+    # Keep search keywords and the semantic search vector in step with the searchable text
+    fill_article_keywords(
+        article,
+        rederive=auto_keywords and "keywords" not in update_data and bool({"title", "summary"} & update_data.keys())
+    )
+    if {"title", "summary", "content"} & update_data.keys():
+        await refresh_article_embedding(article)
+    
     await db.commit()
     await db.refresh(article)
     
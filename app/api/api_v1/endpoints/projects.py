@@ -11,8 +11,7 @@ from ....models.task import Task, TaskStatus
 from ....models.project_invoice import ProjectInvoice as InvoiceModel
 from ....models.organization import Organization
 from ....services.pdf_service import PDFService
-from fastapi.responses import StreamingResponse
-import io
+from fastapi.responses import Response
 from ....schemas.project import Project, ProjectCreate, ProjectUpdate, ProjectMemberIn
 from ...deps_tenant import get_current_active_user_master
 from ....api.deps_tenant import get_master_db as get_db
@@ -119,7 +118,7 @@ async def download_project_report_pdf(
     project_id: str,
     current_user: User = Depends(get_current_active_user_master),
     db: AsyncSession = Depends(get_tenant_db),
-) -> StreamingResponse:
+) -> Response:
     """Generate and download a branded project report PDF for the current tenant."""
     # Load project with owner
     result = await db.execute(
@@ -175,11 +174,12 @@ async def download_project_report_pdf(
     org = {"name": org_obj.name, "settings": org_obj.settings or {}, "branding": org_obj.branding or {}} if org_obj else {}
 
     pdf_service = PDFService()
-    pdf_buffer = pdf_service.generate_project_report_pdf(report, org=org)
+    pdf_buffer = await pdf_service.render_cached('project_report', report, org=org)
 
     filename = f"project_report_{project.slug if getattr(project, 'slug', None) else project.id}.pdf"
-    return StreamingResponse(
-        io.BytesIO(pdf_buffer.read()),
+    # One body with a Content-Length; a BytesIO body would be streamed line by line
+    return Response(
+        pdf_buffer.getvalue(),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
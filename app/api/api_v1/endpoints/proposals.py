@@ -1,11 +1,10 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 import uuid
-import io
 from datetime import datetime, timedelta, timezone
 
 from ....db.database import get_db
@@ -680,7 +679,7 @@ async def download_proposal_pdf(
     proposal_id: str,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_tenant_db),
-) -> StreamingResponse:
+) -> Response:
     """Download proposal as PDF from the current tenant database"""
     # Get proposal with relationships, scoped to the user's organization
     result = await db.execute(
@@ -727,11 +726,11 @@ async def download_proposal_pdf(
     org_res = await db.execute(select(Organization).where(Organization.id == current_user.organization_id))
     org_obj = org_res.scalar_one_or_none()
     org = {"name": org_obj.name, "settings": org_obj.settings or {}, "branding": org_obj.branding or {}} if org_obj else {}
-    pdf_buffer = pdf_service.generate_proposal_pdf(proposal_data, org=org)
+    pdf_buffer = await pdf_service.render_cached('proposal', proposal_data, org=org)
     
-    # Return as streaming response
-    return StreamingResponse(
-        io.BytesIO(pdf_buffer.read()),
+    # Return in one body with a Content-Length; a BytesIO body would be streamed line by line
+    return Response(
+        pdf_buffer.getvalue(),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=proposal_{proposal.proposal_number}.pdf"}
     )
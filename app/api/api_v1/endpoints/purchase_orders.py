@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, update, delete
 from sqlalchemy.orm import selectinload
@@ -22,7 +22,6 @@ from ....schemas.purchase_order import (
     PurchaseOrderItemResponse
 )
 import uuid
-import io
 
 router = APIRouter()
 
@@ -486,7 +485,7 @@ async def download_purchase_order_pdf(
     db: AsyncSession = Depends(get_tenant_db),
     current_user: User = Depends(get_current_user),
     design: str | None = None,
-) -> StreamingResponse:
+) -> Response:
     """Download purchase order as PDF with organization branding.
     By default, renders the 'Quantity Rental Quotation' layout to match the provided design.
     Pass design=legacy to use the older PO layout.
@@ -557,13 +556,12 @@ async def download_purchase_order_pdf(
     }
 
     pdf_service = PDFService()
-    if design == 'legacy':
-        pdf_buffer = pdf_service.generate_purchase_order_pdf(po_data, org=org)
-    else:
-        pdf_buffer = pdf_service.generate_quantity_rental_quotation_pdf(po_data, org=org)
+    kind = 'purchase_order' if design == 'legacy' else 'quantity_rental_quotation'
+    pdf_buffer = await pdf_service.render_cached(kind, po_data, org=org)
 
-    return StreamingResponse(
-        io.BytesIO(pdf_buffer.read()),
+    # One body with a Content-Length; a BytesIO body would be streamed line by line
+    return Response(
+        pdf_buffer.getvalue(),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=purchase_order_{purchase_order.po_number}.pdf"},
     )
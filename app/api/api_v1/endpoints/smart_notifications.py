@@ -28,7 +28,7 @@ from ....schemas.notification import (
 )
 from ....models.focus import FocusBlock as FocusBlockModel
 from ....schemas.focus import FocusBlockCreate, FocusBlockUpdate, FocusBlock as FocusBlockSchema
-from ....services.notification_service import create_notification_for_user
+from ....services.notification_service import create_notification_for_user, invalidate_focus_cache
 from zoneinfo import ZoneInfo
 from ...deps import get_current_active_user, get_current_organization
 
@@ -395,6 +395,7 @@ async def create_focus_block(
     db.add(block)
     await db.commit()
     await db.refresh(block)
+    invalidate_focus_cache(current_user.id, current_org.id)
     return FocusBlockSchema.from_orm(block)
 
 
@@ -420,6 +421,7 @@ async def delete_focus_block(
 
     await db.delete(block)
     await db.commit()
+    invalidate_focus_cache(current_user.id, current_org.id)
     return None
 
 
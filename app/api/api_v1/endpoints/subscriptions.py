@@ -1,7 +1,7 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 import stripe
 import uuid
 from datetime import datetime
@@ -71,12 +71,19 @@ async def get_subscription_stats(
 ) -> Any:
     """Get subscription usage statistics"""
     
+    # Only the columns the response needs, not a full ORM row
     subscription_result = await db.execute(
-        select(SubscriptionModel).where(
+        select(
+            SubscriptionModel.tier,
+            SubscriptionModel.status,
+            SubscriptionModel.amount,
+            SubscriptionModel.currency,
+            SubscriptionModel.cancel_at_period_end,
+        ).where(
             SubscriptionModel.organization_id == current_org.id
         )
     )
-    subscription = subscription_result.scalar_one_or_none()
+    subscription = subscription_result.first()
     
     if not subscription:
         raise HTTPException(
@@ -174,20 +181,19 @@ async def cancel_subscription(
     """Cancel subscription"""
     
     result = await db.execute(
-        select(SubscriptionModel).where(
-            SubscriptionModel.organization_id == current_org.id
-        )
+        update(SubscriptionModel)
+        .where(SubscriptionModel.organization_id == current_org.id)
+        .values(status=SubscriptionStatus.CANCELLED, cancelled_at=datetime.utcnow())
+        .returning(SubscriptionModel.id)
+        .execution_options(synchronize_session=False)
     )
-    subscription = result.scalar_one_or_none()
     
-    if not subscription:
+    if result.scalars().first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No subscription found"
         )
     
-    subscription.status = SubscriptionStatus.CANCELLED
-    subscription.cancelled_at = datetime.utcnow()
     await db.commit()
     
     return {"message": "Subscription cancelled"}
@@ -203,10 +209,7 @@ async def get_subscription_invoices(
 
 
 @router.post("/webhooks")
-async def stripe_webhook(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-) -> Any:
+async def stripe_webhook(request: Request) -> Any:
     """Handle Stripe webhooks"""
     try:
         # Get the raw body
@@ -219,9 +222,9 @@ async def stripe_webhook(
                 detail="Missing stripe-signature header"
             )
         
-        # Process the webhook
+        # Verify and queue the webhook
         from ....services.stripe_service import StripeService
-        result = await StripeService.process_webhook(body, sig_header, db)
+        result = await StripeService.process_webhook(body, sig_header)
         
         return result
         
@@ -0,0 +1,42 @@
+from celery import Celery
+from kombu import Queue
+
+from .config import settings
+
+# Background job queue; Redis doubles as broker and result backend
+celery_app = Celery(
+    "zphere",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=["app.tasks.email_tasks", "app.tasks.stripe_tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Bounded worker pool so notification bursts don't stampede SMTP
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    task_ignore_result=True,
+    # Stripe webhooks get their own queue and workers, isolated from email jobs
+    task_default_queue="celery",
+    task_queues=(
+        Queue("celery"),
+        Queue(settings.STRIPE_WEBHOOK_QUEUE),
+    ),
+    task_routes={
+        "stripe.process_event": {"queue": settings.STRIPE_WEBHOOK_QUEUE},
+        "stripe.process_event_batch": {"queue": settings.STRIPE_WEBHOOK_QUEUE},
+    },
+    # Periodic drain of buffered Stripe events; also recovers batches left by a dead worker
+    beat_schedule={
+        "stripe-drain-buffered-events": {
+            "task": "stripe.process_event_batch",
+            "schedule": 30.0,
+        },
+    },
+)
@@ -22,6 +22,15 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Celery workers
+    CELERY_WORKER_CONCURRENCY: int = 4
+    CELERY_EMAIL_RATE_LIMIT: str = "10/s"  # Per-worker cap on outgoing email tasks
+    STRIPE_WEBHOOK_QUEUE: str = "stripe-webhooks"  # Dedicated queue so webhook bursts don't starve other jobs
+    STRIPE_WEBHOOK_BATCH_SIZE: int = 32  # Buffered Stripe events applied per transaction; 1 disables batching
+    
+    # Background schedulers
+    SCHEDULER_TENANT_CONCURRENCY: int = 16  # Tenants processed in parallel per scheduler / startup pass
+    
     # JWT
     SECRET_KEY: str = "your-super-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
@@ -54,6 +63,8 @@ class Settings(BaseSettings):
     XAI_API_KEY: Optional[str] = None
     XAI_BASE_URL: str = "https://api.x.ai/v1"
     XAI_MODEL: str = "grok-2-latest"
+    XAI_EMBEDDING_MODEL: Optional[str] = None  # Enables semantic knowledge search when set
+    XAI_RESPONSE_CACHE_TTL: int = 86400  # Seconds identical Grok prompts are answered from Redis
 
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -62,6 +73,11 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE_MB: int = 10
     UPLOAD_DIR: str = "uploads/"
     
+    # PDF rendering
+    PDF_BACKEND: str = "reportlab"  # "typst" renders invoices via the Typst template when available
+    PDF_PAGE_COMPRESSION: bool = True  # zlib page streams; off trades ~4x larger files for less CPU
+    PDF_CACHE_TTL: int = 3600  # Seconds identical PDF downloads are served from Redis; 0 disables
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
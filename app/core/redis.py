@@ -0,0 +1,23 @@
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from .config import settings
+
+# Shared async Redis client for application-level caches; the connection pool is created lazily
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis connection pool (called on app shutdown)"""
+    global _redis
+    if _redis is not None:
+        client, _redis = _redis, None
+        await client.aclose()
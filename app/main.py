@@ -173,7 +173,22 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup tasks on shutdown"""
-    pass
+    # Drain pooled outbound HTTP connections (best-effort)
+    try:
+        from .services.grok_client import GrokClient
+        await GrokClient.aclose()
+    except Exception:
+        pass
+    try:
+        from .core.redis import close_redis
+        await close_redis()
+    except Exception:
+        pass
+    try:
+        from .services.pdf_service import close_logo_http
+        close_logo_http()
+    except Exception:
+        pass
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Enum, Table, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Enum, Table, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import UUIDBaseModel
@@ -83,6 +83,12 @@ class Goal(UUIDBaseModel):
     progress_logs = relationship("GoalProgress", back_populates="goal", cascade="all, delete-orphan")
     reminders = relationship("GoalReminder", back_populates="goal", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Scheduler filters: auto-updated sales/project goals and the overdue sweep
+        Index("ix_goal_scheduler", "goal_type", "auto_update_progress", "status", "is_archived"),
+        Index("ix_goal_overdue", "end_date", "status", postgresql_where=text("is_archived = false")),
+    )
+    
     def calculate_completion_percentage(self):
         """Calculate completion percentage based on checklists and target values"""
         if self.target_value and self.target_value > 0:
@@ -96,11 +102,11 @@ class Goal(UUIDBaseModel):
         
         return self.completion_percentage or 0.0
     
-    def get_probability_of_achievement(self):
+    def get_probability_of_achievement(self, now=None):
         """Calculate probability of achieving the goal based on current progress and time remaining"""
         from datetime import datetime, timezone
         
-        now = datetime.now(timezone.utc)
+        now = now or datetime.now(timezone.utc)
         
         # If goal is already completed
         if self.status == GoalStatus.COMPLETED:
@@ -188,6 +194,10 @@ class GoalReminder(UUIDBaseModel):
     # Relationships
     goal = relationship("Goal", back_populates="reminders")
     
+    __table_args__ = (
+        Index("ix_goal_reminder_due", "is_active", "next_reminder_at"),
+    )
+    
     def calculate_next_reminder(self):
         """Calculate the next reminder date based on interval"""
         from datetime import datetime, timedelta, timezone
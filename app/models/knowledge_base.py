@@ -42,6 +42,7 @@ class KnowledgeArticle(UUIDBaseModel):
     # Metadata
     tags = Column(JSON, default=list)  # Searchable tags
     keywords = Column(JSON, default=list)  # Search keywords
+    embedding = Column(JSON(none_as_null=True))  # Semantic search vector (see knowledge_integration_service)
     difficulty_level = Column(String(20), default="beginner")  # beginner, intermediate, advanced
     estimated_read_time = Column(Integer, default=5)  # In minutes
     
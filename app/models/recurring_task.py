@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, DateTime, JSON, Integer
+from sqlalchemy import Column, String, Text, Boolean, ForeignKey, DateTime, JSON, Integer, Index, text
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime, timedelta
@@ -70,6 +70,11 @@ class RecurringTaskTemplate(UUIDBaseModel):
     default_assignee = relationship("User", foreign_keys=[default_assignee_id])
     generated_tasks = relationship("Task", back_populates="recurring_template")
     
+    __table_args__ = (
+        # Scheduler tick: active, unpaused templates that are due
+        Index("ix_rtt_due_active", "next_due_date", postgresql_where=text("is_active = true AND is_paused = false")),
+    )
+    
     def calculate_next_due_date(self, from_date=None):
         """Calculate the next due date based on recurrence settings"""
         if from_date is None:
@@ -35,7 +35,7 @@ class Subscription(UUIDBaseModel):
     __tablename__ = "subscriptions"
     
     # Organization relationship
-    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False, index=True)
     
     # Stripe identifiers
     stripe_subscription_id = Column(String(100), unique=True, nullable=False)
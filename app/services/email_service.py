@@ -156,3 +156,24 @@ def send_welcome_email(to_email: str, org_name: str) -> None:
         f"Best,\nZphere Team\n"
     )
     send_email(to_email, subject, body)
+
+
+def send_report_email(to_email: str, share_link: str) -> bool:
+    subject = "Your scheduled project report"
+    body = (
+        f"Hi,\n\n"
+        f"Your scheduled project report is ready. View it here:\n{share_link}\n\n"
+        f"Best,\nZphere Team\n"
+    )
+    return send_email(to_email, subject, body)
+
+
+def send_trial_notice_email(to_email: str, trial_end: Optional[str] = None) -> bool:
+    subject = "Your Zphere trial is ending soon"
+    ends = f"on {trial_end}" if trial_end else "soon"
+    body = (
+        f"Hi,\n\n"
+        f"Your organization's free trial ends {ends}. Add a payment method to keep your workspace active.\n\n"
+        f"Best,\nZphere Team\n"
+    )
+    return send_email(to_email, subject, body)
@@ -1,17 +1,68 @@
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, func
 
 from ..db.database import get_db
-from ..models.goal import Goal, GoalProgress, GoalStatus, GoalType
+from ..models.goal import Goal, GoalChecklist, GoalProgress, GoalStatus, GoalType
 from ..models.user import User
 from ..models.item import Item  # Assuming there's an Item model for products
 from ..models.project_invoice import ProjectInvoice  # Assuming there's an invoice model
+from ..models.project import Project
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip when streaming scheduler result sets
+SCHEDULER_BATCH_SIZE = 500
+
+# Goal statuses eligible for automatic progress updates
+AUTO_UPDATE_STATUSES = [GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS]
+
+# Scheduler filter clauses, built once and reused on every tick
+SALES_GOALS_FILTER = and_(
+    Goal.goal_type == GoalType.SALES,
+    Goal.auto_update_progress == True,
+    Goal.status.in_(AUTO_UPDATE_STATUSES),
+    Goal.is_archived == False
+)
+PROJECT_GOALS_FILTER = and_(
+    Goal.goal_type == GoalType.PROJECT,
+    Goal.auto_update_progress == True,
+    Goal.status.in_(AUTO_UPDATE_STATUSES),
+    Goal.is_archived == False,
+    Goal.project_id.isnot(None)  # Must be associated with a project
+)
+
+# Minimum change in a goal's value that counts as progress (absorbs float noise from SUM())
+PROGRESS_EPSILON = 1e-6
+
+# Map project status to percentage for projects without explicit completion tracking
+PROJECT_STATUS_PROGRESS = {
+    'planning': 10.0,
+    'active': 50.0,
+    'completed': 100.0,
+    'on_hold': 0.0,
+    'cancelled': 0.0
+}
+
+# How project progress is tracked depends on the Project model; probe it once at import
+if hasattr(Project, 'completion_percentage'):
+    def _project_progress(project) -> float:
+        return float(project.completion_percentage or 0.0)
+elif hasattr(Project, 'status'):
+    def _project_progress(project) -> float:
+        return PROJECT_STATUS_PROGRESS.get(project.status, 0.0)
+else:
+    def _project_progress(project) -> float:
+        return 0.0
+
+
+def progress_changed(previous_value: Optional[float], new_value: float) -> bool:
+    """Whether new_value differs from previous_value by more than PROGRESS_EPSILON"""
+    return abs(new_value - (previous_value or 0.0)) > PROGRESS_EPSILON
+
+
 class GoalProgressService:
     """Service for automatic goal progress tracking"""
     
@@ -24,24 +75,20 @@ class GoalProgressService:
         
         try:
             # Find all active sales goals with auto-update enabled
-            sales_goals = db.query(Goal).filter(
-                and_(
-                    Goal.goal_type == GoalType.SALES,
-                    Goal.auto_update_progress == True,
-                    Goal.status.in_([GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS]),
-                    Goal.is_archived == False
-                )
-            ).all()
-            
-            logger.info(f"Found {len(sales_goals)} sales goals to update")
+            sales_goals = db.query(Goal).filter(SALES_GOALS_FILTER).yield_per(SCHEDULER_BATCH_SIZE)
             
+            # Stream goals in batches instead of materializing the full result set
+            goal_count = 0
             for goal in sales_goals:
+                goal_count += 1
                 try:
                     await self.update_individual_sales_goal(db, goal)
                 except Exception as e:
                     logger.error(f"Error updating sales goal {goal.id}: {e}")
                     continue
             
+            logger.info(f"Processed {goal_count} sales goals")
+            
             db.commit()
             
         except Exception as e:
@@ -65,8 +112,8 @@ class GoalProgressService:
                 current_value = await self.calculate_general_sales(db, goal)
         
         # Only update if the value has changed
-        if current_value != goal.current_value:
-            previous_value = goal.current_value
+        if progress_changed(goal.current_value, current_value):
+            previous_value = goal.current_value or 0.0
             
             # Create progress log
             progress_log = GoalProgress(
@@ -178,25 +225,19 @@ class GoalProgressService:
         logger.info("Updating project goals progress...")
         
         try:
-            project_goals = db.query(Goal).filter(
-                and_(
-                    Goal.goal_type == GoalType.PROJECT,
-                    Goal.auto_update_progress == True,
-                    Goal.status.in_([GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS]),
-                    Goal.is_archived == False,
-                    Goal.project_id.isnot(None)  # Must be associated with a project
-                )
-            ).all()
-            
-            logger.info(f"Found {len(project_goals)} project goals to update")
+            project_goals = db.query(Goal).filter(PROJECT_GOALS_FILTER).yield_per(SCHEDULER_BATCH_SIZE)
             
+            goal_count = 0
             for goal in project_goals:
+                goal_count += 1
                 try:
                     await self.update_individual_project_goal(db, goal)
                 except Exception as e:
                     logger.error(f"Error updating project goal {goal.id}: {e}")
                     continue
             
+            logger.info(f"Processed {goal_count} project goals")
+            
             db.commit()
             
         except Exception as e:
@@ -207,7 +248,6 @@ class GoalProgressService:
         """Update progress for an individual project goal"""
         try:
             # Get the associated project
-            from ..models.project import Project
             project = db.query(Project).filter(Project.id == goal.project_id).first()
             
             if not project:
@@ -215,25 +255,11 @@ class GoalProgressService:
                 return
             
             # Calculate progress based on project completion
-            # This depends on how you track project progress in your system
-            current_value = 0.0
-            
-            if hasattr(project, 'completion_percentage'):
-                current_value = float(project.completion_percentage)
-            elif hasattr(project, 'status'):
-                # Map project status to percentage
-                status_map = {
-                    'planning': 10.0,
-                    'active': 50.0,
-                    'completed': 100.0,
-                    'on_hold': 0.0,
-                    'cancelled': 0.0
-                }
-                current_value = status_map.get(project.status, 0.0)
+            current_value = _project_progress(project)
             
             # Update goal if value changed
-            if current_value != goal.current_value:
-                previous_value = goal.current_value
+            if progress_changed(goal.current_value, current_value):
+                previous_value = goal.current_value or 0.0
                 
                 progress_log = GoalProgress(
                     goal_id=goal.id,
@@ -304,10 +330,25 @@ class GoalProgressService:
             db.rollback()
             raise
     
-    def calculate_achievement_probability(self, goal: Goal) -> float:
+    def get_checklist_completion_ratios(self, db: Session, goal_ids: List[str]) -> Dict[str, float]:
+        """Fraction of completed checklist items per goal; goals without checklist items are omitted"""
+        rows = db.query(
+            GoalChecklist.goal_id,
+            func.avg(case((GoalChecklist.is_completed == True, 1.0), else_=0.0))
+        ).filter(GoalChecklist.goal_id.in_(goal_ids)).group_by(GoalChecklist.goal_id).all()
+        
+        return {goal_id: float(ratio) for goal_id, ratio in rows}
+    
+    def calculate_achievement_probability(
+        self,
+        goal: Goal,
+        now: Optional[datetime] = None,
+        checklist_completion: Optional[float] = None,
+        checklist_aggregated: bool = False
+    ) -> float:
         """Enhanced probability calculation with more factors"""
         try:
-            now = datetime.now(timezone.utc)
+            now = now or datetime.now(timezone.utc)
             
             # Basic time and completion factors
             total_duration = (goal.end_date - goal.start_date).total_seconds()
@@ -348,14 +389,16 @@ class GoalProgressService:
             
             # Recent activity modifier
             if hasattr(goal, 'progress_logs') and goal.progress_logs:
-                recent_logs = [log for log in goal.progress_logs 
-                             if (now - log.created_at).days <= 7]
-                if recent_logs:
+                # Logs whose age is at most 7 whole days
+                recent_cutoff = now - timedelta(days=8)
+                if any(log.created_at > recent_cutoff for log in goal.progress_logs):
                     probability *= 1.1  # 10% boost for recent activity
             
-            # Checklist completion modifier
-            if goal.checklists:
+            # Checklist completion modifier; callers may pass the SQL-aggregated ratio
+            # (get_checklist_completion_ratios), where a missing ratio means no checklist items
+            if checklist_completion is None and not checklist_aggregated and goal.checklists:
                 checklist_completion = sum(1 for item in goal.checklists if item.is_completed) / len(goal.checklists)
+            if checklist_completion is not None:
                 probability = (probability + checklist_completion) / 2  # Average with checklist progress
             
             return max(0.0, min(100.0, probability * 100))
@@ -1,18 +1,57 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.engine import Row
+from sqlalchemy import and_, or_, insert, select, update
 
-from ..db.database import get_db
-from ..models.goal import Goal, GoalReminder, GoalStatus
+from ..db.tenant_manager import tenant_manager
+from ..models.goal import Goal, GoalReminder, GoalStatus, goal_members
 from ..models.user import User
-from ..models.notification import Notification
+from ..models.notification import Notification, NotificationPriority, NotificationType
 from ..core.config import settings
+from ..tasks.email_tasks import send_goal_email
+from .goal_progress_service import SCHEDULER_BATCH_SIZE, goal_progress_service
+from .scheduler import fetch_all_org_ids_from_master
 
 logger = logging.getLogger(__name__)
 
+# Goal statuses that still receive reminders and can become overdue
+OPEN_GOAL_STATUSES = [GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS, GoalStatus.PAUSED]
+
+# Session.info key for reminder emails collected during a tick and queued after its commit
+_PENDING_EMAILS_KEY = "goal_reminder_emails"
+
+# Time-independent parts of the scheduler filters, built once at import
+ACTIVE_REMINDER_FILTER = and_(
+    GoalReminder.is_active == True,
+    Goal.status.in_(OPEN_GOAL_STATUSES)
+)
+OPEN_GOAL_FILTER = and_(
+    Goal.status.in_(OPEN_GOAL_STATUSES),
+    Goal.is_archived == False
+)
+
+class TickCache:
+    """Short-lived memo for per-goal computations within one scheduler tick"""
+    
+    def __init__(self, ttl_seconds: float = 5.0):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it if missing or older than the TTL"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl_seconds:
+            return entry[1]
+        
+        value = compute()
+        self._entries[key] = (now, value)
+        return value
+
 class GoalReminderService:
     """Service for processing goal reminders and sending notifications"""
     
@@ -30,7 +69,7 @@ class GoalReminderService:
         
         while self.is_running:
             try:
-                await self.process_due_reminders()
+                await self.process_all_tenants()
                 # Check for reminders every 5 minutes
                 await asyncio.sleep(300)
             except Exception as e:
@@ -42,56 +81,78 @@ class GoalReminderService:
         logger.info("Stopping goal reminder scheduler...")
         self.is_running = False
     
-    async def process_due_reminders(self):
-        """Process all due reminders and send notifications"""
-        logger.info("Processing due goal reminders...")
+    async def process_all_tenants(self):
+        """Process due reminders in every active organization's database"""
+        for org_id in await fetch_all_org_ids_from_master():
+            await self.process_due_reminders(org_id)
+    
+    async def process_due_reminders(self, org_id: str):
+        """Process all due reminders of one tenant and send notifications"""
+        logger.info(f"Processing due goal reminders for org {org_id}...")
         
-        # Get database session
-        db_gen = get_db()
-        db: Session = next(db_gen)
+        # Goals live in the tenant database; the reminder logic uses the sync ORM API through run_sync
+        db = await tenant_manager.get_tenant_session(org_id)
         
         try:
-            now = datetime.now(timezone.utc)
+            await db.run_sync(self._process_due_reminders, datetime.now(timezone.utc))
+            await db.commit()
             
-            # Find all active reminders that are due
-            due_reminders = db.query(GoalReminder).join(Goal).filter(
-                and_(
-                    GoalReminder.is_active == True,
-                    GoalReminder.next_reminder_at <= now,
-                    Goal.status.in_([GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS, GoalStatus.PAUSED])
-                )
-            ).all()
-            
-            logger.info(f"Found {len(due_reminders)} due reminders")
-            
-            for reminder in due_reminders:
-                try:
-                    await self.send_reminder_notifications(db, reminder)
-                    
-                    # Update reminder timestamps
-                    reminder.last_sent_at = now
-                    reminder.next_reminder_at = reminder.calculate_next_reminder()
-                    
-                    # If next reminder is None, deactivate the reminder
-                    if reminder.next_reminder_at is None:
-                        reminder.is_active = False
-                        logger.warning(f"Deactivated reminder {reminder.id} - unable to calculate next reminder")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing reminder {reminder.id}: {e}")
-                    continue
-            
-            db.commit()
+            # Only queue once last_sent_at/next_reminder_at are durable, else a failed commit resends every tick
+            self._queue_emails(db.info.pop(_PENDING_EMAILS_KEY, []))
             
         except Exception as e:
-            logger.error(f"Error processing due reminders: {e}")
-            db.rollback()
+            logger.error(f"Error processing due reminders for org {org_id}: {e}")
+            db.info.pop(_PENDING_EMAILS_KEY, None)
+            await db.rollback()
         finally:
-            db.close()
+            await db.close()
     
-    async def send_reminder_notifications(self, db: Session, reminder: GoalReminder):
+    def _process_due_reminders(self, db: Session, now: datetime):
+        """Send every due reminder and advance its timestamps (runs on the sync session)"""
+        tick_cache = TickCache()
+        
+        # Find all active reminders that are due, loading each goal (and its members) from the same join
+        due_reminders = db.query(GoalReminder).join(Goal).options(
+            contains_eager(GoalReminder.goal).selectinload(Goal.members)
+        ).filter(
+            and_(
+                ACTIVE_REMINDER_FILTER,
+                GoalReminder.next_reminder_at <= now
+            )
+        ).yield_per(SCHEDULER_BATCH_SIZE)
+        
+        # Stream reminders in batches instead of materializing the full result set
+        reminder_count = 0
+        pending_emails = db.info.setdefault(_PENDING_EMAILS_KEY, [])
+        for reminder in due_reminders:
+            reminder_count += 1
+            queued_before = len(pending_emails)
+            try:
+                self.send_reminder_notifications(db, reminder, now, tick_cache)
+                
+                # Update reminder timestamps
+                reminder.last_sent_at = now
+                reminder.next_reminder_at = reminder.calculate_next_reminder()
+                
+                # If next reminder is None, deactivate the reminder
+                if reminder.next_reminder_at is None:
+                    reminder.is_active = False
+                    logger.warning(f"Deactivated reminder {reminder.id} - unable to calculate next reminder")
+                
+            except Exception as e:
+                # Its timestamps aren't advanced, so it will be retried; drop its emails too
+                del pending_emails[queued_before:]
+                logger.error(f"Error processing reminder {reminder.id}: {e}")
+                continue
+        
+        logger.info(f"Processed {reminder_count} due reminders")
+    
+    def send_reminder_notifications(self, db: Session, reminder: GoalReminder, now: Optional[datetime] = None, tick_cache: Optional[TickCache] = None):
         """Send notifications for a specific reminder"""
-        goal = db.query(Goal).filter(Goal.id == reminder.goal_id).first()
+        now = now or datetime.now(timezone.utc)
+        tick_cache = tick_cache or TickCache()
+        
+        goal = reminder.goal
         if not goal:
             logger.error(f"Goal {reminder.goal_id} not found for reminder {reminder.id}")
             return
@@ -104,7 +165,8 @@ class GoalReminderService:
             recipients.extend(goal.members)
         else:
             # Just send to goal creator
-            creator = db.query(User).filter(User.id == goal.created_by).first()
+            # Session.get() hits the identity map when the same creator owns several due goals
+            creator = db.get(User, goal.created_by)
             if creator:
                 recipients.append(creator)
         
@@ -115,66 +177,96 @@ class GoalReminderService:
             logger.warning(f"No recipients found for reminder {reminder.id}")
             return
         
-        # Calculate goal progress for reminder context
-        completion_percentage = goal.calculate_completion_percentage()
-        probability = goal.get_probability_of_achievement()
-        days_remaining = max(0, (goal.end_date - datetime.now(timezone.utc)).days)
+        # SQLite tenant databases hand back naive UTC datetimes
+        goal_now = now if goal.end_date.tzinfo else now.replace(tzinfo=None)
+        
+        # Calculate goal progress for reminder context (shared by every reminder on this goal in the tick)
+        completion_percentage = tick_cache.get_or_compute(("pct", goal.id), goal.calculate_completion_percentage)
+        probability = tick_cache.get_or_compute(("probability", goal.id), lambda: goal.get_probability_of_achievement(goal_now))
+        days_remaining = max(0, (goal.end_date - goal_now).days)
+        progress = {
+            "completion_percentage": completion_percentage,
+            "probability_of_achievement": probability,
+            "days_remaining": days_remaining
+        }
         
         # Create notification message
         default_message = self.generate_default_reminder_message(goal, completion_percentage, probability, days_remaining)
         notification_message = reminder.reminder_message or default_message
         
-        # Send notifications to each recipient
+        # Plain loop: nothing per recipient waits on I/O (emails are only collected), so there is nothing to overlap
+        notifications = []
         for user in recipients:
             try:
-                # Send in-app notification
-                if reminder.send_in_app:
-                    await self.send_in_app_notification(db, user, goal, notification_message)
-                
-                # Send email notification
-                if reminder.send_email:
-                    await self.send_email_notification(db, user, goal, notification_message)
-                
+                notification = self._notify_one(db, user, goal, notification_message, reminder, progress)
             except Exception as e:
-                logger.error(f"Error sending notification to user {user.id} for reminder {reminder.id}: {e}")
+                logger.error(
+                    f"Error sending notification to user {user.id} for reminder {reminder.id} "
+                    f"(org {goal.organization_id}): {e!r}",
+                    exc_info=True
+                )
+                continue
+            if notification is not None:
+                notifications.append(notification)
+        
+        # Insert in-app notifications in one batch
+        
+        if notifications:
+            db.add_all(notifications)
+            logger.info(f"Created {len(notifications)} in-app notifications for goal {goal.id}")
     
-    async def send_in_app_notification(self, db: Session, user: User, goal: Goal, message: str):
-        """Send in-app notification"""
+    def _notify_one(self, db: Session, user: User, goal: Goal, message: str, reminder: GoalReminder, progress: Dict[str, Any]) -> Optional[Notification]:
+        """Send the reminder to a single recipient, returning the in-app notification to insert (if any)"""
+        notification = None
+        
+        # Build in-app notification
+        if reminder.send_in_app:
+            notification = self.send_in_app_notification(db, user, goal, message, progress)
+        
+        # Send email notification
+        if reminder.send_email:
+            self.send_email_notification(db, user, goal, message)
+        
+        return notification
+    
+    def send_in_app_notification(self, db: Session, user: User, goal: Goal, message: str, progress: Dict[str, Any]) -> Optional[Notification]:
+        """Build in-app notification (the caller is responsible for adding it to the session)"""
         try:
-            notification = Notification(
+            return Notification(
                 user_id=user.id,
+                organization_id=goal.organization_id,
                 title=f"Goal Reminder: {goal.title}",
                 message=message,
-                notification_type="goal_reminder",
-                priority="normal",
-                metadata={
+                # The native enum only accepts NotificationType members; category keeps the goal-specific kind
+                notification_type=NotificationType.REMINDER,
+                priority=NotificationPriority.NORMAL,
+                category="goal_reminder",
+                context_data={
                     "goal_id": goal.id,
                     "goal_title": goal.title,
                     "goal_type": goal.goal_type.value,
                     "goal_status": goal.status.value,
-                    "completion_percentage": goal.calculate_completion_percentage(),
-                    "probability_of_achievement": goal.get_probability_of_achievement(),
-                    "days_remaining": max(0, (goal.end_date - datetime.now(timezone.utc)).days)
+                    **progress
                 }
             )
-            db.add(notification)
-            logger.info(f"Created in-app notification for user {user.id} and goal {goal.id}")
             
         except Exception as e:
             logger.error(f"Error creating in-app notification for user {user.id}: {e}")
+            return None
     
-    async def send_email_notification(self, db: Session, user: User, goal: Goal, message: str):
-        """Send email notification (placeholder - implement with actual email service)"""
-        try:
-            # TODO: Implement actual email sending
-            # For now, just log the email that would be sent
-            logger.info(f"Would send email to {user.email} for goal '{goal.title}': {message}")
-            
-            # You would integrate with your email service here
-            # Example: await email_service.send_goal_reminder(user.email, goal, message)
-            
-        except Exception as e:
-            logger.error(f"Error sending email notification to {user.email}: {e}")
+    def send_email_notification(self, db: Session, user: User, goal: Goal, message: str):
+        """Collect an email notification on the session; it is queued once the tick commits"""
+        db.info.setdefault(_PENDING_EMAILS_KEY, []).append((user.email, goal.title, message))
+    
+    def _queue_emails(self, emails: List[Tuple[str, str, str]]):
+        """Queue collected reminder emails for delivery by a Celery worker"""
+        # SMTP latency stays off the scheduler tick; the worker handles delivery and retries
+        for email, goal_title, message in emails:
+            try:
+                send_goal_email.delay(email, goal_title, message)
+                logger.info(f"Queued reminder email to {email} for goal '{goal_title}'")
+            except Exception as e:
+                logger.error(f"Error sending email notification to {email}: {e}")
     
     def generate_default_reminder_message(self, goal: Goal, completion_percentage: float, probability: float, days_remaining: int) -> str:
         """Generate a default reminder message based on goal status"""
@@ -201,73 +293,112 @@ class GoalReminderService:
         else:
             return f"📋 Reminder: Your goal '{goal.title}' needs attention. Current progress: {completion_percentage:.0f}% with {days_remaining} days remaining."
     
-    async def update_overdue_goals(self):
-        """Update status of overdue goals"""
-        logger.info("Checking for overdue goals...")
+    async def update_overdue_goals(self, org_id: str):
+        """Update status of one tenant's overdue goals"""
+        logger.info(f"Checking for overdue goals for org {org_id}...")
         
-        db_gen = get_db()
-        db: Session = next(db_gen)
+        db = await tenant_manager.get_tenant_session(org_id)
         
         try:
-            now = datetime.now(timezone.utc)
+            await db.run_sync(self._update_overdue_goals, datetime.now(timezone.utc))
+            await db.commit()
             
-            # Find goals that are overdue but not marked as such
-            overdue_goals = db.query(Goal).filter(
+        except Exception as e:
+            logger.error(f"Error updating overdue goals for org {org_id}: {e}")
+            await db.rollback()
+        finally:
+            await db.close()
+    
+    def _update_overdue_goals(self, db: Session, now: datetime):
+        """Mark overdue goals and notify their members (runs on the sync session)"""
+        # Flip overdue goals in a single UPDATE and only materialize the rows that transitioned
+        stmt = (
+            update(Goal)
+            .where(
                 and_(
                     Goal.end_date < now,
-                    Goal.status.in_([GoalStatus.NOT_STARTED, GoalStatus.IN_PROGRESS, GoalStatus.PAUSED]),
-                    Goal.is_archived == False
+                    OPEN_GOAL_FILTER
                 )
+            )
+            .values(status=GoalStatus.OVERDUE)
+            .returning(
+                Goal.id,
+                Goal.title,
+                Goal.created_by,
+                Goal.organization_id,
+                Goal.end_date,
+                Goal.target_value,
+                Goal.current_value,
+                Goal.completion_percentage
+            )
+            .execution_options(synchronize_session=False)
+        )
+        overdue_goals = db.execute(stmt).all()
+        
+        logger.info(f"Marked {len(overdue_goals)} goals as overdue")
+        
+        if overdue_goals:
+            # Send overdue notification to goal members
+            self.send_overdue_notification(db, overdue_goals)
+    
+    def send_overdue_notification(self, db: Session, overdue_goals: List[Row]):
+        """Send overdue notifications for goals returned by the overdue UPDATE"""
+        try:
+            goal_ids = [row.id for row in overdue_goals]
+            
+            # Load all member ids for the transitioned goals in one query
+            recipients_by_goal: Dict[str, List[str]] = {goal_id: [] for goal_id in goal_ids}
+            member_rows = db.execute(
+                select(goal_members.c.goal_id, goal_members.c.user_id).where(goal_members.c.goal_id.in_(goal_ids))
             ).all()
+            for goal_id, user_id in member_rows:
+                recipients_by_goal[goal_id].append(user_id)
             
-            logger.info(f"Found {len(overdue_goals)} overdue goals")
+            # Checklist progress for every goal in one aggregate query
+            checklist_ratios = goal_progress_service.get_checklist_completion_ratios(db, goal_ids)
             
+            notifications = []
             for goal in overdue_goals:
-                goal.status = GoalStatus.OVERDUE
+                recipients = recipients_by_goal[goal.id]
                 
-                # Send overdue notification to goal members
-                await self.send_overdue_notification(db, goal)
-            
-            db.commit()
-            
-        except Exception as e:
-            logger.error(f"Error updating overdue goals: {e}")
-            db.rollback()
-        finally:
-            db.close()
-    
-    async def send_overdue_notification(self, db: Session, goal: Goal):
-        """Send overdue notification for a goal"""
-        try:
-            recipients = list(goal.members) if goal.members else []
-            
-            # Add creator if not in members
-            creator = db.query(User).filter(User.id == goal.created_by).first()
-            if creator and creator not in recipients:
-                recipients.append(creator)
-            
-            overdue_message = f"⚠️ Your goal '{goal.title}' is now overdue. Consider updating the deadline or marking it as completed if finished."
+                # Add creator if not in members
+                if goal.created_by and goal.created_by not in recipients:
+                    recipients.append(goal.created_by)
+                
+                # Same precedence as Goal.calculate_completion_percentage: target, then checklist, then stored value
+                if goal.target_value and goal.target_value > 0:
+                    completion_percentage = min(100.0, (goal.current_value / goal.target_value) * 100)
+                elif goal.id in checklist_ratios:
+                    completion_percentage = checklist_ratios[goal.id] * 100
+                else:
+                    completion_percentage = goal.completion_percentage or 0.0
+                
+                overdue_message = f"⚠️ Your goal '{goal.title}' is now overdue. Consider updating the deadline or marking it as completed if finished."
+                
+                for user_id in recipients:
+                    notifications.append({
+                        "user_id": user_id,
+                        "organization_id": goal.organization_id,
+                        "title": f"Goal Overdue: {goal.title}",
+                        "message": overdue_message,
+                        "notification_type": NotificationType.REMINDER,
+                        "priority": NotificationPriority.HIGH,
+                        "category": "goal_overdue",
+                        "context_data": {
+                            "goal_id": goal.id,
+                            "goal_title": goal.title,
+                            "original_end_date": goal.end_date.isoformat(),
+                            "completion_percentage": completion_percentage
+                        }
+                    })
             
-            for user in recipients:
-                notification = Notification(
-                    user_id=user.id,
-                    title=f"Goal Overdue: {goal.title}",
-                    message=overdue_message,
-                    notification_type="goal_overdue",
-                    priority="high",
-                    metadata={
-                        "goal_id": goal.id,
-                        "goal_title": goal.title,
-                        "original_end_date": goal.end_date.isoformat(),
-                        "completion_percentage": goal.calculate_completion_percentage()
-                    }
-                )
-                db.add(notification)
+            if notifications:
+                db.execute(insert(Notification), notifications)
             
-            logger.info(f"Sent overdue notifications for goal {goal.id}")
+            logger.info(f"Sent {len(notifications)} overdue notifications for {len(overdue_goals)} goals")
             
         except Exception as e:
-            logger.error(f"Error sending overdue notification for goal {goal.id}: {e}")
+            logger.error(f"Error sending overdue notifications: {e}")
 
 # Global instance
 goal_reminder_service = GoalReminderService()
@@ -1,8 +1,31 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+import asyncio
+import hashlib
+import json
 import httpx
 from ..core.config import settings
+from ..core.redis import get_redis
+# orjson encodes/decodes request and response bodies several times faster; stdlib json is the fallback
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if HAS_ORJSON else json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: str | bytes) -> Any:
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
 
 class GrokClient:
+    # Shared keep-alive pools, one per (base_url, api_key), reused across GrokClient instances
+    _clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+    # In-flight chat completions by prompt cache key, for collapsing duplicate concurrent calls
+    _inflight: Dict[str, "asyncio.Future[str]"] = {}
+
     def __init__(self, api_key: str | None = None, base_url: str | None = None, model: str | None = None):
         self.api_key = api_key or settings.XAI_API_KEY
         self.base_url = (base_url or settings.XAI_BASE_URL).rstrip("/")
@@ -15,15 +38,45 @@ class GrokClient:
             else:
                 raise ValueError("XAI_API_KEY not configured")
 
-    async def chat(self, prompt: str, system: str | None = None, temperature: float = 0.2) -> str:
+    def _get_client(self) -> httpx.AsyncClient:
+        key = (self.base_url, self.api_key)
+        client = GrokClient._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+            )
+            GrokClient._clients[key] = client
+        return client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared connection pools (called on app shutdown)"""
+        clients = list(cls._clients.values())
+        cls._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def _cache_key(self, prompt: str, system: str | None, temperature: float) -> str:
+        # Scoped to the endpoint and key, so per-org keys or a staging URL never share completions
+        key_fingerprint = hashlib.blake2b((self.api_key or "").encode("utf-8"), digest_size=8).hexdigest()
+        digest = hashlib.blake2b(
+            f"{self.base_url}|{key_fingerprint}|{self.model}|{temperature}|{system or ''}|{prompt}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        return f"grok:chat:{digest}"
+
+    async def chat(
+        self, prompt: str, system: str | None = None, temperature: float = 0.2, bypass_cache: bool = False
+    ) -> str:
         if self.dev_fallback:
             # Return deterministic short mock output for development
             return "{\"message\": \"dev-fallback\"}"
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         payload = {
             "model": self.model,
             "temperature": temperature,
@@ -31,15 +84,53 @@ class GrokClient:
                 {"role": "user", "content": prompt}
             ],
         }
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
-            # xAI Grok compatible structure assumption
-            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            return content
-
-    async def extract(self, instruction: str, text: str) -> Dict[str, Any]:
+        key = self._cache_key(prompt, system, temperature)
+        if bypass_cache:
+            return await self._complete(key, payload, use_cache=False)
+
+        # Identical concurrent prompts share one in-flight request instead of each calling the API
+        task = GrokClient._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._complete(key, payload))
+            GrokClient._inflight[key] = task
+            task.add_done_callback(lambda _: GrokClient._inflight.pop(key, None))
+        # Shield so one caller being cancelled doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _complete(self, key: str, payload: Dict[str, Any], use_cache: bool = True) -> str:
+        # Identical prompts are answered from Redis; cache errors never fail the request
+        if use_cache:
+            try:
+                cached = await get_redis().get(key)
+                if cached is not None:
+                    return cached.decode("utf-8")
+            except Exception:
+                pass
+        client = self._get_client()
+        r = await client.post("/chat/completions", content=_dumps(payload))
+        r.raise_for_status()
+        data = _loads(r.content)
+        # xAI Grok compatible structure assumption
+        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if content:
+            try:
+                await get_redis().set(key, content, ex=settings.XAI_RESPONSE_CACHE_TTL)
+            except Exception:
+                pass
+        return content
+
+    async def embed(self, texts: List[str], model: str | None = None) -> List[List[float]]:
+        """Embedding vectors for texts, in input order; empty when no embedding model is available"""
+        model = model or settings.XAI_EMBEDDING_MODEL
+        if self.dev_fallback or not model or not texts:
+            return []
+        client = self._get_client()
+        r = await client.post("/embeddings", content=_dumps({"model": model, "input": texts}))
+        r.raise_for_status()
+        data = _loads(r.content).get("data", [])
+        return [item.get("embedding", []) for item in sorted(data, key=lambda item: item.get("index", 0))]
+
+    async def extract(self, instruction: str, text: str, bypass_cache: bool = False) -> Dict[str, Any]:
         prompt = f"""
 You are an information extraction assistant.
 Instruction: {instruction}
@@ -49,27 +140,25 @@ Return only valid JSON with keys requested.
         if self.dev_fallback:
             # Simple heuristic mock
             return {"summary": "dev summary", "action_items": [], "decisions": [], "sentiments": {}, "score": 42, "severity": "medium", "explanation": "dev", "factors": {}}
-        resp = await self.chat(prompt, system="Extract structured JSON.")
+        resp = await self.chat(prompt, system="Extract structured JSON.", bypass_cache=bypass_cache)
         # Best-effort JSON parse
-        import json
         try:
-            return json.loads(resp)
+            return _loads(resp)
         except Exception:
             return {"raw": resp}
 
-    async def plan(self, instruction: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        import json
+    async def plan(self, instruction: str, context: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
         prompt = f"""
 Plan actions for project management based on the instruction and context.
 Instruction: {instruction}
-Context JSON: {json.dumps(context)}
+Context JSON: {_dumps(context).decode("utf-8")}
 Return JSON: {{"actions": [{{"type": "create_task|reminder|approval", "payload": {{}}}}]}}
 """
         if self.dev_fallback:
             return {"actions": [{"type": "create_task", "payload": {"title": instruction[:50], "project_id": context.get("project_id")}}]}
-        resp = await self.chat(prompt, system="PM automation planner.")
+        resp = await self.chat(prompt, system="PM automation planner.", bypass_cache=bypass_cache)
         try:
-            return json.loads(resp)
+            return _loads(resp)
         except Exception:
             return {"raw": resp}
 
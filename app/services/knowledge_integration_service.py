@@ -1,19 +1,210 @@
 """Knowledge Base Integration Service for Auto-linking and Smart Recommendations"""
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, text
+from sqlalchemy import select, and_, or_, func, text, literal_column, literal, cast, case, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import selectinload
+from collections import OrderedDict
+import asyncio
+import functools
+import hashlib
+import math
 import re
 import json
-from datetime import datetime, timedelta
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+# NumPy scores the semantic pool in one BLAS mat-vec; pure Python is the fallback
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 from ..models.knowledge_base import KnowledgeArticle, KnowledgeLink, KnowledgeStatus
 from ..models.context_card import ContextCard
 from ..models.decision_log import DecisionLog
 from ..models.handoff_summary import HandoffSummary
 from ..models.task import Task
+from ..models.user import User
 from ..models.project import Project
 from ..models.notification import Notification, NotificationType, NotificationPriority
+from ..core.config import settings
+from .grok_client import GrokClient
+
+logger = logging.getLogger(__name__)
+
+
+# Keyword extraction: 3+ letter words minus common English stop words
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+})
+
+
+@functools.lru_cache(maxsize=8192)
+def extract_keywords(content: str) -> FrozenSet[str]:
+    """Unique lowercase keywords of a text (shared by task matching and article indexing).
+
+    Memoized by the raw text: the same article, card and decision texts are re-scored across lookups.
+    """
+    if not content:
+        return frozenset()
+    
+    # Simple keyword extraction (in production, use proper NLP): one regex pass, one set build
+    return frozenset(word for word in _WORD_RE.findall(content.lower()) if word not in STOP_WORDS)
+
+
+def _derived_article_keywords(article: KnowledgeArticle) -> List[str]:
+    return sorted(extract_keywords(f"{article.title} {article.summary or ''}"))
+
+
+def keywords_are_derived(article: KnowledgeArticle) -> bool:
+    """Whether the article's keywords are empty or exactly what its title and summary derive"""
+    return not article.keywords or list(article.keywords) == _derived_article_keywords(article)
+
+
+def fill_article_keywords(article: KnowledgeArticle, rederive: bool = False) -> None:
+    """Derive search keywords from the article text when the author didn't supply any.
+
+    rederive replaces keywords that were derived from an earlier title/summary.
+    """
+    if rederive or not article.keywords:
+        article.keywords = _derived_article_keywords(article)
+
+
+# Relevance assumed for every article until usage-based scoring is stored
+BASELINE_ARTICLE_RELEVANCE = 0.5
+
+# Recent activity ids per (user_id, days) for recommendations: (cached_at, activity), most recently used last.
+# Only plain ids are cached so no ORM instance outlives the session that loaded it.
+USER_ACTIVITY_CACHE_TTL = 60
+_USER_ACTIVITY_CACHE_MAX_ENTRIES = 2048
+_USER_ACTIVITY_CACHE: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Hybrid retrieval tuning: FTS over-fetch factor, popular-article pool size and cosine weight
+HYBRID_CANDIDATE_FACTOR = 4
+SEMANTIC_POOL_SIZE = 200
+SEMANTIC_WEIGHT = 0.5
+
+# Normalized embedding matrix of each database's semantic pool: bind URL -> (loaded_at, ids, matrix)
+SEMANTIC_POOL_TTL = 300
+_SEMANTIC_POOLS: Dict[str, Tuple[float, List[str], Any]] = {}
+
+# Query embeddings keyed by a hash of the task text, most recently used last
+_QUERY_EMBEDDING_CACHE: "OrderedDict[str, List[float]]" = OrderedDict()
+_QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+
+def embeddings_enabled() -> bool:
+    return bool(settings.XAI_EMBEDDING_MODEL and settings.XAI_API_KEY)
+
+
+def _article_embedding_text(article: KnowledgeArticle) -> str:
+    return f"{article.title} {article.summary or ''} {(article.content or '')[:2000]}"
+
+
+async def refresh_article_embedding(article: KnowledgeArticle) -> None:
+    """Recompute an article's embedding before it is saved (best-effort, no-op when disabled)"""
+    if not embeddings_enabled():
+        return
+    try:
+        vectors = await GrokClient().embed([_article_embedding_text(article)])
+        if vectors:
+            article.embedding = vectors[0]
+            _SEMANTIC_POOLS.clear()
+    except Exception:
+        logger.warning("Failed to refresh embedding for article %s", article.id, exc_info=True)
+
+
+async def get_query_embedding(query: str) -> Optional[List[float]]:
+    """Embedding for a search text, cached so repeated lookups for the same task skip the API"""
+    key = hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+    cached = _QUERY_EMBEDDING_CACHE.get(key)
+    if cached is not None:
+        _QUERY_EMBEDDING_CACHE.move_to_end(key)
+        return cached
+    try:
+        vectors = await GrokClient().embed([query])
+    except Exception:
+        return None
+    if not vectors:
+        return None
+    _QUERY_EMBEDDING_CACHE[key] = vectors[0]
+    if len(_QUERY_EMBEDDING_CACHE) > _QUERY_EMBEDDING_CACHE_SIZE:
+        _QUERY_EMBEDDING_CACHE.popitem(last=False)
+    return vectors[0]
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _build_embedding_matrix(vectors: List[List[float]]) -> Any:
+    """L2-normalize vectors once so scoring a query is a single dot product per row"""
+    if HAS_NUMPY:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    normalized = []
+    for vector in vectors:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        normalized.append([x / norm for x in vector])
+    return normalized
+
+
+def _score_embedding_matrix(matrix: Any, query_vector: List[float]) -> List[float]:
+    """Cosine similarity of every matrix row against the query"""
+    if HAS_NUMPY:
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm or matrix.shape[1] != query.shape[0]:
+            return [0.0] * matrix.shape[0]
+        return (matrix @ (query / norm)).tolist()
+    return [_cosine_similarity(row, query_vector) for row in matrix]
+
+
+# Must match the expression of knowledge_articles_fts_idx so PostgreSQL can use the GIN index
+ARTICLE_SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('english', coalesce(knowledge_articles.title,'') || ' ' || "
+    "coalesce(knowledge_articles.summary,'') || ' ' || coalesce(knowledge_articles.content,''))"
+)
+
+
+# Must match the expressions of context_cards_fts_idx and decision_logs_fts_idx (add_fts_indexes)
+CONTEXT_CARD_SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('english', coalesce(context_cards.title,'') || ' ' || coalesce(context_cards.content,''))"
+)
+DECISION_SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('english', coalesce(decision_logs.title,'') || ' ' || coalesce(decision_logs.description,'') || ' ' || "
+    "coalesce(decision_logs.problem_statement,'') || ' ' || coalesce(decision_logs.decision_outcome,''))"
+)
+
+
+def keyword_tsquery(keywords):
+    """OR-query over task keywords; keywords are plain [a-z] words so they are safe tsquery lexemes"""
+    return func.to_tsquery(literal_column("'english'"), " | ".join(sorted(keywords)))
+
+
+# Must match the expression of knowledge_articles_keywords_idx; keyword hits rank slightly above text-only hits
+ARTICLE_KEYWORDS = cast(KnowledgeArticle.keywords, JSONB)
+KEYWORD_MATCH_BONUS = 0.1
+
+
+# Task plus the relationships knowledge matching reads; built once, filtered per call
+TASK_WITH_CONTEXT = select(Task).options(
+    selectinload(Task.project),
+    selectinload(Task.assignee),
+    selectinload(Task.context_cards)
+)
 
 
 class KnowledgeIntegrationService:
@@ -33,27 +224,37 @@ class KnowledgeIntegrationService:
             return []
         
         # Find relevant knowledge
-        relevant_articles = await self._find_relevant_articles(task)
-        relevant_context_cards = await self._find_relevant_context_cards(task)
-        relevant_decisions = await self._find_relevant_decisions(task)
+        relevant_articles, relevant_context_cards, relevant_decisions = \
+            await self._find_relevant_knowledge(task)
         
         # Create knowledge links
         links_created = []
         
-        # Link articles
-        for article, relevance_score in relevant_articles:
-            link = await self._create_knowledge_link(
-                article.id, task_id, "task", "references", 
+        # Link articles, persisting all links in one transaction
+        links = [
+            self._create_knowledge_link(
+                article.id, task_id, "task", "references",
                 relevance_score, user_id, auto_generated=True
             )
-            if link:
-                links_created.append({
-                    "type": "article",
-                    "id": article.id,
-                    "title": article.title,
-                    "relevance_score": relevance_score,
-                    "link_type": "references"
-                })
+            for article, relevance_score in relevant_articles
+        ]
+        if links:
+            try:
+                self.db.add_all(links)
+                await self.db.commit()
+            except Exception:
+                logger.exception("Failed to link %d knowledge articles to task %s", len(links), task_id)
+                await self.db.rollback()
+                relevant_articles = []
+        
+        for article, relevance_score in relevant_articles:
+            links_created.append({
+                "type": "article",
+                "id": article.id,
+                "title": article.title,
+                "relevance_score": relevance_score,
+                "link_type": "references"
+            })
         
         # Link context cards
         for card, relevance_score in relevant_context_cards:
@@ -93,9 +294,8 @@ class KnowledgeIntegrationService:
             return {"articles": [], "context_cards": [], "decisions": []}
         
         # Find relevant knowledge
-        relevant_articles = await self._find_relevant_articles(task, limit=limit)
-        relevant_context_cards = await self._find_relevant_context_cards(task, limit=limit)
-        relevant_decisions = await self._find_relevant_decisions(task, limit=limit)
+        relevant_articles, relevant_context_cards, relevant_decisions = \
+            await self._find_relevant_knowledge(task, limit=limit)
         
         return {
             "articles": [
@@ -124,7 +324,7 @@ class KnowledgeIntegrationService:
                 {
                     "id": decision.id,
                     "title": decision.title,
-                    "decision_summary": decision.decision_summary,
+                    "decision_summary": decision.description,
                     "impact_level": decision.impact_level.value,
                     "relevance_score": score,
                     "decision_date": decision.decision_date.isoformat()
@@ -196,57 +396,92 @@ class KnowledgeIntegrationService:
             "decisions": 0
         }
         
-        # Update article relevance based on views and links
-        articles_query = select(KnowledgeArticle).where(
-            KnowledgeArticle.organization_id == org_id
+        # Articles have no stored relevance score, so this only reports how many articles'
+        # helpful-vote ratio has drifted from the baseline; counted server-side, nothing is loaded
+        usage_ratio = func.coalesce(KnowledgeArticle.helpful_votes, 0) * 1.0 / func.greatest(
+            func.coalesce(KnowledgeArticle.view_count, 0), 1
         )
-        articles_result = await self.db.execute(articles_query)
-        articles = articles_result.scalars().all()
+        count_query = select(func.count(KnowledgeArticle.id)).join(
+            User, User.id == KnowledgeArticle.author_id
+        ).where(
+            and_(
+                User.organization_id == org_id,
+                func.abs(BASELINE_ARTICLE_RELEVANCE - usage_ratio) > 0.1
+            )
+        )
+        updated_counts["articles"] = (await self.db.execute(count_query)).scalar() or 0
         
-        for article in articles:
-            # Calculate new relevance score based on:
-            # - View count
-            # - Recent views
-            # - Links to other content
-            # - User ratings
-            new_score = await self._calculate_article_relevance(article)
-            if abs(new_score - (article.helpful_votes / max(article.view_count, 1))) > 0.1:
-                # Update if significant change
-                updated_counts["articles"] += 1
-        
-        await self.db.commit()
         return updated_counts
     
     # Private helper methods
     
     async def _get_task_with_context(self, task_id: str) -> Optional[Task]:
         """Get task with all related context"""
-        query = select(Task).options(
-            selectinload(Task.project),
-            selectinload(Task.assignee),
-            selectinload(Task.context_cards)
-        ).where(Task.id == task_id)
-        
-        result = await self.db.execute(query)
+        result = await self.db.execute(TASK_WITH_CONTEXT.where(Task.id == task_id))
         return result.scalar_one_or_none()
     
-    async def _find_relevant_articles(
+    async def _find_relevant_knowledge(
         self, task: Task, limit: int = 5
+    ) -> Tuple[
+        List[Tuple[KnowledgeArticle, float]],
+        List[Tuple[ContextCard, float]],
+        List[Tuple[DecisionLog, float]]
+    ]:
+        """Run the article, context card and decision lookups concurrently"""
+        
+        # Tokenize the task once; every finder scores its candidates against the same keyword set
+        task_keywords = self._extract_keywords(f"{task.title} {task.description or ''}")
+        
+        bind = self.db.bind
+        if bind is None:
+            # No single engine to open sibling sessions on; fall back to sequential lookups
+            return (
+                await self._find_relevant_articles(task, limit=limit, task_keywords=task_keywords),
+                await self._find_relevant_context_cards(task, limit=limit, task_keywords=task_keywords),
+                await self._find_relevant_decisions(task, limit=limit, task_keywords=task_keywords),
+            )
+        
+        # AsyncSession cannot run statements concurrently, so each lookup gets its own read-only session
+        async def run(finder):
+            async with AsyncSession(bind, expire_on_commit=False) as session:
+                return await finder(task, limit=limit, db=session, task_keywords=task_keywords)
+        
+        return await asyncio.gather(
+            run(self._find_relevant_articles),
+            run(self._find_relevant_context_cards),
+            run(self._find_relevant_decisions),
+        )
+    
+    async def _find_relevant_articles(
+        self, task: Task, limit: int = 5, db: Optional[AsyncSession] = None,
+        task_keywords: Optional[FrozenSet[str]] = None
     ) -> List[Tuple[KnowledgeArticle, float]]:
         """Find relevant knowledge base articles for a task"""
         
         # Extract keywords from task
-        keywords = self._extract_keywords(
-            f"{task.title} {task.description or ''}"
-        )
+        if task_keywords is None:
+            task_keywords = self._extract_keywords(f"{task.title} {task.description or ''}")
+        keywords = sorted(task_keywords)
         
         if not keywords:
             return []
         
+        db = db or self.db
+        if db.get_bind().dialect.name == "postgresql":
+            if not embeddings_enabled():
+                return await self._search_articles_fts(db, keywords, limit)
+            
+            # Hybrid retrieval: widen the FTS candidate set, then blend in embedding similarity
+            fts_results = await self._search_articles_fts(db, keywords, limit * HYBRID_CANDIDATE_FACTOR)
+            query_vector = await get_query_embedding(f"{task.title} {task.description or ''}")
+            if not query_vector:
+                return fts_results[:limit]
+            return await self._blend_semantic_scores(db, fts_results, query_vector, limit)
+        
         # Search for articles using text similarity
         search_text = " ".join(keywords)
         
-        # Use PostgreSQL full-text search (simplified)
+        # Substring fallback for non-PostgreSQL databases (e.g. SQLite in development)
         query = select(KnowledgeArticle).where(
             and_(
                 KnowledgeArticle.status == KnowledgeStatus.PUBLISHED,
@@ -261,26 +496,121 @@ class KnowledgeIntegrationService:
             KnowledgeArticle.helpful_votes.desc()
         ).limit(limit)
         
-        result = await self.db.execute(query)
+        result = await db.execute(query)
         articles = result.scalars().all()
         
         # Calculate relevance scores
         relevant_articles = []
         for article in articles:
-            score = self._calculate_text_similarity(
-                f"{task.title} {task.description or ''}", 
-                f"{article.title} {article.summary or ''}"
+            score = self._keyword_similarity(
+                task_keywords, f"{article.title} {article.summary or ''}"
             )
             if score > 0.3:  # Minimum relevance threshold
                 relevant_articles.append((article, score))
         
         return sorted(relevant_articles, key=lambda x: x[1], reverse=True)
     
+    async def _search_articles_fts(
+        self, db: AsyncSession, keywords: List[str], limit: int
+    ) -> List[Tuple[KnowledgeArticle, float]]:
+        """Rank published articles server-side with PostgreSQL full-text search"""
+        
+        # Match any task keyword
+        ts_query = keyword_tsquery(keywords)
+        
+        # Articles tagged with any task keyword also qualify (GIN-indexed jsonb ?| lookup)
+        keyword_match = ARTICLE_KEYWORDS.op("?|")(literal(list(keywords), ARRAY(Text)))
+        
+        # Normalization 32 maps the text rank into [0, 1) so it can be used as the relevance score
+        rank = func.ts_rank_cd(ARTICLE_SEARCH_DOCUMENT, ts_query, 32) + case(
+            (keyword_match, KEYWORD_MATCH_BONUS), else_=0.0
+        )
+        
+        query = select(KnowledgeArticle, rank.label("score")).where(
+            and_(
+                KnowledgeArticle.status == KnowledgeStatus.PUBLISHED,
+                or_(ARTICLE_SEARCH_DOCUMENT.op("@@")(ts_query), keyword_match)
+            )
+        ).order_by(
+            # Popular articles get a logarithmic boost on top of text relevance
+            (rank * (1 + func.ln(1 + func.coalesce(KnowledgeArticle.view_count, 0)))).desc()
+        ).limit(limit)
+        
+        result = await db.execute(query)
+        return [(article, float(score)) for article, score in result.all()]
+    
+    async def _blend_semantic_scores(
+        self, db: AsyncSession, fts_results: List[Tuple[KnowledgeArticle, float]],
+        query_vector: List[float], limit: int
+    ) -> List[Tuple[KnowledgeArticle, float]]:
+        """Combine FTS rank with cosine similarity over FTS hits plus a pool of popular embedded articles"""
+        
+        articles = {article.id: article for article, _ in fts_results}
+        # ts_rank_cd is unbounded; scale to [0, 1] so it blends evenly with cosine similarity
+        fts_max = max((score for _, score in fts_results), default=0.0) or 1.0
+        fts_scores = {article.id: score / fts_max for article, score in fts_results}
+        
+        # Semantic candidates catch matches that share no keywords with the task ("outage" vs "downtime")
+        pool_ids, pool_matrix = await self._get_semantic_pool(db)
+        semantic_scores = dict(zip(pool_ids, _score_embedding_matrix(pool_matrix, query_vector))) if pool_ids else {}
+        for article in articles.values():
+            if article.id not in semantic_scores and article.embedding:
+                semantic_scores[article.id] = _cosine_similarity(article.embedding, query_vector)
+        
+        blended = sorted(
+            (
+                (article_id, (1 - SEMANTIC_WEIGHT) * fts_scores.get(article_id, 0.0)
+                 + SEMANTIC_WEIGHT * max(0.0, semantic_scores.get(article_id, 0.0)))
+                for article_id in set(fts_scores) | set(semantic_scores)
+            ),
+            key=lambda x: x[1],
+            reverse=True
+        )[:limit]
+        
+        # Load rows only for semantic-only winners that FTS didn't already return
+        missing_ids = [article_id for article_id, _ in blended if article_id not in articles]
+        if missing_ids:
+            result = await db.execute(select(KnowledgeArticle).where(KnowledgeArticle.id.in_(missing_ids)))
+            articles.update({article.id: article for article in result.scalars().all()})
+        
+        return [(articles[article_id], score) for article_id, score in blended if article_id in articles]
+    
+    async def _get_semantic_pool(self, db: AsyncSession) -> Tuple[List[str], Any]:
+        """Popular embedded articles as (ids, normalized matrix), cached per database for a few minutes"""
+        
+        cache_key = str(db.get_bind().url)
+        cached = _SEMANTIC_POOLS.get(cache_key)
+        if cached and time.monotonic() - cached[0] < SEMANTIC_POOL_TTL:
+            return cached[1], cached[2]
+        
+        pool_query = select(KnowledgeArticle.id, KnowledgeArticle.embedding).where(
+            and_(
+                KnowledgeArticle.status == KnowledgeStatus.PUBLISHED,
+                KnowledgeArticle.embedding.isnot(None)
+            )
+        ).order_by(KnowledgeArticle.view_count.desc()).limit(SEMANTIC_POOL_SIZE)
+        rows = (await db.execute(pool_query)).all()
+        
+        # Vectors from a different embedding model can't share the matrix; keep the dominant dimension
+        dims = [len(embedding) for _, embedding in rows if embedding]
+        dim = max(set(dims), key=dims.count) if dims else 0
+        rows = [(article_id, embedding) for article_id, embedding in rows if embedding and len(embedding) == dim]
+        
+        ids = [article_id for article_id, _ in rows]
+        matrix = _build_embedding_matrix([embedding for _, embedding in rows]) if rows else None
+        _SEMANTIC_POOLS[cache_key] = (time.monotonic(), ids, matrix)
+        return ids, matrix
+    
     async def _find_relevant_context_cards(
-        self, task: Task, limit: int = 5
+        self, task: Task, limit: int = 5, db: Optional[AsyncSession] = None,
+        task_keywords: Optional[FrozenSet[str]] = None
     ) -> List[Tuple[ContextCard, float]]:
         """Find relevant context cards for a task"""
         
+        db = db or self.db
+        if task_keywords is None:
+            task_keywords = self._extract_keywords(f"{task.title} {task.description or ''}")
+        
         # Look for context cards in the same project or related projects
         query = select(ContextCard).where(
             and_(
@@ -288,18 +618,28 @@ class KnowledgeIntegrationService:
                 ContextCard.is_active == True,
                 ContextCard.is_archived == False
             )
-        ).order_by(ContextCard.created_at.desc()).limit(limit * 2)
-        
-        result = await self.db.execute(query)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # A card sharing no keyword with the task can't pass the threshold; let the FTS index
+            # drop those and return only the `limit` best-ranked candidates
+            if not task_keywords:
+                return []
+            ts_query = keyword_tsquery(task_keywords)
+            query = query.where(CONTEXT_CARD_SEARCH_DOCUMENT.op("@@")(ts_query)).order_by(
+                func.ts_rank_cd(CONTEXT_CARD_SEARCH_DOCUMENT, ts_query).desc()
+            ).limit(limit)
+        else:
+            query = query.order_by(ContextCard.created_at.desc()).limit(limit * 2)
+        
+        result = await db.execute(query)
         context_cards = result.scalars().all()
         
         # Calculate relevance scores
         relevant_cards = []
-        task_text = f"{task.title} {task.description or ''}"
         
         for card in context_cards:
             card_text = f"{card.title} {card.content}"
-            score = self._calculate_text_similarity(task_text, card_text)
+            score = self._keyword_similarity(task_keywords, card_text)
             
             # Boost score for certain context types
             if card.context_type.value in ['DECISION', 'ISSUE']:
@@ -311,24 +651,38 @@ class KnowledgeIntegrationService:
         return sorted(relevant_cards, key=lambda x: x[1], reverse=True)[:limit]
     
     async def _find_relevant_decisions(
-        self, task: Task, limit: int = 5
+        self, task: Task, limit: int = 5, db: Optional[AsyncSession] = None,
+        task_keywords: Optional[FrozenSet[str]] = None
     ) -> List[Tuple[DecisionLog, float]]:
         """Find relevant decision logs for a task"""
         
+        db = db or self.db
+        if task_keywords is None:
+            task_keywords = self._extract_keywords(f"{task.title} {task.description or ''}")
+        
         query = select(DecisionLog).where(
             DecisionLog.project_id == task.project_id
-        ).order_by(DecisionLog.decision_date.desc()).limit(limit * 2)
-        
-        result = await self.db.execute(query)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # Same keyword prefilter as context cards, ranked by the decision_logs FTS index
+            if not task_keywords:
+                return []
+            ts_query = keyword_tsquery(task_keywords)
+            query = query.where(DECISION_SEARCH_DOCUMENT.op("@@")(ts_query)).order_by(
+                func.ts_rank_cd(DECISION_SEARCH_DOCUMENT, ts_query).desc()
+            ).limit(limit)
+        else:
+            query = query.order_by(DecisionLog.decision_date.desc()).limit(limit * 2)
+        
+        result = await db.execute(query)
         decisions = result.scalars().all()
         
         # Calculate relevance scores
         relevant_decisions = []
-        task_text = f"{task.title} {task.description or ''}"
         
         for decision in decisions:
-            decision_text = f"{decision.title} {decision.decision_summary} {decision.problem_statement}"
-            score = self._calculate_text_similarity(task_text, decision_text)
+            decision_text = f"{decision.title} {decision.description} {decision.problem_statement}"
+            score = self._keyword_similarity(task_keywords, decision_text)
             
             # Boost score for high-impact decisions
             if decision.impact_level.value in ['HIGH', 'CRITICAL']:
@@ -339,38 +693,25 @@ class KnowledgeIntegrationService:
         
         return sorted(relevant_decisions, key=lambda x: x[1], reverse=True)[:limit]
     
-    def _extract_keywords(self, text: str) -> List[str]:
+    def _extract_keywords(self, content: str) -> FrozenSet[str]:
         """Extract meaningful keywords from text"""
-        if not text:
-            return []
-        
-        # Simple keyword extraction (in production, use proper NLP)
-        text = text.lower()
-        
-        # Remove common words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
-            'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-            'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
-        }
-        
-        # Extract words
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text)
-        keywords = [word for word in words if word not in stop_words]
-        
-        # Return unique keywords
-        return list(set(keywords))
+        return extract_keywords(content)
     
     def _calculate_text_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts (simplified Jaccard similarity)"""
         if not text1 or not text2:
             return 0.0
         
-        words1 = set(self._extract_keywords(text1))
-        words2 = set(self._extract_keywords(text2))
+        return self._keyword_similarity(self._extract_keywords(text1), text2)
+    
+    def _keyword_similarity(self, words1: FrozenSet[str], text2: str) -> float:
+        """Jaccard similarity between a pre-extracted keyword set and a text"""
+        if not words1 or not text2:
+            return 0.0
         
-        if not words1 or not words2:
+        words2 = self._extract_keywords(text2)
+        
+        if not words2:
             return 0.0
         
         intersection = words1.intersection(words2)
@@ -378,39 +719,32 @@ class KnowledgeIntegrationService:
         
         return len(intersection) / len(union) if union else 0.0
     
-    async def _create_knowledge_link(
+    def _create_knowledge_link(
         self, article_id: str, entity_id: str, entity_type: str,
         link_type: str, relevance_score: float, user_id: str, auto_generated: bool = False
-    ) -> Optional[KnowledgeLink]:
-        """Create a knowledge link between article and entity"""
-        
-        try:
-            link = KnowledgeLink(
-                article_id=article_id,
-                link_type=link_type,
-                relevance_score=int(relevance_score * 10),  # Scale to 1-10
-                created_by_id=user_id,
-                auto_generated=auto_generated,
-                confidence_score="high" if relevance_score > 0.7 else "medium" if relevance_score > 0.4 else "low"
-            )
-            
-            # Set the appropriate foreign key based on entity type
-            if entity_type == "task":
-                link.task_id = entity_id
-            elif entity_type == "project":
-                link.project_id = entity_id
-            elif entity_type == "decision":
-                link.decision_id = entity_id
-            elif entity_type == "context_card":
-                link.context_card_id = entity_id
-            
-            self.db.add(link)
-            await self.db.commit()
-            return link
-            
-        except Exception as e:
-            await self.db.rollback()
-            return None
+    ) -> KnowledgeLink:
+        """Build a knowledge link between article and entity; the caller adds and commits it"""
+        
+        link = KnowledgeLink(
+            article_id=article_id,
+            link_type=link_type,
+            relevance_score=int(relevance_score * 10),  # Scale to 1-10
+            created_by_id=user_id,
+            auto_generated=auto_generated,
+            confidence_score="high" if relevance_score > 0.7 else "medium" if relevance_score > 0.4 else "low"
+        )
+        
+        # Set the appropriate foreign key based on entity type
+        if entity_type == "task":
+            link.task_id = entity_id
+        elif entity_type == "project":
+            link.project_id = entity_id
+        elif entity_type == "decision":
+            link.decision_id = entity_id
+        elif entity_type == "context_card":
+            link.context_card_id = entity_id
+        
+        return link
     
     async def _create_knowledge_notification(
         self, task_id: str, user_id: str, org_id: str, links_created: List[Dict[str, Any]]
@@ -478,34 +812,46 @@ class KnowledgeIntegrationService:
         return captured_items
     
     async def _get_user_activity(self, user_id: str, days: int) -> Dict[str, Any]:
-        """Get user's recent activity for analysis"""
-        period_start = datetime.utcnow() - timedelta(days=days)
+        """Get user's recent activity for analysis (cached briefly; dashboards refresh in bursts)"""
+        key = (user_id, days)
+        cached = _USER_ACTIVITY_CACHE.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < USER_ACTIVITY_CACHE_TTL:
+                _USER_ACTIVITY_CACHE.move_to_end(key)
+                return dict(cached[1])
+            del _USER_ACTIVITY_CACHE[key]
+        
+        period_start = datetime.now(timezone.utc) - timedelta(days=days)
         
         # Get tasks worked on
-        tasks_query = select(Task).where(
+        tasks_query = select(Task.id).where(
             and_(
                 Task.assignee_id == user_id,
                 Task.updated_at >= period_start
             )
         )
         tasks_result = await self.db.execute(tasks_query)
-        tasks = tasks_result.scalars().all()
+        task_ids = tuple(tasks_result.scalars().all())
         
         # Get context cards created
-        cards_query = select(ContextCard).where(
+        cards_query = select(ContextCard.id).where(
             and_(
                 ContextCard.created_by_id == user_id,
                 ContextCard.created_at >= period_start
             )
         )
         cards_result = await self.db.execute(cards_query)
-        cards = cards_result.scalars().all()
+        card_ids = tuple(cards_result.scalars().all())
         
-        return {
-            "tasks": tasks,
-            "context_cards": cards,
+        activity = {
+            "task_ids": task_ids,
+            "context_card_ids": card_ids,
             "period_days": days
         }
+        _USER_ACTIVITY_CACHE[key] = (time.monotonic(), activity)
+        while len(_USER_ACTIVITY_CACHE) > _USER_ACTIVITY_CACHE_MAX_ENTRIES:
+            _USER_ACTIVITY_CACHE.popitem(last=False)
+        return dict(activity)
     
     async def _analyze_activity_patterns(self, activity: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze user activity patterns"""
@@ -542,8 +888,3 @@ class KnowledgeIntegrationService:
         """Get decisions that need follow-up"""
         # TODO: Implement decision follow-up recommendations
         return []
-    
-    async def _calculate_article_relevance(self, article: KnowledgeArticle) -> float:
-        """Calculate article relevance score"""
-        # TODO: Implement sophisticated relevance calculation
-        return 0.5
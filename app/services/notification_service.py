@@ -1,47 +1,116 @@
 """Notification service: centralized creation with focus suppression and scheduling.
 This service respects:
-- User NotificationPreference (urgent_only_mode, minimum_priority, timezone)
 - Active Focus Blocks (FocusBlock) for the user
 If suppression is needed, scheduled_for is set to the end of the active focus window.
 """
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import asyncio
+import time
+from typing import Optional, Dict, Any, List, Set, Tuple
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 
-from ..models.notification import Notification, NotificationType, NotificationPriority, NotificationPreference
+from ..models.notification import Notification, NotificationType, NotificationPriority
 from ..models.focus import FocusBlock
 
 
-async def _get_user_prefs(user_id: str, db: AsyncSession) -> Optional[NotificationPreference]:
-    res = await db.execute(select(NotificationPreference).where(NotificationPreference.user_id == user_id))
-    return res.scalar_one_or_none()
+# Active focus-block end per (user_id, org_id): (cached_at, end_time or None); windows change on
+# the order of minutes, and the focus-block endpoints invalidate entries they change
+FOCUS_CACHE_TTL = 30.0
+_FOCUS_CACHE_MAX_ENTRIES = 10_000
+_focus_end_cache: Dict[Tuple[str, str], Tuple[float, Optional[datetime]]] = {}
 
 
-async def _get_active_focus_end(user_id: str, org_id: str, db: AsyncSession) -> Optional[datetime]:
-    """Return the end time of the first active focus block that overlaps now, else None."""
-    now = datetime.utcnow()
-    q = select(FocusBlock).where(
-        and_(
-            FocusBlock.user_id == user_id,
-            FocusBlock.organization_id == org_id,
-            FocusBlock.start_time <= now,
-            FocusBlock.end_time > now,
-        )
-    ).order_by(FocusBlock.end_time.asc())
-    res = await db.execute(q)
-    block = res.scalar_one_or_none()
-    return block.end_time if block else None
+def invalidate_focus_cache(user_id: str, org_id: str) -> None:
+    _focus_end_cache.pop((user_id, org_id), None)
 
 
-async def create_notification_for_user(
-    db: AsyncSession,
+def _is_future(moment: Optional[datetime]) -> bool:
+    if moment is None:
+        return False
+    now = datetime.now(timezone.utc)
+    # SQLite hands back naive UTC values; PostgreSQL timestamptz values are aware
+    return moment > (now if moment.tzinfo else now.replace(tzinfo=None))
+
+
+async def _get_active_focus_ends(
+    user_ids: List[str], org_id: str, db: AsyncSession
+) -> Dict[str, Optional[datetime]]:
+    """Return each user's active focus block end (None if not in focus); one query covers all cache misses."""
+    clock = time.monotonic()
+    ends: Dict[str, Optional[datetime]] = {}
+    missing: List[str] = []
+    for user_id in set(user_ids):
+        entry = _focus_end_cache.get((user_id, org_id))
+        if entry is not None and clock - entry[0] < FOCUS_CACHE_TTL:
+            # A cached window may have closed since it was read
+            ends[user_id] = entry[1] if _is_future(entry[1]) else None
+        else:
+            missing.append(user_id)
+
+    if missing:
+        q = select(FocusBlock.user_id, func.min(FocusBlock.end_time)).where(
+            and_(
+                FocusBlock.user_id.in_(missing),
+                FocusBlock.organization_id == org_id,
+                # Compare against the database clock; focus block times are timestamptz
+                FocusBlock.start_time <= func.now(),
+                FocusBlock.end_time > func.now(),
+            )
+        ).group_by(FocusBlock.user_id)
+        found = dict((await db.execute(q)).all())
+        if len(_focus_end_cache) + len(missing) > _FOCUS_CACHE_MAX_ENTRIES:
+            _focus_end_cache.clear()
+        for user_id in missing:
+            ends[user_id] = found.get(user_id)
+            _focus_end_cache[(user_id, org_id)] = (clock, ends[user_id])
+    return ends
+
+
+# Strong references to in-flight WebSocket sends; the event loop only keeps weak ones
+_ws_send_tasks: Set["asyncio.Task[None]"] = set()
+
+
+async def _send_ws_notification(user_id: str, org_id: str, payload: Dict[str, Any]) -> None:
+    """Send real-time notification via WebSocket (best-effort)"""
+    try:
+        from app.api.api_v1.endpoints.websockets import send_notification as send_ws_notification
+        await send_ws_notification(user_id, org_id, payload)
+    except Exception:
+        pass
+
+
+def _schedule_ws_notification(user_id: str, org_id: str, payload: Dict[str, Any]) -> None:
+    task = asyncio.create_task(_send_ws_notification(user_id, org_id, payload))
+    _ws_send_tasks.add(task)
+    task.add_done_callback(_ws_send_tasks.discard)
+
+
+def _ws_payload(notif: Notification) -> Dict[str, Any]:
+    return {
+        "id": notif.id,
+        "type": notif.notification_type.value,
+        "notification_type": notif.notification_type.value,
+        "title": notif.title,
+        "message": notif.message,
+        "priority": notif.priority.value,
+        "is_read": notif.is_read,
+        "created_at": notif.created_at.isoformat() if notif.created_at else None,
+        "project_id": notif.project_id,
+        "task_id": notif.task_id,
+        "source": notif.source,
+        "thread_id": notif.thread_id,
+    }
+
+
+def _build_notification(
     *,
     user_id: str,
     org_id: str,
     title: str,
     message: str,
     notification_type: NotificationType,
+    scheduled_for: Optional[datetime],
     priority: NotificationPriority = NotificationPriority.NORMAL,
     project_id: Optional[str] = None,
     task_id: Optional[str] = None,
@@ -55,13 +124,7 @@ async def create_notification_for_user(
     action_required: bool = False,
     auto_generated: bool = True,
 ) -> Notification:
-    """Create a Notification with respect to focus suppression and preferences."""
-    prefs = await _get_user_prefs(user_id, db)
-
-    # Focus suppression: if current time within active focus block, schedule delivery after it
-    scheduled_for = await _get_active_focus_end(user_id, org_id, db)
-
-    notif = Notification(
+    return Notification(
         title=title,
         message=message,
         notification_type=notification_type,
@@ -82,32 +145,83 @@ async def create_notification_for_user(
         scheduled_for=scheduled_for,
         timezone_aware=True,
     )
+
+
+async def create_notification_for_user(
+    db: AsyncSession,
+    *,
+    user_id: str,
+    org_id: str,
+    title: str,
+    message: str,
+    notification_type: NotificationType,
+    priority: NotificationPriority = NotificationPriority.NORMAL,
+    project_id: Optional[str] = None,
+    task_id: Optional[str] = None,
+    context_card_id: Optional[str] = None,
+    decision_log_id: Optional[str] = None,
+    handoff_summary_id: Optional[str] = None,
+    relevance_score: Optional[float] = 0.5,
+    context_data: Optional[Dict[str, Any]] = None,
+    tags: Optional[List[str]] = None,
+    source: Optional[str] = None,
+    action_required: bool = False,
+    auto_generated: bool = True,
+) -> Notification:
+    """Create a Notification with respect to focus suppression."""
+    # Focus suppression: if current time within active focus block, schedule delivery after it
+    scheduled_for = (await _get_active_focus_ends([user_id], org_id, db))[user_id]
+
+    notif = _build_notification(
+        user_id=user_id,
+        org_id=org_id,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        scheduled_for=scheduled_for,
+        priority=priority,
+        project_id=project_id,
+        task_id=task_id,
+        context_card_id=context_card_id,
+        decision_log_id=decision_log_id,
+        handoff_summary_id=handoff_summary_id,
+        relevance_score=relevance_score,
+        context_data=context_data,
+        tags=tags,
+        source=source,
+        action_required=action_required,
+        auto_generated=auto_generated,
+    )
+    # Server defaults (created_at, ...) come back via INSERT ... RETURNING (eager_defaults="auto"),
+    # and sessions don't expire on commit, so no refresh SELECT is needed
     db.add(notif)
     await db.commit()
-    await db.refresh(notif)
 
-    # Send real-time notification via WebSocket (best-effort)
-    try:
-        from app.api.api_v1.endpoints.websockets import send_notification as send_ws_notification
-        await send_ws_notification(
-            user_id,
-            org_id,
-            {
-                "id": notif.id,
-                "type": notif.notification_type.value,
-                "notification_type": notif.notification_type.value,
-                "title": notif.title,
-                "message": notif.message,
-                "priority": notif.priority.value,
-                "is_read": notif.is_read,
-                "created_at": notif.created_at.isoformat() if notif.created_at else None,
-                "project_id": notif.project_id,
-                "task_id": notif.task_id,
-                "source": notif.source,
-                "thread_id": notif.thread_id,
-            },
-        )
-    except Exception:
-        pass
+    # Push over WebSocket in the background so slow subscribers don't hold up the caller
+    _schedule_ws_notification(user_id, org_id, _ws_payload(notif))
 
     return notif
+
+
+async def create_notifications_for_users(
+    db: AsyncSession, org_id: str, items: List[Dict[str, Any]]
+) -> List[Notification]:
+    """Create many notifications in one org with a single focus lookup and a single commit.
+
+    Each item holds the keyword arguments of create_notification_for_user (without db/org_id).
+    """
+    if not items:
+        return []
+
+    focus_ends = await _get_active_focus_ends([item["user_id"] for item in items], org_id, db)
+    notifs = [
+        _build_notification(org_id=org_id, scheduled_for=focus_ends[item["user_id"]], **item)
+        for item in items
+    ]
+    db.add_all(notifs)
+    await db.commit()
+
+    for notif in notifs:
+        _schedule_ws_notification(notif.user_id, org_id, _ws_payload(notif))
+
+    return notifs
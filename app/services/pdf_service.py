@@ -1,102 +1,695 @@
 """
 PDF Generation Service for Proposals and Invoices
 """
+import asyncio
+import functools
+import hashlib
 import io
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import json
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, BaseDocTemplate, PageTemplate, Frame, Table, TableStyle, Paragraph, Spacer, Image, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 import os
-import urllib.request
+import threading
+import time
+
+import httpx
+
+# Optional Typst backend for invoices; ReportLab stays the default and fallback
+try:
+    import typst
+    HAS_TYPST = True
+except ImportError:
+    HAS_TYPST = False
+
+# orjson canonicalises cache-key payloads faster; stdlib json is the fallback
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+# Attribute validation on reportlab.graphics shapes is a debugging aid; skip it
+# outside DEBUG. Set before any graphics module is imported, which reads it once.
+from ..core.config import settings as _app_settings
+if not _app_settings.DEBUG:
+    rl_config.shapeChecking = 0
+
+
+# Line items repeat the same amounts a lot; formatting is memoised per value
+@functools.lru_cache(maxsize=8192)
+def _fmt_currency_cached(value_cents: int) -> str:
+    return f"{(value_cents or 0)/100:,.2f}"
 
 
 def _fmt_currency(value_cents: int) -> str:
+    # The cache lookup sits inside the try so unhashable values fall back too
     try:
-        return f"{(value_cents or 0)/100:,.2f}"
+        return _fmt_currency_cached(value_cents)
     except Exception:
         return "0.00"
 
 
+# One reusable output buffer per worker thread; generators copy the finished
+# PDF out of it so callers never hold a reference to the pooled object.
+# ReportLab emits the whole document in a single write(), so the buffer is
+# rewound rather than truncated: it keeps the high-water capacity of earlier
+# renders and that write lands in memory that is already allocated. Buffers
+# that grew past the retain limit are released so one huge statement does
+# not pin memory on the thread.
+_buffer_pool = threading.local()
+_BUFFER_RETAIN_LIMIT = 4 * 1024 * 1024
+
+
+def _pooled_buffer() -> io.BytesIO:
+    buffer = getattr(_buffer_pool, 'buffer', None)
+    if buffer is None:
+        buffer = io.BytesIO()
+        _buffer_pool.buffer = buffer
+    buffer.seek(0)
+    return buffer
+
+
+def _detach(buffer: io.BytesIO) -> io.BytesIO:
+    end = buffer.tell()
+    with buffer.getbuffer() as view:
+        data = bytes(view[:end])
+    if end > _BUFFER_RETAIN_LIMIT:
+        buffer.seek(0)
+        buffer.truncate(0)
+    return io.BytesIO(data)
+
+
+# Decoded logos, so repeat PDFs for an org skip the HTTP fetch / disk read and
+# the PIL decode. Local files are keyed on mtime so replacing an upload
+# invalidates the entry.
+# Remote logos expire after a TTL so a changed image at the same URL is picked
+# up; failed fetches and undecodable responses are never cached.
+_logo_http: Optional[httpx.Client] = None
+REMOTE_LOGO_CACHE_TTL = 600
+_REMOTE_LOGO_CACHE_SIZE = 128
+_remote_logos: "OrderedDict[str, Tuple[float, ImageReader]]" = OrderedDict()
+_remote_logos_lock = threading.Lock()
+
+
+def _get_logo_http() -> httpx.Client:
+    """Shared keep-alive client so logo fetches reuse connections and TLS sessions."""
+    global _logo_http
+    if _logo_http is None:
+        _logo_http = httpx.Client(
+            timeout=httpx.Timeout(3.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            follow_redirects=True,
+        )
+    return _logo_http
+
+
+def close_logo_http() -> None:
+    global _logo_http
+    if _logo_http is not None:
+        _logo_http.close()
+        _logo_http = None
+
+
+def _fetch_logo(url: str) -> ImageReader:
+    with _remote_logos_lock:
+        cached = _remote_logos.get(url)
+        if cached is not None:
+            if time.monotonic() - cached[0] < REMOTE_LOGO_CACHE_TTL:
+                _remote_logos.move_to_end(url)
+                return cached[1]
+            del _remote_logos[url]
+    resp = _get_logo_http().get(url)
+    resp.raise_for_status()
+    reader = ImageReader(io.BytesIO(resp.content))
+    # Raises on an error page served with 200, before anything is cached
+    reader.getSize()
+    with _remote_logos_lock:
+        _remote_logos[url] = (time.monotonic(), reader)
+        while len(_remote_logos) > _REMOTE_LOGO_CACHE_SIZE:
+            _remote_logos.popitem(last=False)
+    return reader
+
+
+@functools.lru_cache(maxsize=128)
+def _open_logo_file(path: str, mtime: float) -> ImageReader:
+    with open(path, 'rb') as fh:
+        return ImageReader(io.BytesIO(fh.read()))
+
+
+class _LogoFlowable(Flowable):
+    """Logo scaled to fit width x height, drawn from a shared, already-decoded ImageReader.
+
+    Image() only takes a path or file object and would decode again per render.
+    """
+
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        super().__init__()
+        self.reader = reader
+        image_width, image_height = reader.getSize()
+        factor = min(width / image_width, height / image_height)
+        self.drawWidth = image_width * factor
+        self.drawHeight = image_height * factor
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.drawWidth, self.drawHeight, mask='auto')
+
+
+_ONES = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
+         "Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen",
+         "Seventeen", "Eighteen", "Nineteen"]
+
+_TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+
+def _convert_hundreds(n: int) -> str:
+    result = ""
+    if n >= 100:
+        result += _ONES[n // 100] + " Hundred "
+        n %= 100
+    if n >= 20:
+        result += _TENS[n // 10] + " "
+        n %= 10
+    if n > 0:
+        result += _ONES[n] + " "
+    return result
+
+
+# Words for 0..999, built once; amounts up to a million are two lookups
+_HUNDREDS_WORDS = tuple(_convert_hundreds(n).strip() for n in range(1000))
+
+
+@functools.lru_cache(maxsize=4096)
+def _number_to_words(number: int) -> str:
+    """Convert number to words (basic implementation); totals repeat a lot across a batch."""
+    if number == 0:
+        return "Zero Dirhams"
+    
+    if number < 1000:
+        # Negative amounts have never had words; keep the bare currency
+        return (_HUNDREDS_WORDS[number] if number > 0 else "") + " Dirhams"
+    elif number < 1000000:
+        thousands, remainder = divmod(number, 1000)
+        if remainder:
+            return f"{_HUNDREDS_WORDS[thousands]} Thousand {_HUNDREDS_WORDS[remainder]} Dirhams"
+        return f"{_HUNDREDS_WORDS[thousands]} Thousand Dirhams"
+    else:
+        return f"{number} Dirhams"  # Fallback for very large numbers
+
+
+def _date_label(date_obj: date) -> str:
+    # Same output as strftime('%d-%m-%Y') without the strftime call
+    return f"{date_obj.day:02d}-{date_obj.month:02d}-{date_obj.year:04d}"
+
+
+def _quotation_item_description(item: Dict[str, Any]) -> str:
+    """Quotation line text: name, optional length, then the description on its own line."""
+    length = item.get('length')
+    text = f"{item.get('item_name') or ''} {('L:' + str(length)) if length else ''}"
+    note = item.get('description')
+    return f"{text}\n{note}".strip() if note else text
+
+
+@functools.lru_cache(maxsize=1024)
+def _fmt_date(date_str: str) -> str:
+    """Format an ISO / YYYY-MM-DD date string for display; dates repeat across a batch."""
+    try:
+        if 'T' in date_str:  # ISO format (fromisoformat takes a trailing 'Z' since Python 3.11)
+            date_obj = datetime.fromisoformat(date_str)
+        elif len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+            # Zero-padded YYYY-MM-DD, the common case: fromisoformat is much cheaper than strptime
+            date_obj = date.fromisoformat(date_str)
+        else:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        return _date_label(date_obj)
+    except ValueError:
+        return date_str
+
+
+@functools.lru_cache(maxsize=1)
+def _build_styles():
+    """Build the shared stylesheet with our custom paragraph styles.
+
+    ReportLab's StyleSheet1.add() refuses duplicate names, so the sheet is
+    built once and shared read-only across PDFService instances.
+    """
+    styles = getSampleStyleSheet()
+    # Company header style
+    styles.add(ParagraphStyle(
+        name='CompanyHeader',
+        parent=styles['Normal'],
+        fontSize=16,
+        textColor=colors.black,
+        spaceAfter=6,
+        fontName='Helvetica-Bold'
+    ))
+    
+    # Document title style (right-aligned)
+    styles.add(ParagraphStyle(
+        name='DocumentTitle',
+        parent=styles['Normal'],
+        fontSize=24,
+        textColor=colors.black,
+        spaceAfter=12,
+        fontName='Helvetica-Bold',
+        alignment=TA_RIGHT
+    ))
+    # Document title style (centered)
+    styles.add(ParagraphStyle(
+        name='DocumentTitleCenter',
+        parent=styles['Normal'],
+        fontSize=26,
+        textColor=colors.black,
+        spaceAfter=12,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER
+    ))
+    
+    # Document number style
+    styles.add(ParagraphStyle(
+        name='DocumentNumber',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.black,
+        spaceAfter=6,
+        alignment=TA_RIGHT
+    ))
+    
+    # Status style
+    styles.add(ParagraphStyle(
+        name='Status',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.black,
+        spaceAfter=12,
+        fontName='Helvetica-Bold',
+        alignment=TA_RIGHT
+    ))
+    
+    # Section header style
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.black,
+        spaceAfter=6,
+        fontName='Helvetica-Bold'
+    ))
+    
+    # Quantity rental quotation styles
+    styles.add(ParagraphStyle(
+        name='QuotationOrgName',
+        parent=styles['Normal'],
+        fontName='Helvetica-Bold',
+        fontSize=12,
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='QuotationRightSmall',
+        parent=styles['Normal'],
+        fontSize=9,
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='QuotationTitle',
+        parent=styles['DocumentTitle'],
+        alignment=TA_CENTER
+    ))
+    styles.add(ParagraphStyle(
+        name='QuotationSectionCenter',
+        parent=styles['SectionHeader'],
+        alignment=TA_CENTER
+    ))
+    return styles
+
+
+@functools.lru_cache(maxsize=512)
+def _parsed_frags(text: str, style_name: str) -> tuple:
+    """Parsed markup for header text that repeats on every document of an org.
+
+    Layout only memoises a deterministic `_fkind` on each frag, so the parsed
+    fragments can be shared between Paragraphs.
+    """
+    return tuple(Paragraph(text, _build_styles()[style_name]).frags)
+
+
+# Typst compilers keep the parsed template and layout caches warm between
+# renders; one per thread because a compiler is not safe to share.
+_TYPST_INVOICE_TEMPLATE = os.path.join(os.path.dirname(__file__), 'pdf_templates', 'invoice.typ')
+_typst_local = threading.local()
+
+
+def _typst_invoice_compiler() -> 'typst.Compiler':
+    compiler = getattr(_typst_local, 'invoice', None)
+    if compiler is None:
+        # Root at / so absolute logo paths resolve inside the template
+        compiler = typst.Compiler(_TYPST_INVOICE_TEMPLATE, root='/')
+        _typst_local.invoice = compiler
+    return compiler
+
+
+# Constant table styles, built once and shared by every document
+_PROPOSAL_ITEMS_STYLE = TableStyle([
+    # Header styling (bold, no background color)
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+
+    # Data styling
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('ALIGN', (2, 1), (-1, -1), 'CENTER'),  # Qty, Rate, Tax, Amount
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),     # Item description
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),   # Item number
+
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+_INVOICE_ITEMS_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8.5),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),  # Qty, Rate, Total, Guarantee
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.8, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+_HEADER_STYLE_3COL = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+])
+
+_HEADER_STYLE_2COL = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+])
+
+_CONTEXT_SECTION_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+])
+
+# Quantity rental quotation layout
+_QUOTATION_COL_WIDTHS = (0.4*inch, 3.7*inch, 0.8*inch, 0.9*inch, 1.1*inch, 1.1*inch)
+
+_QUOTATION_HEADER_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+])
+
+_QUOTATION_DETAILS_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+])
+
+_QUOTATION_INFO_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+_QUOTATION_ITEMS_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),  # Numbers right aligned
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+])
+
+_QUOTATION_TOTALS_STYLE = TableStyle([
+    ('SPAN', (0, 0), (2, 0)),
+    ('SPAN', (4, 0), (5, 0)),
+    ('ALIGN', (3, 0), (3, 0), 'RIGHT'),
+    ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
+])
+
+_QUOTATION_SIGNATURE_STYLE = TableStyle([
+    ('LINEABOVE', (0, 1), (-1, 1), 0.8, colors.black),
+    ('TOPPADDING', (0, 1), (-1, 1), 18),
+])
+
+
+class _TotalsBlock(Flowable):
+    """Label/value totals drawn straight onto the canvas.
+
+    Fixed geometry (3.8in spacer, 1.5in label, 1.2in value, 18pt rows, last
+    row bold under a rule), so there is nothing for Platypus table layout to
+    compute.
+    """
+
+    ROW_HEIGHT = 18
+    COL_WIDTHS = (3.8*inch, 1.5*inch, 1.2*inch)
+
+    def __init__(self, rows: List[List[str]]):
+        super().__init__()
+        self.rows = rows
+        self.hAlign = 'CENTER'
+        self.width = sum(self.COL_WIDTHS)
+        self.height = self.ROW_HEIGHT * len(rows)
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        label_right = self.COL_WIDTHS[0] + self.COL_WIDTHS[1] - 6
+        value_right = self.width - 6
+        last = len(self.rows) - 1
+        for i, (label, value) in enumerate(self.rows):
+            # Baseline matches a bottom-aligned 10pt table cell with 3pt padding
+            y = self.height - (i + 1) * self.ROW_HEIGHT + 5
+            canv.setFont('Helvetica-Bold' if i == last else 'Helvetica', 10)
+            canv.drawRightString(label_right, y, label)
+            canv.drawRightString(value_right, y, value)
+        if self.rows:
+            canv.setLineWidth(1)
+            canv.line(self.COL_WIDTHS[0], self.ROW_HEIGHT, self.width, self.ROW_HEIGHT)
+
+
+class _AcceptanceGrid(Flowable):
+    """Empty client-acceptance signature grid drawn straight onto the canvas."""
+
+    HEADERS = ('Authorized Person Name', 'Signature', 'Date', 'Stamp')
+    COL_WIDTHS = (2.5*inch, 2.0*inch, 1.2*inch, 1.8*inch)
+    HEADER_HEIGHT = 18
+    BODY_HEIGHT = 42
+
+    def __init__(self):
+        super().__init__()
+        self.hAlign = 'CENTER'
+        self.width = sum(self.COL_WIDTHS)
+        self.height = self.HEADER_HEIGHT + self.BODY_HEIGHT
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        canv.setFont('Helvetica-Bold', 10)
+        x = 0
+        for header, col_width in zip(self.HEADERS, self.COL_WIDTHS):
+            canv.drawCentredString(x + col_width / 2.0, self.BODY_HEIGHT + 5, header)
+            x += col_width
+        canv.setLineWidth(0.8)
+        canv.grid(
+            [sum(self.COL_WIDTHS[:i]) for i in range(len(self.COL_WIDTHS) + 1)],
+            [0, self.BODY_HEIGHT, self.height],
+        )
+
+
+# Page templates depend only on page size and margins, so they are built once
+# per thread (frames carry layout state while a document is being built)
+_page_template_local = threading.local()
+
+
+def _first_page_hook(canv: canvas.Canvas, doc: '_CachedDocTemplate'):
+    doc.on_first_page(canv, doc)
+
+
+def _later_pages_hook(canv: canvas.Canvas, doc: '_CachedDocTemplate'):
+    doc.on_later_pages(canv, doc)
+
+
+def _page_templates(pagesize, left: float, bottom: float, width: float, height: float) -> Tuple[PageTemplate, PageTemplate]:
+    cache = getattr(_page_template_local, 'templates', None)
+    if cache is None:
+        cache = _page_template_local.templates = {}
+    key = (tuple(pagesize), left, bottom, width, height)
+    templates = cache.get(key)
+    if templates is None:
+        frame = Frame(left, bottom, width, height, id='normal')
+        templates = cache[key] = (
+            PageTemplate(id='First', frames=frame, onPage=_first_page_hook, pagesize=pagesize),
+            PageTemplate(id='Later', frames=frame, onPage=_later_pages_hook, pagesize=pagesize),
+        )
+    return templates
+
+
+def _no_page_decoration(canv: canvas.Canvas, doc: BaseDocTemplate):
+    pass
+
+
+def _draw_page_number_footer(canv: canvas.Canvas, doc: BaseDocTemplate):
+    """Small centred "Page N" footer used by the quotation layout."""
+    canv.setFont('Helvetica', 8)
+    canv.drawCentredString(A4[0] / 2.0, 0.35*inch, f"Page {canv.getPageNumber()}")
+
+
+class _CachedDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that reuses the per-thread First/Later page templates.
+
+    The page callbacks are per-document, so they live on the document and the
+    shared templates dispatch to them.
+    """
+
+    def build(self, flowables, onFirstPage=_no_page_decoration, onLaterPages=_no_page_decoration, canvasmaker=canvas.Canvas):
+        self._calc()
+        self.on_first_page = onFirstPage
+        self.on_later_pages = onLaterPages
+        self.pageTemplates = list(_page_templates(self.pagesize, self.leftMargin, self.bottomMargin, self.width, self.height))
+        try:
+            BaseDocTemplate.build(self, flowables, canvasmaker=canvasmaker)
+        finally:
+            # _nameSpace holds doc=self; breaking that cycle lets refcounting free the
+            # document (and everything it references) as soon as the generator returns
+            self._nameSpace.clear()
+
+
+# Bump when document layouts change so cached PDFs from older releases stop matching
+_PDF_CACHE_VERSION = 1
+
+# Per-request fields left out of the cache key; a hit keeps the value it was first rendered with
+_VOLATILE_CACHE_FIELDS = {
+    'project_report': ('generated_at',),
+}
+
+
+def _canonical_json(obj: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+# Document kind -> PDFService generator method name (used by the byte cache)
+_GENERATORS = {
+    'proposal': 'generate_proposal_pdf',
+    'invoice': 'generate_invoice_pdf',
+    'purchase_order': 'generate_purchase_order_pdf',
+    'quantity_rental_quotation': 'generate_quantity_rental_quotation_pdf',
+    'project_report': 'generate_project_report_pdf',
+}
+
+
 class PDFService:
     """Service for generating PDF documents with organization branding."""
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+    def __init__(self, backend: Optional[str] = None, compress: Optional[bool] = None):
+        self.styles = _build_styles()
+        from ..core.config import settings
+        self.backend = backend if backend is not None else settings.PDF_BACKEND
+        self.compress = compress if compress is not None else settings.PDF_PAGE_COMPRESSION
     
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        # Company header style
-        self.styles.add(ParagraphStyle(
-            name='CompanyHeader',
-            parent=self.styles['Normal'],
-            fontSize=16,
-            textColor=colors.black,
-            spaceAfter=6,
-            fontName='Helvetica-Bold'
-        ))
-        
-        # Document title style (right-aligned)
-        self.styles.add(ParagraphStyle(
-            name='DocumentTitle',
-            parent=self.styles['Normal'],
-            fontSize=24,
-            textColor=colors.black,
-            spaceAfter=12,
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT
-        ))
-        # Document title style (centered)
-        self.styles.add(ParagraphStyle(
-            name='DocumentTitleCenter',
-            parent=self.styles['Normal'],
-            fontSize=26,
-            textColor=colors.black,
-            spaceAfter=12,
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER
-        ))
-        
-        # Document number style
-        self.styles.add(ParagraphStyle(
-            name='DocumentNumber',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.black,
-            spaceAfter=6,
-            alignment=TA_RIGHT
-        ))
-        
-        # Status style
-        self.styles.add(ParagraphStyle(
-            name='Status',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.black,
-            spaceAfter=12,
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT
-        ))
-        
-        # Section header style
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.black,
-            spaceAfter=6,
-            fontName='Helvetica-Bold'
-        ))
+    def _new_doc(self, buffer: io.BytesIO, **kwargs) -> SimpleDocTemplate:
+        """Document template honouring this service's page-compression choice."""
+        return _CachedDocTemplate(buffer, pageCompression=1 if self.compress else 0, **kwargs)
+    
+    def _cache_key(self, kind: str, data: Dict[str, Any], org: Optional[Dict[str, Any]]) -> str:
+        """Content address of a rendered document; any change to data, org or options changes it."""
+        volatile = _VOLATILE_CACHE_FIELDS.get(kind)
+        if volatile:
+            data = {k: v for k, v in data.items() if k not in volatile}
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{kind}:{self.backend}:{int(bool(self.compress))}:".encode('utf-8'))
+        digest.update(_canonical_json(data))
+        digest.update(b'|')
+        digest.update(_canonical_json(org or {}))
+        # A logo replaced at the same path must not be served from older cached PDFs
+        digest.update(f"|{self._logo_mtime(org)}".encode('utf-8'))
+        return f"pdf:v{_PDF_CACHE_VERSION}:{digest.hexdigest()}"
+    
+    def _logo_mtime(self, org: Optional[Dict[str, Any]]) -> float:
+        """Modification time of the org's local logo file, or 0 when there is none."""
+        logo_url = ((org or {}).get('branding') or {}).get('logo_url')
+        local_path = self._resolve_logo_path(logo_url) if logo_url else None
+        if not local_path:
+            return 0
+        try:
+            return os.stat(local_path).st_mtime
+        except OSError:
+            return 0
+    
+    async def render_cached(self, kind: str, data: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
+        """Render a document, answering identical re-downloads from Redis.
+
+        Cache errors never fail the download; on a miss the logo is prefetched
+        and the generator runs in a worker thread.
+        """
+        if kind not in _GENERATORS:
+            raise ValueError(f"Unknown PDF kind: {kind}")
+        from ..core.config import settings
+        from ..core.redis import get_redis
+        key = self._cache_key(kind, data, org) if settings.PDF_CACHE_TTL > 0 else None
+        if key:
+            try:
+                cached = await get_redis().get(key)
+                if cached is not None:
+                    return io.BytesIO(cached)
+            except Exception:
+                pass
+        await self.prefetch_logo(org)
+        # Layout is synchronous CPU work; keep it off the event loop (zlib releases the GIL)
+        buffer = await asyncio.to_thread(getattr(self, _GENERATORS[kind]), data, org=org)
+        if key:
+            try:
+                await get_redis().set(key, buffer.getvalue(), ex=settings.PDF_CACHE_TTL)
+            except Exception:
+                pass
+        return buffer
     
     def generate_proposal_pdf(self, proposal_data: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
         """Generate PDF for proposal"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+        buffer = _pooled_buffer()
+        doc = self._new_doc(buffer, pagesize=A4, topMargin=0.5*inch)
         
         # Build the document content
         story = []
@@ -122,13 +715,16 @@ class PDFService:
             story.extend(self._build_terms_section(proposal_data['custom_fields']['terms_and_conditions']))
         
         doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return _detach(buffer)
     
     def generate_invoice_pdf(self, invoice_data: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
         """Generate PDF for invoice"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
+        if self.backend == 'typst' and HAS_TYPST:
+            rendered = self._render_invoice_typst(invoice_data, org)
+            if rendered is not None:
+                return io.BytesIO(rendered)
+        buffer = _pooled_buffer()
+        doc = self._new_doc(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
         
         # Build the document content
         story = []
@@ -157,18 +753,54 @@ class PDFService:
             story.append(Spacer(1, 0.15*inch))
             story.extend(self._build_terms_section(invoice_data['terms_and_conditions']))
         
-        # Build with page numbers
+        # Build with page numbers; watermark drafts (decided once, not per page)
+        is_draft = str(invoice_data.get('status') or '').upper() == 'DRAFT'
+        
         def _on_page(canv: canvas.Canvas, _doc):
             # Page number
             self._add_page_number(canv, _doc)
-            # Watermark for drafts
-            status = str(invoice_data.get('status') or '').upper()
-            if status == 'DRAFT':
+            if is_draft:
                 self._draw_watermark(canv, 'DRAFT')
         
         doc.build(story, onFirstPage=_on_page, onLaterPages=_on_page)
-        buffer.seek(0)
-        return buffer
+        return _detach(buffer)
+    
+    def _render_invoice_typst(self, invoice_data: Dict[str, Any], org: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        """Render an invoice with the Typst template; None means fall back to ReportLab.
+
+        All values are formatted here with the same helpers as the ReportLab
+        path, so the template only binds strings.
+        """
+        logo_path = None
+        logo_url = ((org or {}).get('branding') or {}).get('logo_url')
+        if logo_url:
+            logo_path = self._resolve_logo_path(logo_url)
+            if not logo_path or not os.path.exists(logo_path):
+                # Remote logos are only available to the ReportLab path
+                return None
+        settings = ((org or {}).get('settings')) or {}
+        cust_lines, detail_lines = self._invoice_context_lines(invoice_data)
+        totals_rows, amount_words = self._invoice_totals_rows(invoice_data)
+        status = str(invoice_data.get('status', 'DRAFT')).upper()
+        data = {
+            'number': f"# {invoice_data.get('invoice_number', 'INV-000001')}",
+            'status': status,
+            'draft': str(invoice_data.get('status') or '').upper() == 'DRAFT',
+            'logo': os.path.abspath(logo_path) if logo_path else None,
+            'company_name': str(org['name']) if org and org.get('name') else None,
+            'company_lines': self._company_contact_lines(settings),
+            'customer_lines': [str(line) for line in cust_lines],
+            'detail_lines': [str(line) for line in detail_lines],
+            'items': self._invoice_item_rows(invoice_data.get('items', [])),
+            'totals': totals_rows,
+            'amount_words': amount_words,
+            'terms': str(invoice_data['terms_and_conditions']) if invoice_data.get('terms_and_conditions') else None,
+        }
+        try:
+            return _typst_invoice_compiler().compile(sys_inputs={'data': json.dumps(data, default=str)})
+        except Exception as e:
+            logger.warning(f"Typst invoice render failed, falling back to ReportLab: {e}")
+            return None
     
     def _build_proposal_header(self, proposal_data: Dict[str, Any], org: Optional[Dict[str, Any]]) -> List:
         """Build proposal header section"""
@@ -223,40 +855,22 @@ class PDFService:
         # Prepare table data
         table_data = [headers]
         
-        for i, item in enumerate(items, 1):
-            row = [
-                str(i),
-                f"{item.get('name', '')}\n{item.get('description', '')}",
-                f"{item.get('quantity', 1)} {item.get('unit', 'Qty')}",
-                f"{item.get('unit_price', 0):.2f}",
-                f"Standard\nRated {item.get('tax_rate', 5)}%",
-                f"{item.get('total', 0):.2f}"
-            ]
-            table_data.append(row)
+        # Format each column in one pass, then stitch the rows together
+        names = [f"{item.get('name', '')}\n{item.get('description', '')}" for item in items]
+        quantities = [f"{item.get('quantity', 1)} {item.get('unit', 'Qty')}" for item in items]
+        rates = [f"{item.get('unit_price', 0):.2f}" for item in items]
+        taxes = [f"Standard\nRated {item.get('tax_rate', 5)}%" for item in items]
+        amounts = [f"{item.get('total', 0):.2f}" for item in items]
+        table_data.extend(
+            [str(i), *cells]
+            for i, cells in enumerate(zip(names, quantities, rates, taxes, amounts), 1)
+        )
         
         # Create table
         items_table = Table(table_data, colWidths=[0.5*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1*inch])
         
         # Style the table (no colored accents)
-        items_table.setStyle(TableStyle([
-            # Header styling (bold, no background color)
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            
-            # Data styling
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (2, 1), (-1, -1), 'CENTER'),  # Qty, Rate, Tax, Amount
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),     # Item description
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),   # Item number
-            
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        items_table.setStyle(_PROPOSAL_ITEMS_STYLE)
         
         story.append(items_table)
         return story
@@ -265,57 +879,36 @@ class PDFService:
         """Build invoice items table mimicking the provided sample style."""
         story = []
         headers = ['#', 'Description', 'Qty', 'Rate', 'Total Amount', 'Guarantee Rate']
-        table_data = [headers]
-        
-        for i, item in enumerate(items or [], 1):
-            qty = item.get('quantity', 1)
-            rate = _fmt_currency(item.get('unit_price', 0))
-            # amount field in our stored JSON is total per line inclusive of tax-discount
-            total_amount = _fmt_currency(item.get('amount', qty * item.get('unit_price', 0)))
-            guarantee_rate = item.get('guarantee_rate')
-            if isinstance(guarantee_rate, (int, float)):
-                # If in cents
-                guarantee = _fmt_currency(int(guarantee_rate))
-            else:
-                guarantee = '0.00'
-            desc_lines = []
-            if item.get('description'):
-                desc_lines.append(item['description'])
-            # Optionally include item_type
-            if item.get('item_type'):
-                pass
-            row = [
-                str(i),
-                "\n".join(desc_lines),
-                f"{qty:.2f}",
-                rate,
-                total_amount,
-                guarantee,
-            ]
-            table_data.append(row)
+        table_data = [headers] + self._invoice_item_rows(items)
         
         # Narrower table with centered alignment to create side breathing space
         col_widths = [0.4*inch, 2.6*inch, 0.8*inch, 0.9*inch, 0.95*inch, 0.85*inch]
         items_table = Table(table_data, colWidths=col_widths, repeatRows=1, hAlign='CENTER')
-        items_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8.5),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),  # Qty, Rate, Total, Guarantee
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0.8, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        items_table.setStyle(_INVOICE_ITEMS_STYLE)
         story.append(items_table)
         return story
     
+    def _invoice_item_rows(self, items: Optional[List[Dict[str, Any]]]) -> List[List[str]]:
+        """Formatted invoice line rows (#, description, qty, rate, total, guarantee)."""
+        items = items or []
+        # Format each column in one pass, then stitch the rows together
+        qtys = [item.get('quantity', 1) for item in items]
+        unit_prices = [item.get('unit_price', 0) for item in items]
+        descriptions = [item.get('description') or '' for item in items]
+        quantities = [f"{qty:.2f}" for qty in qtys]
+        rates = [_fmt_currency(price) for price in unit_prices]
+        # amount field in our stored JSON is total per line inclusive of tax-discount
+        total_amounts = [_fmt_currency(item.get('amount', qty * price)) for item, qty, price in zip(items, qtys, unit_prices)]
+        # guarantee_rate is stored in cents when present
+        guarantees = [
+            _fmt_currency(int(rate)) if isinstance(rate, (int, float)) else '0.00'
+            for rate in (item.get('guarantee_rate') for item in items)
+        ]
+        return [
+            [str(i), *cells]
+            for i, cells in enumerate(zip(descriptions, quantities, rates, total_amounts, guarantees), 1)
+        ]
+    
     def _build_proposal_totals(self, proposal_data: Dict[str, Any]) -> List:
         """Build proposal totals section"""
         story = []
@@ -331,22 +924,12 @@ class PDFService:
         subtotal = total_amount / (1 + tax_rate)
         tax_amount = total_amount - subtotal
         
-        totals_data = [
-            ['', '', '', 'Sub Total', f'{subtotal:.2f}{currency}'],
-            ['', '', '', f'Standard Rated ({tax_rate*100}%)', f'{tax_amount:.2f}{currency}'],
-            ['', '', '', 'Total', f'{total_amount:.2f}{currency}'],
-        ]
-        
-        totals_table = Table(totals_data, colWidths=[0.5*inch, 2.5*inch, 0.8*inch, 1.5*inch, 1.2*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (3, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (3, 0), (-1, -1), 10),
-            ('LINEABOVE', (3, -1), (-1, -1), 1, colors.black),
+        story.append(_TotalsBlock([
+            ['Sub Total', f'{subtotal:.2f}{currency}'],
+            [f'Standard Rated ({tax_rate*100}%)', f'{tax_amount:.2f}{currency}'],
+            ['Total', f'{total_amount:.2f}{currency}'],
         ]))
         
-        story.append(totals_table)
-        
         # Add amount in words
         amount_words = self._number_to_words(int(total_amount))
         story.append(Spacer(1, 0.2*inch))
@@ -357,38 +940,33 @@ class PDFService:
     def _build_invoice_totals(self, invoice_data: Dict[str, Any]) -> List:
         """Build invoice totals section matching sample formatting."""
         story = []
+        totals_rows, amount_words = self._invoice_totals_rows(invoice_data)
+        story.append(_TotalsBlock(totals_rows))
+        
+        story.append(Spacer(1, 0.2*inch))
+        story.append(Paragraph(f"With words: {amount_words}", self.styles['Normal']))
+        return story
+    
+    def _invoice_totals_rows(self, invoice_data: Dict[str, Any]) -> Tuple[List[List[str]], str]:
+        """Formatted (label, value) totals rows plus the amount in words."""
         subtotal = (invoice_data.get('subtotal') or 0)
         tax_amount = (invoice_data.get('tax_amount') or 0)
         total_amount = (invoice_data.get('total_amount') or 0)
         amount_paid = (invoice_data.get('amount_paid') or 0)
         balance_due = (invoice_data.get('balance_due') or 0)
         
-        totals_data = [
-            ['', '', '', 'Sub Total', _fmt_currency(subtotal)],
-            ['', '', '', 'Standard Rated (5.00%)', _fmt_currency(tax_amount)],
-            ['', '', '', 'Total', _fmt_currency(total_amount)],
+        rows = [
+            ['Sub Total', _fmt_currency(subtotal)],
+            ['Standard Rated (5.00%)', _fmt_currency(tax_amount)],
+            ['Total', _fmt_currency(total_amount)],
         ]
         if amount_paid > 0:
-            totals_data.append(['', '', '', 'Amount Paid', _fmt_currency(amount_paid)])
-            totals_data.append(['', '', '', 'Balance Due', _fmt_currency(balance_due)])
-        
-        totals_table = Table(totals_data, colWidths=[0.5*inch, 2.5*inch, 0.8*inch, 1.5*inch, 1.2*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (3, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (3, 0), (-1, -1), 10),
-            ('LINEABOVE', (3, -1), (-1, -1), 1, colors.black),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        story.append(totals_table)
+            rows.append(['Amount Paid', _fmt_currency(amount_paid)])
+            rows.append(['Balance Due', _fmt_currency(balance_due)])
         
         # Amount in words for total or balance due
         display_amount = balance_due if balance_due > 0 else total_amount
-        amount_words = self._number_to_words(int(display_amount/100))
-        story.append(Spacer(1, 0.2*inch))
-        story.append(Paragraph(f"With words: {amount_words}", self.styles['Normal']))
-        return story
+        return rows, self._number_to_words(int(display_amount/100))
     
     def _build_branded_header(self, org: Optional[Dict[str, Any]], title: str, number: str, status: str, right_lines: List[str], center_title: bool = False, include_company_on_left: bool = False) -> Table:
         """Reusable header with company logo/info (left), optional centered title, and doc/company/meta info (right)."""
@@ -408,85 +986,104 @@ class PDFService:
         
         # Optionally show company name/address on left (off by default)
         if include_company_on_left and company_name:
-            left_flow.append(Paragraph(str(company_name), self.styles['CompanyHeader']))
-            for key in ['address_line1', 'address_line2']:
-                if settings.get(key):
-                    left_flow.append(Paragraph(settings[key], self.styles['Normal']))
+            left_flow.append(self._static_paragraph(str(company_name), 'CompanyHeader'))
+            address_lines = [settings[key] for key in ['address_line1', 'address_line2'] if settings.get(key)]
             city_line = " ".join([x for x in [settings.get('city'), settings.get('state'), settings.get('postal_code')] if x])
             if city_line:
-                left_flow.append(Paragraph(city_line, self.styles['Normal']))
+                address_lines.append(city_line)
             if settings.get('country'):
-                left_flow.append(Paragraph(settings.get('country'), self.styles['Normal']))
-        
-        # Center column (optional large title)
-        center_flow = []
-        if center_title:
-            center_flow.append(Paragraph(title, self.styles['DocumentTitleCenter']))
+                address_lines.append(settings.get('country'))
+            if address_lines:
+                left_flow.append(self._static_paragraph('<br/>'.join(address_lines)))
         
         # Right column: company info (if not shown on left) + document meta + extra lines
         right_flow = []
         if not include_company_on_left:
             if company_name:
-                right_flow.append(Paragraph(str(company_name), self.styles['CompanyHeader']))
-            # Tax identifiers
-            if settings.get('trn'):
-                right_flow.append(Paragraph(f"TRN: {settings['trn']}", self.styles['Normal']))
-            elif settings.get('gst_number'):
-                right_flow.append(Paragraph(f"GST: {settings['gst_number']}", self.styles['Normal']))
-            elif settings.get('tax_number'):
-                right_flow.append(Paragraph(f"Tax Number: {settings['tax_number']}", self.styles['Normal']))
-            # Contacts
-            if settings.get('website'):
-                right_flow.append(Paragraph(f"Website: {settings['website']}", self.styles['Normal']))
-            if settings.get('contact_email'):
-                right_flow.append(Paragraph(f"Email: {settings['contact_email']}", self.styles['Normal']))
-            if settings.get('contact_phone'):
-                right_flow.append(Paragraph(f"Phone: {settings['contact_phone']}", self.styles['Normal']))
+                right_flow.append(self._static_paragraph(str(company_name), 'CompanyHeader'))
+            company_lines = self._company_contact_lines(settings)
+            if company_lines:
+                right_flow.append(self._static_paragraph('<br/>'.join(company_lines)))
         
         # Document meta
         right_flow.append(Paragraph(number, self.styles['DocumentNumber']))
         right_flow.append(Paragraph(status, self.styles['Status']))
-        for line in right_lines:
-            if line:
-                right_flow.append(Paragraph(line, self.styles['Normal']))
+        extra_lines = [line for line in right_lines if line]
+        if extra_lines:
+            right_flow.append(self._lines_paragraph(extra_lines))
         
         if center_title:
-            header_data = [[left_flow, center_flow, right_flow]]
+            # Center column: large title
+            header_data = [[left_flow, Paragraph(title, self.styles['DocumentTitleCenter']), right_flow]]
             header_table = Table(header_data, colWidths=[3*inch, 2.2*inch, 1.8*inch])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-                ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-            ]))
+            header_table.setStyle(_HEADER_STYLE_3COL)
         else:
             header_data = [[left_flow, right_flow]]
             header_table = Table(header_data, colWidths=[3*inch, 4*inch])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ]))
+            header_table.setStyle(_HEADER_STYLE_2COL)
         return header_table
 
+    def _company_contact_lines(self, settings: Dict[str, Any]) -> List[str]:
+        """Tax identifier and contact lines shown under the company name."""
+        lines = []
+        # Tax identifiers
+        if settings.get('trn'):
+            lines.append(f"TRN: {settings['trn']}")
+        elif settings.get('gst_number'):
+            lines.append(f"GST: {settings['gst_number']}")
+        elif settings.get('tax_number'):
+            lines.append(f"Tax Number: {settings['tax_number']}")
+        # Contacts
+        if settings.get('website'):
+            lines.append(f"Website: {settings['website']}")
+        if settings.get('contact_email'):
+            lines.append(f"Email: {settings['contact_email']}")
+        if settings.get('contact_phone'):
+            lines.append(f"Phone: {settings['contact_phone']}")
+        return lines
+
+    def _lines_paragraph(self, lines: List[str], style_name: str = 'Normal') -> Paragraph:
+        """Render consecutive same-style lines as one Paragraph joined with <br/>.
+
+        Stacked Normal paragraphs have no space before/after, so this lays out
+        identically while parsing and wrapping a single flowable.
+        """
+        return Paragraph('<br/>'.join(str(line) for line in lines), self.styles[style_name])
+
+    def _static_paragraph(self, text: str, style_name: str = 'Normal') -> Paragraph:
+        """Paragraph for org-level header text, reusing the parsed markup across documents."""
+        return Paragraph(text, self.styles[style_name], frags=list(_parsed_frags(text, style_name)))
+
     def _build_invoice_context_section(self, invoice_data: Dict[str, Any]) -> List:
         """Two-column section matching sample: 'To' on the left and 'Project/Document' details on the right."""
         story = []
-        cust = invoice_data.get('customer') or {}
-        proj = invoice_data.get('project') or {}
+        cust_lines, detail_lines = self._invoice_context_lines(invoice_data)
         # Left column (To)
         left = []
         left.append(Paragraph('To', self.styles['SectionHeader']))
+        if cust_lines:
+            left.append(self._lines_paragraph(cust_lines))
+        # Right column (Project/Doc details)
+        right = []
+        if detail_lines:
+            right.append(self._lines_paragraph(detail_lines))
+        
+        context_table = Table([[left, right]], colWidths=[3.5*inch, 3.5*inch])
+        context_table.setStyle(_CONTEXT_SECTION_STYLE)
+        story.append(context_table)
+        return story
+
+    def _invoice_context_lines(self, invoice_data: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Customer ('To') lines and project/document detail lines for an invoice."""
+        cust = invoice_data.get('customer') or {}
+        proj = invoice_data.get('project') or {}
+        cust_lines = []
         if cust.get('display_name'):
-            left.append(Paragraph(cust['display_name'], self.styles['Normal']))
+            cust_lines.append(cust['display_name'])
         if cust.get('company_name'):
-            left.append(Paragraph(cust['company_name'], self.styles['Normal']))
+            cust_lines.append(cust['company_name'])
         if cust.get('email'):
-            left.append(Paragraph(f"Email: {cust['email']}", self.styles['Normal']))
-        # Right column (Project/Doc details)
-        right = []
+            cust_lines.append(f"Email: {cust['email']}")
         right_fields = [
             ('Project Name', proj.get('name')),
             ('Invoice Number', invoice_data.get('invoice_number')),
@@ -494,37 +1091,14 @@ class PDFService:
             ('Due Date', self._format_date(invoice_data.get('due_date'))),
             ('Payment Terms', invoice_data.get('payment_terms')),
         ]
-        for label, value in right_fields:
-            if value:
-                right.append(Paragraph(f"{label} : {value}", self.styles['Normal']))
-        
-        context_table = Table([[left, right]], colWidths=[3.5*inch, 3.5*inch])
-        context_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        story.append(context_table)
-        return story
+        detail_lines = [f"{label} : {value}" for label, value in right_fields if value]
+        return cust_lines, detail_lines
 
     def _build_client_acceptance_section(self) -> List:
         """Bottom signature section similar to sample."""
         story = []
         story.append(Paragraph('Client Acceptance', self.styles['SectionHeader']))
-        data = [
-            ['Authorized Person Name', 'Signature', 'Date', 'Stamp'],
-            ['\n\n', '\n\n', '\n\n', '\n\n'],
-        ]
-        table = Table(data, colWidths=[2.5*inch, 2.0*inch, 1.2*inch, 1.8*inch])
-        table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.8, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 1), (-1, 1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        story.append(table)
+        story.append(_AcceptanceGrid())
         return story
 
     def _add_page_number(self, canv: canvas.Canvas, doc):
@@ -535,15 +1109,24 @@ class PDFService:
         canv.drawCentredString(width / 2.0, 0.4 * inch, page_num_text)
 
     def _draw_watermark(self, canv: canvas.Canvas, text: str):
-        """Draw a light diagonal watermark across the page."""
-        width, height = A4
-        canv.saveState()
-        canv.setFont('Helvetica-Bold', 60)
-        canv.setFillGray(0.85)
-        canv.translate(width/2, height/2)
-        canv.rotate(45)
-        canv.drawCentredString(0, 0, text)
-        canv.restoreState()
+        """Draw a light diagonal watermark across the page.
+
+        The watermark is recorded once per document as a form XObject and
+        every page just references it.
+        """
+        form_name = 'Watermark' + ''.join(ch for ch in text if ch.isalnum())
+        if not canv.hasForm(form_name):
+            width, height = A4
+            canv.beginForm(form_name)
+            canv.saveState()
+            canv.setFont('Helvetica-Bold', 60)
+            canv.setFillGray(0.85)
+            canv.translate(width/2, height/2)
+            canv.rotate(45)
+            canv.drawCentredString(0, 0, text)
+            canv.restoreState()
+            canv.endForm()
+        canv.doForm(form_name)
 
     def _resolve_logo_path(self, logo_url: str) -> Optional[str]:
         """Convert a public /uploads/... URL to a filesystem path."""
@@ -560,20 +1143,37 @@ class PDFService:
             return None
         return None
 
+    def _local_logo(self, logo_url: str) -> Optional[ImageReader]:
+        """Decoded logo for a local path or /uploads URL, or None when the file is missing.
+
+        One stat per call; the decode is cached per (path, mtime), so a replaced
+        logo is picked up on the next render.
+        """
+        local_path = self._resolve_logo_path(logo_url)
+        if not local_path:
+            return None
+        try:
+            mtime = os.stat(local_path).st_mtime
+        except OSError:
+            return None
+        return _open_logo_file(local_path, mtime)
+
+    async def prefetch_logo(self, org: Optional[Dict[str, Any]]) -> None:
+        """Warm the logo cache in a worker thread so rendering never blocks the event loop on I/O."""
+        logo_url = ((org or {}).get('branding') or {}).get('logo_url')
+        if logo_url:
+            await asyncio.to_thread(self._load_logo, logo_url)
+
     def _load_logo(self, logo_url: str):
         """Return a ReportLab Image for the given logo URL or path."""
         try:
             # http/https: fetch bytes
             if isinstance(logo_url, str) and (logo_url.startswith('http://') or logo_url.startswith('https://')):
-                with urllib.request.urlopen(logo_url, timeout=5) as resp:
-                    data = resp.read()
-                bio = io.BytesIO(data)
-                bio.seek(0)
-                return Image(bio, width=1.8*inch, height=0.7*inch, kind='proportional')
+                return _LogoFlowable(_fetch_logo(logo_url), 1.8*inch, 0.7*inch)
             # local path or mapped uploads path
-            local_path = self._resolve_logo_path(logo_url)
-            if local_path and os.path.exists(local_path):
-                return Image(local_path, width=1.8*inch, height=0.7*inch, kind='proportional')
+            reader = self._local_logo(logo_url)
+            if reader is not None:
+                return _LogoFlowable(reader, 1.8*inch, 0.7*inch)
         except Exception:
             return None
         return None
@@ -600,8 +1200,8 @@ class PDFService:
     # --- Purchase Order PDF ---
     def generate_purchase_order_pdf(self, po_data: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
         """Legacy PO PDF (kept for compatibility)."""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+        buffer = _pooled_buffer()
+        doc = self._new_doc(buffer, pagesize=A4, topMargin=0.5*inch)
         story: List[Any] = []
         # Header
         story.append(self._build_branded_header(
@@ -618,16 +1218,17 @@ class PDFService:
         story.append(Spacer(1, 0.3*inch))
         # Items table
         items = po_data.get('items', [])
+        # Format each column in one pass, then stitch the rows together
+        descriptions = [f"{it.get('item_name') or ''}\n{it.get('description') or ''}" for it in items]
+        quantities = [f"{it.get('quantity',0):.2f}" for it in items]
+        units = [it.get('unit','each') for it in items]
+        rates = [f"{it.get('unit_price',0):.2f}" for it in items]
+        amounts = [f"{it.get('total_price',0):.2f}" for it in items]
         table_data = [['#','Description','Qty','Unit','Rate','Amount']]
-        for i, it in enumerate(items, 1):
-            table_data.append([
-                str(i),
-                f"{it.get('item_name') or ''}\n{it.get('description') or ''}",
-                f"{it.get('quantity',0):.2f}",
-                it.get('unit','each'),
-                f"{it.get('unit_price',0):.2f}",
-                f"{it.get('total_price',0):.2f}",
-            ])
+        table_data.extend(
+            [str(i), *cells]
+            for i, cells in enumerate(zip(descriptions, quantities, units, rates, amounts), 1)
+        )
         tbl = Table(table_data, colWidths=[0.5*inch, 3.3*inch, 0.7*inch, 0.7*inch, 0.9*inch, 1.0*inch])
         tbl.setStyle(TableStyle([
             ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
@@ -662,8 +1263,7 @@ class PDFService:
             story.append(Paragraph("Terms & Conditions", self.styles['SectionHeader']))
             story.append(Paragraph(str(po_data['terms_and_conditions']), self.styles['Normal']))
         doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return _detach(buffer)
 
     def generate_quantity_rental_quotation_pdf(self, data: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
         """Generate a PDF that matches the provided 'Quantity Rental Quotation' design.
@@ -672,8 +1272,8 @@ class PDFService:
         concrete_area, formwork_area, system_type, quotation_number, quotation_date, rental_period.
         Falls back to PO fields when not provided.
         """
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.4*inch, leftMargin=0.4*inch, rightMargin=0.4*inch, bottomMargin=0.5*inch)
+        buffer = _pooled_buffer()
+        doc = self._new_doc(buffer, pagesize=A4, topMargin=0.4*inch, leftMargin=0.4*inch, rightMargin=0.4*inch, bottomMargin=0.5*inch)
         story: List[Any] = []
 
         # Top header: logo left, org details right
@@ -681,23 +1281,25 @@ class PDFService:
         left_flow: List[Any] = []
         try:
             if org and org.get('branding', {}).get('logo_url'):
-                logo_path = self._resolve_logo_path(org['branding']['logo_url'])
-                if logo_path and os.path.exists(logo_path):
-                    left_flow.append(Image(logo_path, width=2.2*inch, height=0.8*inch, kind='proportional'))
+                reader = self._local_logo(org['branding']['logo_url'])
+                if reader is not None:
+                    left_flow.append(_LogoFlowable(reader, 2.2*inch, 0.8*inch))
         except Exception:
             pass
-        # Optional subtitle under logo
-        left_flow.append(Paragraph((org.get('branding', {}).get('tagline') if org else '') or '', self.styles['Normal']))
+        # Optional subtitle under logo (an empty Paragraph wraps to zero height, so skip it)
+        tagline = (org.get('branding', {}).get('tagline') if org else '') or ''
+        if tagline:
+            left_flow.append(Paragraph(tagline, self.styles['Normal']))
 
         right_lines = []
         org_name = (org or {}).get('name') or ''
-        right_lines.append(Paragraph(org_name, ParagraphStyle(name='OrgName', parent=self.styles['Normal'], fontName='Helvetica-Bold', fontSize=12, alignment=TA_RIGHT)))
+        right_lines.append(Paragraph(org_name, self.styles['QuotationOrgName']))
         settings = (org or {}).get('settings') or {}
         trn = settings.get('tax_number') or settings.get('trn')
         qno = data.get('quotation_number') or data.get('po_number') or 'QOUT-000001'
         qdate = self._format_date(data.get('quotation_date') or data.get('order_date'))
         rperiod = data.get('rental_period') or '4-week'
-        small_right_style = ParagraphStyle(name='RightSmall', parent=self.styles['Normal'], fontSize=9, alignment=TA_RIGHT)
+        small_right_style = self.styles['QuotationRightSmall']
         for line in [
             f"TRN: {trn or '-'}",
             f"Quotation No: {qno}",
@@ -706,16 +1308,12 @@ class PDFService:
         ]:
             right_lines.append(Paragraph(line, small_right_style))
         header = Table([[left_flow, right_lines]], colWidths=[3.6*inch, 3.6*inch])
-        header.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-        ]))
+        header.setStyle(_QUOTATION_HEADER_STYLE)
         story.append(header)
         story.append(Spacer(1, 0.1*inch))
 
         # Center title
-        title_style = ParagraphStyle(name='CenteredTitle', parent=self.styles['DocumentTitle'], alignment=TA_CENTER)
-        story.append(Paragraph('Quantity Rental Quotation', title_style))
+        story.append(Paragraph('Quantity Rental Quotation', self.styles['QuotationTitle']))
         story.append(Spacer(1, 0.12*inch))
 
         # Two info boxes: left 'To' and right project details
@@ -738,17 +1336,15 @@ class PDFService:
             ('Floor Level', data.get('floor_level') or ''),
             ('Slab Thickness/Meter', data.get('slab_thickness') or ''),
         ]
-        right_table = Table([[Paragraph(f"{k} :", self.styles['Normal']), Paragraph(str(v or '-') , self.styles['Normal'])] for k,v in right_pairs], colWidths=[1.8*inch, 1.8*inch])
-        right_table.setStyle(TableStyle([
-            ('ALIGN', (0,0), (0,-1), 'LEFT'),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('LEFTPADDING', (0,0), (-1,-1), 0),
-            ('RIGHTPADDING', (0,0), (-1,-1), 0),
-        ]))
+        # Plain string cells skip Paragraph markup parsing; only values too wide for one line wrap
+        value_width = 1.8*inch
+        right_table = Table([
+            [f"{k} :", v if stringWidth(v, 'Helvetica', 10) <= value_width else Paragraph(v, self.styles['Normal'])]
+            for k, v in ((k, str(v or '-')) for k, v in right_pairs)
+        ], colWidths=[1.8*inch, value_width])
+        right_table.setStyle(_QUOTATION_DETAILS_STYLE)
         info = Table([[left_box, right_table]], colWidths=[3.6*inch, 3.6*inch])
-        info.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ]))
+        info.setStyle(_QUOTATION_INFO_STYLE)
         story.append(info)
         story.append(Spacer(1, 0.12*inch))
 
@@ -756,28 +1352,18 @@ class PDFService:
         items = data.get('items', [])
         table_headers = ['#', 'Description', 'Qty', 'Rate', 'Total Amount', 'Guarantee Rate']
         table_data: List[List[Any]] = [table_headers]
-        for idx, it in enumerate(items, start=1):
-            desc = f"{(it.get('item_name') or '')} {('L:' + str(it.get('length')) if it.get('length') else '')}"
-            if it.get('description'):
-                desc = f"{desc}\n{it.get('description')}".strip()
-            qty = f"{float(it.get('quantity', 0)):.2f}"
-            rate = f"{float(it.get('unit_price', 0)):.2f}"
-            amount = f"{float(it.get('total_price', 0)):.2f}"
-            guarantee = f"{float(it.get('guarantee_rate', 0)):.2f}"
-            table_data.append([str(idx), desc, qty, rate, amount, guarantee])
-        col_widths = [0.4*inch, 3.7*inch, 0.8*inch, 0.9*inch, 1.1*inch, 1.1*inch]
-        items_tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
-        items_tbl.setStyle(TableStyle([
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,0), 9),
-            ('ALIGN', (0,0), (-1,0), 'CENTER'),
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('FONTSIZE', (0,1), (-1,-1), 8),
-            ('ALIGN', (2,1), (-1,-1), 'RIGHT'),  # Numbers right aligned
-            ('ALIGN', (1,1), (1,-1), 'LEFT'),
-        ]))
+        # Format each column in one pass, then stitch the rows together
+        descriptions = [_quotation_item_description(it) for it in items]
+        quantities = [f"{float(it.get('quantity', 0)):.2f}" for it in items]
+        rates = [f"{float(it.get('unit_price', 0)):.2f}" for it in items]
+        amounts = [f"{float(it.get('total_price', 0)):.2f}" for it in items]
+        guarantees = [f"{float(it.get('guarantee_rate', 0)):.2f}" for it in items]
+        table_data.extend(
+            [str(idx), *cells]
+            for idx, cells in enumerate(zip(descriptions, quantities, rates, amounts, guarantees), start=1)
+        )
+        items_tbl = Table(table_data, colWidths=_QUOTATION_COL_WIDTHS, repeatRows=1)
+        items_tbl.setStyle(_QUOTATION_ITEMS_STYLE)
         story.append(items_tbl)
 
         # Totals row at end if provided
@@ -789,43 +1375,29 @@ class PDFService:
                 totals_amount = 0
         totals_row = Table([
             ['', '', Paragraph('<b>Total</b>', self.styles['Normal']), Paragraph(f"{float(totals_amount):.2f}", self.styles['Normal']), '', '']
-        ], colWidths=col_widths)
-        totals_row.setStyle(TableStyle([
-            ('SPAN', (0,0), (2,0)),
-            ('SPAN', (4,0), (5,0)),
-            ('ALIGN', (3,0), (3,0), 'RIGHT'),
-            ('LINEABOVE', (0,0), (-1,0), 0.8, colors.black),
-        ]))
+        ], colWidths=_QUOTATION_COL_WIDTHS)
+        totals_row.setStyle(_QUOTATION_TOTALS_STYLE)
         story.append(totals_row)
 
         story.append(Spacer(1, 0.15*inch))
 
         # Client Acceptance area
-        story.append(Paragraph('Client Acceptance', ParagraphStyle(name='CA', parent=self.styles['SectionHeader'], alignment=TA_CENTER)))
+        story.append(Paragraph('Client Acceptance', self.styles['QuotationSectionCenter']))
         sig_table = Table([
-            [Paragraph('Authorized Person Name', self.styles['Normal']), Paragraph('Signature', self.styles['Normal']), Paragraph('Date', self.styles['Normal']), Paragraph('Stamp', self.styles['Normal'])],
+            ['Authorized Person Name', 'Signature', 'Date', 'Stamp'],
             ['','', '', ''],
         ], colWidths=[2.6*inch, 2.3*inch, 1.0*inch, 1.3*inch])
-        sig_table.setStyle(TableStyle([
-            ('LINEABOVE', (0,1), (-1,1), 0.8, colors.black),
-            ('TOPPADDING', (0,1), (-1,1), 18),
-        ]))
+        sig_table.setStyle(_QUOTATION_SIGNATURE_STYLE)
         story.append(sig_table)
 
         # Footer: page number center
-        def _footer(canvas: canvas.Canvas, doc_):
-            page_num = canvas.getPageNumber()
-            footer_text = f"Page {page_num}"
-            canvas.setFont('Helvetica', 8)
-            canvas.drawCentredString((A4[0])/2.0, 0.35*inch, footer_text)
-        doc.build(story, onFirstPage=_footer, onLaterPages=_footer)
-        buffer.seek(0)
-        return buffer
+        doc.build(story, onFirstPage=_draw_page_number_footer, onLaterPages=_draw_page_number_footer)
+        return _detach(buffer)
 
     # --- Project Report PDF (summary) ---
     def generate_project_report_pdf(self, report: Dict[str, Any], org: Optional[Dict[str, Any]] = None) -> io.BytesIO:
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+        buffer = _pooled_buffer()
+        doc = self._new_doc(buffer, pagesize=A4, topMargin=0.5*inch)
         story: List[Any] = []
         story.append(self._build_branded_header(
             org,
@@ -857,8 +1429,7 @@ class PDFService:
             t.setStyle(TableStyle([('GRID', (0,0), (-1,-1), 1, colors.black)]))
             story.append(t)
         doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return _detach(buffer)
     
     def _build_terms_section(self, terms_text: str) -> List:
         """Build terms and conditions section"""
@@ -876,48 +1447,12 @@ class PDFService:
         """Format date string for display"""
         if not date_str:
             return 'N/A'
-        
-        try:
-            if 'T' in date_str:  # ISO format
-                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            else:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            return date_obj.strftime('%d-%m-%Y')
-        except:
-            return date_str
+        if isinstance(date_str, date):
+            return _date_label(date_str)
+        if isinstance(date_str, str):
+            return _fmt_date(date_str)
+        return date_str
     
     def _number_to_words(self, number: int) -> str:
         """Convert number to words (basic implementation)"""
-        if number == 0:
-            return "Zero Dirhams"
-        
-        ones = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
-                "Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen",
-                "Seventeen", "Eighteen", "Nineteen"]
-        
-        tens = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
-        
-        def convert_hundreds(n):
-            result = ""
-            if n >= 100:
-                result += ones[n // 100] + " Hundred "
-                n %= 100
-            if n >= 20:
-                result += tens[n // 10] + " "
-                n %= 10
-            if n > 0:
-                result += ones[n] + " "
-            return result
-        
-        if number < 1000:
-            return convert_hundreds(number).strip() + " Dirhams"
-        elif number < 1000000:
-            thousands = number // 1000
-            remainder = number % 1000
-            result = convert_hundreds(thousands).strip() + " Thousand "
-            if remainder > 0:
-                result += convert_hundreds(remainder)
-            return result.strip() + " Dirhams"
-        else:
-            return f"{number} Dirhams"  # Fallback for very large numbers
-
+        return _number_to_words(number)
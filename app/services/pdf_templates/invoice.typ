@@ -0,0 +1,100 @@
+// Invoice layout for the optional Typst backend of PDFService.
+// Mirrors PDFService.generate_invoice_pdf; every value arrives pre-formatted
+// as a string in the JSON passed through sys.inputs.data.
+#let data = json(bytes(sys.inputs.data))
+
+#set document(title: "Invoice " + data.number)
+#set text(font: ("Helvetica", "Arial", "Liberation Sans", "DejaVu Sans"), size: 10pt)
+#set page(
+  paper: "a4",
+  margin: 0.5in,
+  footer: context align(center, text(size: 9pt)[Page #counter(page).display()]),
+  background: if data.draft {
+    rotate(-45deg, text(size: 60pt, weight: "bold", fill: luma(85%))[DRAFT])
+  },
+)
+#set par(spacing: 0pt, leading: 2pt)
+
+#let line-stack(lines, size: 10pt, weight: "regular") = stack(
+  spacing: 2pt,
+  ..lines.map(l => text(size: size, weight: weight, l)),
+)
+#let section-header(body) = block(below: 6pt, text(size: 12pt, weight: "bold", body))
+
+// Header: logo left, large centered title, company + document meta right
+#grid(
+  columns: (3in, 2.2in, 1.8in),
+  inset: (x: 6pt),
+  align(left + top, if data.logo != none {
+    image(data.logo, width: 1.8in, height: 0.7in, fit: "contain")
+  }),
+  align(center + top, text(size: 26pt, weight: "bold")[INVOICE]),
+  align(right + top, stack(
+    spacing: 6pt,
+    ..if data.company_name != none { (text(size: 16pt, weight: "bold", data.company_name),) },
+    ..if data.company_lines.len() > 0 { (line-stack(data.company_lines),) },
+    text(size: 12pt, data.number),
+    text(size: 12pt, weight: "bold", data.status),
+  )),
+)
+
+#v(0.2in)
+
+// Context: "To" on the left, invoice/project details on the right
+#grid(
+  columns: (3.5in, 3.5in),
+  inset: (x: 6pt),
+  stack(spacing: 6pt, text(size: 12pt, weight: "bold")[To], line-stack(data.customer_lines)),
+  line-stack(data.detail_lines),
+)
+
+#v(0.2in)
+
+// Line items
+#align(center, table(
+  columns: (0.4in, 2.6in, 0.8in, 0.9in, 0.95in, 0.85in),
+  stroke: 0.8pt,
+  inset: (x: 6pt, y: 3pt),
+  align: (col, row) => if row == 0 or col == 0 { center } else if col == 1 { left } else { right },
+  table.header(..("#", "Description", "Qty", "Rate", "Total Amount", "Guarantee Rate")
+    .map(h => text(size: 9pt, weight: "bold", h))),
+  ..data.items.flatten().map(c => text(size: 8.5pt, c)),
+))
+
+#v(0.2in)
+
+// Totals, right-aligned under the last item columns
+#align(center, table(
+  columns: (3.8in, 1.5in, 1.2in),
+  stroke: (col, row) => if col > 0 and row == data.totals.len() - 1 { (top: 1pt) },
+  inset: (x: 6pt, y: 3pt),
+  align: right,
+  ..data.totals.enumerate().map(((i, row)) => {
+    let weight = if i == data.totals.len() - 1 { "bold" } else { "regular" }
+    ([], text(weight: weight, row.at(0)), text(weight: weight, row.at(1)))
+  }).flatten(),
+))
+
+#v(0.2in)
+With words: #data.amount_words
+#v(0.2in)
+
+// Client acceptance
+#section-header[Client Acceptance]
+#table(
+  columns: (2.5in, 2.0in, 1.2in, 1.8in),
+  stroke: 0.8pt,
+  inset: (x: 6pt, y: 3pt),
+  align: (col, row) => if row == 0 { center } else { left + top },
+  ..("Authorized Person Name", "Signature", "Date", "Stamp").map(h => text(weight: "bold", h)),
+  ..range(4).map(_ => block(height: 36pt)),
+)
+
+#if data.terms != none {
+  v(0.15in)
+  section-header[Client Acceptance]
+  [Name: #box(width: 1.6in, repeat[\_]) #h(1em) Signature: #box(width: 1.6in, repeat[\_]) #h(1em) Date: #box(width: 1in, repeat[\_])]
+  v(0.2in)
+  section-header[Terms & Conditions]
+  data.terms
+}
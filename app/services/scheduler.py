@@ -1,12 +1,16 @@
 import asyncio
+import logging
 from datetime import datetime, timezone
-from sqlalchemy import select, and_
+from sqlalchemy import select, insert, update, and_, or_
+from ..core.config import settings
 from ..db.tenant_manager import tenant_manager
 from ..models.recurring_task import RecurringTaskTemplate
 from ..models.task import Task
 from ..models.project import Project
 from ..models.project_report_schedule import ProjectReportSchedule
 
+logger = logging.getLogger(__name__)
+
 async def fetch_all_org_ids_from_master() -> list[str]:
     """Fetch organization IDs from the master DB (best-effort)."""
     from sqlalchemy import select as sa_select
@@ -32,24 +36,28 @@ async def generate_due_recurring_tasks_for_tenant(org_id: str):
         )
         res = await session.execute(q)
         templates = res.scalars().all()
+        # One multi-row INSERT for every generated task instead of an INSERT per object on flush
+        if templates:
+            await session.execute(insert(Task), [
+                dict(
+                    title=tpl.title,
+                    description=tpl.description,
+                    project_id=tpl.project_id,
+                    priority=tpl.priority,
+                    task_type=tpl.task_type,
+                    assignee_id=tpl.default_assignee_id,
+                    estimated_hours=tpl.estimated_hours,
+                    story_points=tpl.story_points,
+                    labels=tpl.labels,
+                    tags=tpl.tags,
+                    custom_fields=tpl.custom_fields,
+                    recurring_template_id=tpl.id,
+                    is_recurring=True,
+                    due_date=tpl.next_due_date
+                )
+                for tpl in templates
+            ])
         for tpl in templates:
-            task = Task(
-                title=tpl.title,
-                description=tpl.description,
-                project_id=tpl.project_id,
-                priority=tpl.priority,
-                task_type=tpl.task_type,
-                assignee_id=tpl.default_assignee_id,
-                estimated_hours=tpl.estimated_hours,
-                story_points=tpl.story_points,
-                labels=tpl.labels,
-                tags=tpl.tags,
-                custom_fields=tpl.custom_fields,
-                recurring_template_id=tpl.id,
-                is_recurring=True,
-                due_date=tpl.next_due_date
-            )
-            session.add(task)
             tpl.total_generated = (tpl.total_generated or 0) + 1
             tpl.last_generated_date = now
             tpl.next_due_date = tpl.calculate_next_due_date()
@@ -65,18 +73,37 @@ async def send_scheduled_project_reports_for_tenant(org_id: str):
     try:
         now = datetime.now(timezone.utc)
         dom = now.day
-        q = select(ProjectReportSchedule).where(
+        start_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        not_sent_today = or_(
+            ProjectReportSchedule.last_sent_at.is_(None),
+            ProjectReportSchedule.last_sent_at < start_of_today,
+        )
+        q = select(
+            ProjectReportSchedule.id,
+            ProjectReportSchedule.project_id,
+            ProjectReportSchedule.recipients,
+        ).where(
             ProjectReportSchedule.is_active == True,
-            ProjectReportSchedule.day_of_month == dom
+            ProjectReportSchedule.day_of_month == dom,
+            not_sent_today
         )
         res = await session.execute(q)
-        schedules = res.scalars().all()
-        for sch in schedules:
+        # Claim each schedule before sending so overlapping ticks or processes can't both send it
+        claimed = []
+        for sch in res.all():
+            claim = await session.execute(
+                update(ProjectReportSchedule)
+                .where(ProjectReportSchedule.id == sch.id, not_sent_today)
+                .values(last_sent_at=now)
+                .returning(ProjectReportSchedule.id)
+            )
+            if claim.scalar_one_or_none() is not None:
+                claimed.append(sch)
+        await session.commit()
+        for sch in claimed:
             # Build a share link and send email to recipients
             share_link = await ensure_project_share_link(session, sch.project_id)
             await send_project_report_emails(sch.recipients or [], share_link)
-            sch.last_sent_at = now
-        await session.commit()
     except Exception:
         await session.rollback()
     finally:
@@ -90,13 +117,13 @@ async def ensure_project_share_link(session, project_id: str) -> str:
     return f"/shared/project/{project_id}"
 
 async def send_project_report_emails(recipients: list[str], share_link: str):
-    # Plug into your existing email service here.
-    # Best-effort: skip sending if configuration is missing.
+    # Queue one email per recipient; SMTP latency and retries stay with the Celery worker
+    # instead of blocking the scheduler tick. Best-effort: skip recipients that fail to enqueue.
     try:
-        from ..services.email_service import send_report_email
+        from ..tasks.email_tasks import send_project_report_email
         for r in recipients:
             try:
-                send_report_email(r, share_link)
+                send_project_report_email.delay(r, share_link)
             except Exception:
                 continue
     except Exception:
@@ -104,9 +131,18 @@ async def send_project_report_emails(recipients: list[str], share_link: str):
 
 async def scheduler_tick():
     org_ids = await fetch_all_org_ids_from_master()
-    for org_id in org_ids:
-        await generate_due_recurring_tasks_for_tenant(org_id)
-        await send_scheduled_project_reports_for_tenant(org_id)
+    # Tenants are independent and I/O bound, so run them concurrently (bounded to spare the DB)
+    sem = asyncio.Semaphore(settings.SCHEDULER_TENANT_CONCURRENCY)
+
+    async def _tick_tenant(org_id: str):
+        async with sem:
+            await generate_due_recurring_tasks_for_tenant(org_id)
+            await send_scheduled_project_reports_for_tenant(org_id)
+
+    results = await asyncio.gather(*(_tick_tenant(org_id) for org_id in org_ids), return_exceptions=True)
+    for org_id, result in zip(org_ids, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Scheduler tick failed for tenant {org_id}: {result!r}", exc_info=result)
 
 async def scheduler_loop():
     while True:
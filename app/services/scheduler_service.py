@@ -2,20 +2,103 @@
 Runs background loops without external dependencies.
 """
 import asyncio
-from datetime import datetime, timedelta, time
+import functools
+import logging
+from datetime import datetime, timedelta, time, timezone as dt_timezone
 from typing import Optional
 from zoneinfo import ZoneInfo
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, cast, extract, func, literal, DateTime, Time
 
+from ..core.config import settings
 from ..db.tenant_manager import tenant_manager
 from ..models.user import User
 from ..models.notification import Notification, NotificationType, NotificationPriority
 from ..models.notification import NotificationPreference
-from ..services.notification_service import create_notification_for_user
+from ..services.notification_service import create_notifications_for_users
 from ..api.api_v1.endpoints.smart_notifications import generate_notification_digest
 
+logger = logging.getLogger(__name__)
+
 _SCHEDULER_TASK = None
+_UTC = ZoneInfo("UTC")
+
+
+@functools.lru_cache(maxsize=512)
+def _tz(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo for a user's timezone name; users share a handful of zones."""
+    return ZoneInfo(name or "UTC")
+
+
+async def _run_digest_for_org(org_id: str):
+    """Generate due daily digests for one organization's users."""
+    # Tenant session per org
+    session: AsyncSession = await tenant_manager.get_tenant_session(org_id)
+    try:
+        # Aware instant: the SQL window and the per-user check below must agree on "now"
+        now_utc = datetime.now(dt_timezone.utc)
+        # Fetch only users with a daily digest enabled, and only the columns the schedule needs
+        q = select(
+            User.id, NotificationPreference.timezone, NotificationPreference.daily_digest_time
+        ).join(
+            NotificationPreference, NotificationPreference.user_id == User.id
+        ).where(
+            User.organization_id == org_id,
+            User.is_active == True,
+            NotificationPreference.daily_digest_enabled == True,
+            NotificationPreference.daily_digest_time != None,
+        )
+        if session.bind.dialect.name == "postgresql":
+            # Users whose digest time is within 4 minutes of their local "now", evaluated in SQL
+            # against this tick's instant so the per-user window check below only sees due users.
+            # Other tenant backends (SQLite) rely on that Python check alone.
+            local_now = func.timezone(
+                func.coalesce(func.nullif(NotificationPreference.timezone, ""), "UTC"),
+                literal(now_utc, DateTime(timezone=True)),
+            )
+            offset_seconds = extract("epoch", cast(local_now, Time) - cast(NotificationPreference.daily_digest_time, Time))
+            q = q.where(func.abs(offset_seconds) <= 240)
+        res = await session.execute(q)
+        rows = res.all()
+
+        digest_items = []
+        for (user_id, tz_name, digest_time) in rows:
+            # Daily digest
+            if digest_time:
+                tz = _tz(tz_name)
+                now_local = now_utc.astimezone(tz)
+                hh, mm = map(int, digest_time.split(":"))
+                target_today = now_local.replace(hour=hh, minute=mm, second=0, microsecond=0)
+                if abs((now_local - target_today).total_seconds()) <= 240:  # within 4 minutes
+                    # Generate digest for today (local date)
+                    period_start_local = target_today.replace(hour=0, minute=0)
+                    period_end_local = period_start_local + timedelta(days=1)
+                    period_start = period_start_local.astimezone(_UTC).replace(tzinfo=None)
+                    period_end = period_end_local.astimezone(_UTC).replace(tzinfo=None)
+                    digest = await generate_notification_digest(user_id, org_id, "daily", period_start, period_end, session)
+                    # Queue a notification summarizing the digest
+                    digest_items.append(dict(
+                        user_id=user_id,
+                        title="Daily Digest",
+                        message=f"You have {digest.total_notifications} notifications today.",
+                        notification_type=NotificationType.REMINDER,
+                        priority=NotificationPriority.NORMAL,
+                        context_data={
+                            "digest_type": "daily",
+                            "period_start": digest.period_start.isoformat(),
+                            "period_end": digest.period_end.isoformat(),
+                            "urgent_count": len(digest.urgent_notifications),
+                            "project_summaries": digest.project_summaries,
+                        },
+                        auto_generated=True,
+                        source="scheduler_daily_digest",
+                    ))
+            # Weekly digests similar (optional): left for future extension
+
+        # Persist all of this org's digest notifications together
+        await create_notifications_for_users(session, org_id, digest_items)
+    finally:
+        await session.close()
 
 
 async def _run_digest_loop():
@@ -26,61 +109,22 @@ async def _run_digest_loop():
             master_session: AsyncSession = await tenant_manager.get_master_session()
             try:
                 from ..models.organization import Organization
-                orgs_res = await master_session.execute(select(Organization).where(Organization.is_active == True))
-                orgs = orgs_res.scalars().all()
+                orgs_res = await master_session.execute(select(Organization.id).where(Organization.is_active == True))
+                org_ids = list(orgs_res.scalars().all())
             finally:
                 await master_session.close()
 
-            for org in orgs:
-                # Tenant session per org
-                session: AsyncSession = await tenant_manager.get_tenant_session(org.id)
-                try:
-                    # Fetch users and their prefs
-                    q = select(User, NotificationPreference).join(
-                        NotificationPreference, NotificationPreference.user_id == User.id, isouter=True
-                    ).where(User.organization_id == org.id, User.is_active == True)
-                    res = await session.execute(q)
-                    rows = res.all()
-
-                    now_utc = datetime.utcnow()
-                    for (user, prefs) in rows:
-                        if not prefs:
-                            continue
-                        # Daily digest
-                        if prefs.daily_digest_enabled and prefs.daily_digest_time:
-                            tz = ZoneInfo(prefs.timezone or "UTC")
-                            now_local = now_utc.astimezone(tz)
-                            hh, mm = map(int, prefs.daily_digest_time.split(":"))
-                            target_today = now_local.replace(hour=hh, minute=mm, second=0, microsecond=0)
-                            if abs((now_local - target_today).total_seconds()) <= 240:  # within 4 minutes
-                                # Generate digest for today (local date)
-                                period_start_local = target_today.replace(hour=0, minute=0)
-                                period_end_local = period_start_local + timedelta(days=1)
-                                period_start = period_start_local.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-                                period_end = period_end_local.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-                                digest = await generate_notification_digest(user.id, org.id, "daily", period_start, period_end, session)
-                                # Persist a notification summarizing the digest
-                                await create_notification_for_user(
-                                    session,
-                                    user_id=user.id,
-                                    org_id=org.id,
-                                    title="Daily Digest",
-                                    message=f"You have {digest.total_notifications} notifications today.",
-                                    notification_type=NotificationType.REMINDER,
-                                    priority=NotificationPriority.NORMAL,
-                                    context_data={
-                                        "digest_type": "daily",
-                                        "period_start": digest.period_start.isoformat(),
-                                        "period_end": digest.period_end.isoformat(),
-                                        "urgent_count": len(digest.urgent_notifications),
-                                        "project_summaries": digest.project_summaries,
-                                    },
-                                    auto_generated=True,
-                                    source="scheduler_daily_digest",
-                                )
-                        # Weekly digests similar (optional): left for future extension
-                finally:
-                    await session.close()
+            # Orgs are independent and I/O bound; run them concurrently, bounded to spare the DB
+            sem = asyncio.Semaphore(settings.SCHEDULER_TENANT_CONCURRENCY)
+
+            async def _digest_org(org_id: str):
+                async with sem:
+                    await _run_digest_for_org(org_id)
+
+            results = await asyncio.gather(*(_digest_org(org_id) for org_id in org_ids), return_exceptions=True)
+            for org_id, result in zip(org_ids, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Digest run failed for org {org_id}: {result!r}", exc_info=result)
         except Exception:
             # Best-effort; never crash loop
             pass
@@ -1,7 +1,29 @@
+import asyncio
+import logging
 from typing import List
 from sqlalchemy import text, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TASK_COLUMNS_DDL = (
+    "ALTER TABLE tasks"
+    " ADD COLUMN IF NOT EXISTS visible_to_customer BOOLEAN DEFAULT FALSE,"
+    " ADD COLUMN IF NOT EXISTS sprint_name VARCHAR(255),"
+    " ADD COLUMN IF NOT EXISTS sprint_start_date TIMESTAMPTZ,"
+    " ADD COLUMN IF NOT EXISTS sprint_end_date TIMESTAMPTZ,"
+    " ADD COLUMN IF NOT EXISTS sprint_goal TEXT;"
+)
+_TASK_COLUMNS = ("visible_to_customer", "sprint_name", "sprint_start_date", "sprint_end_date", "sprint_goal")
+# Catalog lookup so already-migrated tenants skip the ALTER (which takes an exclusive lock even as a no-op)
+_TASK_COLUMNS_PRESENT_SQL = text(
+    "SELECT count(*) FROM information_schema.columns"
+    " WHERE table_schema = current_schema() AND table_name = 'tasks' AND column_name = ANY(:columns)"
+)
+
+
 async def ensure_task_columns():
     """Best-effort: ensure newly added task columns exist in all tenant databases.
     - visible_to_customer (BOOLEAN)
@@ -22,30 +44,28 @@ async def ensure_task_columns():
         finally:
             await master.close()
 
-        # For each tenant DB, attempt ALTER TABLE ... ADD COLUMN IF NOT EXISTS
-        for org_id in org_ids:
-            try:
+        # For each tenant DB still missing a column, add them in one ALTER TABLE (one round-trip);
+        # tenants are independent, so run them concurrently, bounded to spare the DB
+        sem = asyncio.Semaphore(settings.SCHEDULER_TENANT_CONCURRENCY)
+
+        async def _ensure_tenant(org_id: str):
+            async with sem:
                 session: AsyncSession = await tenant_manager.get_tenant_session(org_id)
                 try:
-                    stmts = [
-                        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS visible_to_customer BOOLEAN DEFAULT FALSE;",
-                        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS sprint_name VARCHAR(255);",
-                        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS sprint_start_date TIMESTAMPTZ;",
-                        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS sprint_end_date TIMESTAMPTZ;",
-                        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS sprint_goal TEXT;",
-                    ]
-                    for sql in stmts:
-                        try:
-                            await session.execute(text(sql))
-                        except Exception:
-                            # Best-effort; continue
-                            pass
+                    present = await session.scalar(_TASK_COLUMNS_PRESENT_SQL, {"columns": list(_TASK_COLUMNS)})
+                    if present == len(_TASK_COLUMNS):
+                        return
+                    await session.execute(text(_TASK_COLUMNS_DDL))
                     await session.commit()
                 finally:
                     await session.close()
-            except Exception:
-                # Continue to next tenant
-                pass
+
+        # Failures are per tenant; the rest still get their columns
+        results = await asyncio.gather(*(_ensure_tenant(org_id) for org_id in org_ids), return_exceptions=True)
+        for org_id, result in zip(org_ids, results):
+            if isinstance(result, BaseException):
+                # A missing column only surfaces later as an obscure query error, so say so now
+                logger.error(f"Could not ensure task columns for tenant {org_id}: {result!r}", exc_info=result)
     except Exception:
         # Best-effort overall
         pass
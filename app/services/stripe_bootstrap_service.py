@@ -1,6 +1,9 @@
+import hashlib
+import json
 import os
+import tempfile
 import stripe
-from typing import Optional
+from typing import Optional, Tuple
 from ..core.config import settings
 
 # Names for products/prices we will create if missing
@@ -11,6 +14,51 @@ CORE_PRICE_NICK = "pro_core_monthly_9usd"
 AI_PRICE_NICK = "pro_ai_monthly_18usd"
 
 
+# Set once prices are resolved in this process; later calls return immediately
+_ENSURED = False
+# Resolved price ids shared between worker processes on the same host
+_PRICE_IDS_FILE = os.path.join(tempfile.gettempdir(), "zphere_stripe_prices.json")
+
+
+def _key_fingerprint() -> str:
+    # Ids from another Stripe account (e.g. test vs live key) must not be reused
+    return hashlib.sha256((settings.STRIPE_SECRET_KEY or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _load_cached_price_ids() -> Optional[Tuple[str, str]]:
+    try:
+        # The temp dir is shared: ignore symlinks and files another user planted there
+        fd = os.open(_PRICE_IDS_FILE, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        with os.fdopen(fd, "r", encoding="utf-8") as fh:
+            if hasattr(os, "getuid") and os.fstat(fh.fileno()).st_uid != os.getuid():
+                return None
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("key") != _key_fingerprint():
+        return None
+    if data.get("core") and data.get("ai"):
+        return data["core"], data["ai"]
+    return None
+
+
+def _store_cached_price_ids(core_price_id: str, ai_price_id: str) -> None:
+    try:
+        # mkstemp picks an unpredictable name and creates it exclusively (0600), never through a symlink
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(_PRICE_IDS_FILE), prefix=".zphere_stripe_prices.")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"key": _key_fingerprint(), "core": core_price_id, "ai": ai_price_id}, fh)
+        os.replace(tmp_path, _PRICE_IDS_FILE)  # atomic, so other workers never read a partial file
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 def _set_env_price_ids(core_price_id: str, ai_price_id: str) -> None:
     # Set for current process so endpoints can read immediately
     if core_price_id:
@@ -19,24 +67,39 @@ def _set_env_price_ids(core_price_id: str, ai_price_id: str) -> None:
         os.environ["STRIPE_PRICE_AI_MONTHLY"] = ai_price_id
 
 
+# Stripe object ids already resolved in this process, by product name / price nickname
+_PRODUCT_CACHE: dict[str, str] = {}
+_PRICE_CACHE: dict[str, str] = {}
+
+
 def _find_or_create_product(name: str) -> Optional[str]:
+    cached = _PRODUCT_CACHE.get(name)
+    if cached:
+        return cached
     try:
-        prods = stripe.Product.list(limit=50)
-        for p in prods.data:
+        # Page through every product; a single page missed accounts with more than 50
+        for p in stripe.Product.list(limit=100).auto_paging_iter():
             if p.name == name:
+                _PRODUCT_CACHE[name] = p.id
                 return p.id
         # Create if not found
         created = stripe.Product.create(name=name)
+        _PRODUCT_CACHE[name] = created.id
         return created.id
     except Exception:
         return None
 
 
-def _find_price_by_nickname(nickname: str) -> Optional[str]:
+def _find_price_by_nickname(nickname: str, product_id: Optional[str] = None) -> Optional[str]:
+    cached = _PRICE_CACHE.get(nickname)
+    if cached:
+        return cached
     try:
-        prices = stripe.Price.list(limit=50)
-        for pr in prices.data:
+        # Narrow the scan to the product's prices when we know it
+        params = {"product": product_id} if product_id else {}
+        for pr in stripe.Price.list(limit=100, **params).auto_paging_iter():
             if pr.nickname == nickname:
+                _PRICE_CACHE[nickname] = pr.id
                 return pr.id
         return None
     except Exception:
@@ -45,7 +108,7 @@ def _find_price_by_nickname(nickname: str) -> Optional[str]:
 
 def _find_or_create_monthly_price(product_id: str, unit_amount_cents: int, nickname: str) -> Optional[str]:
     # Try by nickname first
-    ex = _find_price_by_nickname(nickname)
+    ex = _find_price_by_nickname(nickname, product_id)
     if ex:
         return ex
     try:
@@ -56,6 +119,7 @@ def _find_or_create_monthly_price(product_id: str, unit_amount_cents: int, nickn
             product=product_id,
             nickname=nickname,
         )
+        _PRICE_CACHE[nickname] = pr.id
         return pr.id
     except Exception:
         return None
@@ -66,6 +130,9 @@ def ensure_stripe_prices() -> None:
     Sets STRIPE_PRICE_CORE_MONTHLY and STRIPE_PRICE_AI_MONTHLY in-process if created.
     Safe to run multiple times.
     """
+    global _ENSURED
+    if _ENSURED:
+        return
     # Require secret key
     if not settings.STRIPE_SECRET_KEY:
         return
@@ -75,6 +142,14 @@ def ensure_stripe_prices() -> None:
     ai_env = os.getenv("STRIPE_PRICE_AI_MONTHLY")
     if core_env and ai_env:
         # Already configured
+        _ENSURED = True
+        return
+
+    # Another worker on this host may already have resolved them
+    cached = _load_cached_price_ids()
+    if cached:
+        _set_env_price_ids(core_env or cached[0], ai_env or cached[1])
+        _ENSURED = True
         return
 
     try:
@@ -84,6 +159,8 @@ def ensure_stripe_prices() -> None:
         ai_price_id = ai_env or (ai_pid and _find_or_create_monthly_price(ai_pid, 1800, AI_PRICE_NICK))
         if core_price_id and ai_price_id:
             _set_env_price_ids(core_price_id, ai_price_id)
+            _store_cached_price_ids(core_price_id, ai_price_id)
+            _ENSURED = True
     except Exception:
         # Non-fatal; do nothing
         pass
@@ -1,21 +1,71 @@
+import asyncio
+import json
 import stripe
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import selectinload
 import uuid
 
 from ..core.config import settings
+from ..core.redis import get_redis
 from ..models.subscription import Subscription, Invoice, DunningEvent, SubscriptionStatus, DunningStatus
 from ..models.organization import Organization
-from ..models.user import User
+from ..models.user import User, UserRole
 
 # Configure Stripe
 stripe.api_key = settings.STRIPE_SECRET_KEY
+
+
+def _pooled_stripe_client() -> stripe.RequestsClient:
+    """One keep-alive session shared by every thread, so calls skip the TCP+TLS handshake"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=64))
+    return stripe.RequestsClient(session=session)
+
+
+stripe.default_http_client = _pooled_stripe_client()
 logger = logging.getLogger(__name__)
 
+# Stripe redelivers liberally; remember processed event ids for a day
+_EVENT_DEDUP_TTL = 86400
+
+# Session.info key the trial_will_end handler collects (email, trial end) pairs under
+_TRIAL_NOTICES_KEY = "stripe_trial_ending_notices"
+
+# Tiered Redis TTLs for Stripe objects; webhooks invalidate subscriptions explicitly
+_SUBSCRIPTION_CACHE_TTL = 300
+_PRICE_CACHE_TTL = 86400
+
+# Subscription events are full snapshots, so one older than the last one applied is stale.
+# Notices such as trial_will_end aren't snapshots and must never be dropped this way.
+_SNAPSHOT_EVENT_TYPES = frozenset({
+    'customer.subscription.created',
+    'customer.subscription.updated',
+    'customer.subscription.deleted',
+})
+
+_NEWER_EVENT_SCRIPT = """
+local last = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) < last then return 0 end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+def _stripe_times(data: Dict[str, Any], **columns: str) -> Dict[str, datetime]:
+    """Map column names to UTC datetimes for the Stripe epoch fields that are set"""
+    return {
+        column: datetime.fromtimestamp(data[field], tz=timezone.utc)
+        for column, field in columns.items()
+        if data.get(field)
+    }
+
 
 class StripeService:
     """Service for handling Stripe operations"""
@@ -24,7 +74,8 @@ class StripeService:
     async def create_customer(user: User, organization: Organization) -> str:
         """Create a Stripe customer"""
         try:
-            customer = stripe.Customer.create(
+            customer = await asyncio.to_thread(
+                stripe.Customer.create,
                 email=user.email,
                 name=f"{user.first_name} {user.last_name}",
                 metadata={
@@ -46,7 +97,8 @@ class StripeService:
     ) -> Dict[str, Any]:
         """Create a Stripe subscription"""
         try:
-            subscription = stripe.Subscription.create(
+            subscription = await asyncio.to_thread(
+                stripe.Subscription.create,
                 customer=customer_id,
                 items=[{"price": price_id}],
                 trial_period_days=trial_days,
@@ -67,7 +119,8 @@ class StripeService:
     ) -> Dict[str, Any]:
         """Update a Stripe subscription"""
         try:
-            subscription = stripe.Subscription.modify(
+            subscription = await asyncio.to_thread(
+                stripe.Subscription.modify,
                 subscription_id,
                 items=[{"price": price_id}],
                 proration_behavior=proration_behavior
@@ -85,12 +138,13 @@ class StripeService:
         """Cancel a Stripe subscription"""
         try:
             if cancel_at_period_end:
-                subscription = stripe.Subscription.modify(
+                subscription = await asyncio.to_thread(
+                    stripe.Subscription.modify,
                     subscription_id,
                     cancel_at_period_end=True
                 )
             else:
-                subscription = stripe.Subscription.delete(subscription_id)
+                subscription = await asyncio.to_thread(stripe.Subscription.delete, subscription_id)
             return subscription
         except Exception as e:
             logger.error(f"Failed to cancel Stripe subscription: {e}")
@@ -110,7 +164,7 @@ class StripeService:
             if billing_details:
                 payment_method_data["billing_details"] = billing_details
             
-            payment_method = stripe.PaymentMethod.create(**payment_method_data)
+            payment_method = await asyncio.to_thread(stripe.PaymentMethod.create, **payment_method_data)
             return payment_method.id
         except Exception as e:
             logger.error(f"Failed to create payment method: {e}")
@@ -123,7 +177,7 @@ class StripeService:
     ) -> None:
         """Attach payment method to customer"""
         try:
-            stripe.PaymentMethod.attach(payment_method_id, customer=customer_id)
+            await asyncio.to_thread(stripe.PaymentMethod.attach, payment_method_id, customer=customer_id)
         except Exception as e:
             logger.error(f"Failed to attach payment method: {e}")
             raise
@@ -138,7 +192,8 @@ class StripeService:
     ) -> Dict[str, Any]:
         """Create a Stripe invoice"""
         try:
-            invoice = stripe.Invoice.create(
+            invoice = await asyncio.to_thread(
+                stripe.Invoice.create,
                 customer=customer_id,
                 subscription=subscription_id,
                 amount=amount,
@@ -151,44 +206,99 @@ class StripeService:
             raise
     
     @staticmethod
-    async def process_webhook(
-        payload: bytes,
-        sig_header: str,
-        db: AsyncSession
-    ) -> Dict[str, Any]:
-        """Process Stripe webhook events"""
+    async def process_webhook(payload: bytes, sig_header: str) -> Dict[str, Any]:
+        """Verify a Stripe webhook and queue it for background processing"""
+        from ..tasks.stripe_tasks import PENDING_EVENTS_KEY, process_stripe_event, process_stripe_events_batch
+
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
-            
-            # Handle the event
-            if event['type'] == 'customer.subscription.created':
-                await StripeService._handle_subscription_created(event, db)
-            elif event['type'] == 'customer.subscription.updated':
-                await StripeService._handle_subscription_updated(event, db)
-            elif event['type'] == 'customer.subscription.deleted':
-                await StripeService._handle_subscription_deleted(event, db)
-            elif event['type'] == 'invoice.payment_succeeded':
-                await StripeService._handle_payment_succeeded(event, db)
-            elif event['type'] == 'invoice.payment_failed':
-                await StripeService._handle_payment_failed(event, db)
-            elif event['type'] == 'invoice.payment_action_required':
-                await StripeService._handle_payment_action_required(event, db)
-            elif event['type'] == 'customer.subscription.trial_will_end':
-                await StripeService._handle_trial_will_end(event, db)
-            
-            return {"status": "success", "event_type": event['type']}
-            
         except ValueError as e:
             logger.error(f"Invalid payload: {e}")
             raise
         except stripe.error.SignatureVerificationError as e:
             logger.error(f"Invalid signature: {e}")
             raise
-        except Exception as e:
-            logger.error(f"Webhook processing error: {e}")
+        
+        if event['type'] not in _EVENT_HANDLERS:
+            # Nothing to apply; don't spend a dedup key or a worker on it
+            return {"status": "ignored", "event_type": event['type']}
+        
+        if not await StripeService._claim_event(event):
+            logger.info(f"Skipping duplicate or stale Stripe event {event['id']}")
+            return {"status": "duplicate", "event_type": event['type']}
+        
+        # Acknowledge Stripe straight away; the DB updates run on a Celery worker
+        event_data = event.to_dict_recursive()
+        if settings.STRIPE_WEBHOOK_BATCH_SIZE > 1:
+            # Buffer the event so a burst is drained and committed in batches
+            try:
+                await get_redis().rpush(PENDING_EVENTS_KEY, json.dumps(event_data))
+            except Exception as e:
+                logger.warning(f"Stripe event buffer unavailable, queueing {event['id']} alone: {e}")
+            else:
+                try:
+                    process_stripe_events_batch.apply_async(queue=settings.STRIPE_WEBHOOK_QUEUE)
+                except Exception as e:
+                    # The event is already buffered; the next drain picks it up
+                    logger.error(f"Could not trigger Stripe batch drain: {e}")
+                return {"status": "queued", "event_type": event['type']}
+        try:
+            process_stripe_event.apply_async(args=[event_data], queue=settings.STRIPE_WEBHOOK_QUEUE)
+        except Exception:
+            # Let Stripe's redelivery through again if the event never reached the queue
+            try:
+                await get_redis().delete(f"stripe:evt:{event['id']}")
+            except Exception:
+                pass
             raise
+        return {"status": "queued", "event_type": event['type']}
+    
+    @staticmethod
+    async def _claim_event(event: Dict[str, Any]) -> bool:
+        """Return False when the event was already queued or is older than the
+        last subscription event seen. Redis errors fail open."""
+        redis = get_redis()
+        try:
+            if not await redis.set(f"stripe:evt:{event['id']}", 1, ex=_EVENT_DEDUP_TTL, nx=True):
+                return False
+            if event['type'] in _SNAPSHOT_EVENT_TYPES:
+                subscription_id = event['data']['object']['id']
+                return bool(await redis.eval(
+                    _NEWER_EVENT_SCRIPT, 1, f"stripe:sub_evt:{subscription_id}",
+                    event['created'], _EVENT_DEDUP_TTL,
+                ))
+        except Exception as e:
+            logger.warning(f"Stripe event dedup unavailable: {e}")
+        return True
+    
+    @staticmethod
+    async def handle_event(event: Dict[str, Any], db: AsyncSession) -> None:
+        """Apply a verified Stripe event to the local subscription state.
+
+        Handlers don't commit; the caller runs this inside one transaction.
+        """
+        handler = _EVENT_HANDLERS.get(event['type'])
+        if handler:
+            await handler(event, db)
+    
+    @staticmethod
+    def pop_trial_ending_notices(db: AsyncSession) -> List[Tuple[str, Optional[str]]]:
+        """Trial-ending emails collected by handle_event on this session, to send after commit"""
+        return db.info.pop(_TRIAL_NOTICES_KEY, [])
+    
+    @staticmethod
+    async def _update_subscription(db: AsyncSession, criterion, **values) -> Optional[str]:
+        """Update the matching subscription in one round trip; returns its id, or None if absent"""
+        result = await db.execute(
+            update(Subscription)
+            .where(criterion)
+            .values(**values)
+            .returning(Subscription.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalars().first()
     
     @staticmethod
     async def _handle_subscription_created(event: Dict[str, Any], db: AsyncSession):
@@ -201,24 +311,20 @@ class StripeService:
             return
         
         # Update local subscription
-        result = await db.execute(
-            select(Subscription).where(Subscription.organization_id == organization_id)
-        )
-        subscription = result.scalar_one_or_none()
+        values = {
+            "stripe_subscription_id": subscription_data['id'],
+            "stripe_customer_id": subscription_data['customer'],
+            "status": SubscriptionStatus(subscription_data['status']),
+            **_stripe_times(
+                subscription_data,
+                current_period_start='current_period_start',
+                current_period_end='current_period_end',
+                trial_start='trial_start',
+                trial_end='trial_end',
+            ),
+        }
         
-        if subscription:
-            subscription.stripe_subscription_id = subscription_data['id']
-            subscription.stripe_customer_id = subscription_data['customer']
-            subscription.status = SubscriptionStatus(subscription_data['status'])
-            subscription.current_period_start = datetime.fromtimestamp(subscription_data['current_period_start'])
-            subscription.current_period_end = datetime.fromtimestamp(subscription_data['current_period_end'])
-            
-            if subscription_data.get('trial_start'):
-                subscription.trial_start = datetime.fromtimestamp(subscription_data['trial_start'])
-            if subscription_data.get('trial_end'):
-                subscription.trial_end = datetime.fromtimestamp(subscription_data['trial_end'])
-            
-            await db.commit()
+        if await StripeService._update_subscription(db, Subscription.organization_id == organization_id, **values):
             logger.info(f"Updated subscription {subscription_data['id']} for organization {organization_id}")
     
     @staticmethod
@@ -232,21 +338,18 @@ class StripeService:
             return
         
         # Update local subscription
-        result = await db.execute(
-            select(Subscription).where(Subscription.organization_id == organization_id)
-        )
-        subscription = result.scalar_one_or_none()
+        values = {
+            "status": SubscriptionStatus(subscription_data['status']),
+            "cancel_at_period_end": subscription_data.get('cancel_at_period_end', False),
+            **_stripe_times(
+                subscription_data,
+                current_period_start='current_period_start',
+                current_period_end='current_period_end',
+                cancelled_at='canceled_at',
+            ),
+        }
         
-        if subscription:
-            subscription.status = SubscriptionStatus(subscription_data['status'])
-            subscription.current_period_start = datetime.fromtimestamp(subscription_data['current_period_start'])
-            subscription.current_period_end = datetime.fromtimestamp(subscription_data['current_period_end'])
-            subscription.cancel_at_period_end = subscription_data.get('cancel_at_period_end', False)
-            
-            if subscription_data.get('canceled_at'):
-                subscription.cancelled_at = datetime.fromtimestamp(subscription_data['canceled_at'])
-            
-            await db.commit()
+        if await StripeService._update_subscription(db, Subscription.organization_id == organization_id, **values):
             logger.info(f"Updated subscription {subscription_data['id']} for organization {organization_id}")
     
     @staticmethod
@@ -260,15 +363,12 @@ class StripeService:
             return
         
         # Update local subscription
-        result = await db.execute(
-            select(Subscription).where(Subscription.organization_id == organization_id)
-        )
-        subscription = result.scalar_one_or_none()
-        
-        if subscription:
-            subscription.status = SubscriptionStatus.CANCELLED
-            subscription.cancelled_at = datetime.utcnow()
-            await db.commit()
+        if await StripeService._update_subscription(
+            db,
+            Subscription.organization_id == organization_id,
+            status=SubscriptionStatus.CANCELLED,
+            cancelled_at=datetime.utcnow(),
+        ):
             logger.info(f"Cancelled subscription {subscription_data['id']} for organization {organization_id}")
     
     @staticmethod
@@ -280,46 +380,44 @@ class StripeService:
         if not subscription_id:
             return
         
-        # Find subscription
-        result = await db.execute(
-            select(Subscription).where(Subscription.stripe_subscription_id == subscription_id)
+        # Update subscription
+        local_subscription_id = await StripeService._update_subscription(
+            db,
+            Subscription.stripe_subscription_id == subscription_id,
+            status=SubscriptionStatus.ACTIVE,
+            last_payment_date=datetime.utcnow(),
+            failed_payment_count=0,
+            dunning_status=DunningStatus.NONE,
         )
-        subscription = result.scalar_one_or_none()
         
-        if subscription:
-            # Update subscription
-            subscription.status = SubscriptionStatus.ACTIVE
-            subscription.last_payment_date = datetime.utcnow()
-            subscription.failed_payment_count = 0
-            subscription.dunning_status = DunningStatus.NONE
-            
-            # Create or update invoice
-            invoice_result = await db.execute(
-                select(Invoice).where(Invoice.stripe_invoice_id == invoice_data['id'])
+        if local_subscription_id:
+            # Create or update invoice in one idempotent upsert on the stripe_invoice_id unique key
+            paid_date = datetime.utcnow()
+            stmt = pg_insert(Invoice).values(
+                id=str(uuid.uuid4()),
+                subscription_id=local_subscription_id,
+                stripe_invoice_id=invoice_data['id'],
+                amount_paid=invoice_data['amount_paid'],
+                amount_due=invoice_data['amount_due'],
+                currency=invoice_data['currency'],
+                status=invoice_data['status'],
+                invoice_date=datetime.fromtimestamp(invoice_data['created'], tz=timezone.utc),
+                paid_date=paid_date,
+                invoice_number=invoice_data.get('number'),
+                description=invoice_data.get('description', '')
             )
-            invoice = invoice_result.scalar_one_or_none()
-            
-            if not invoice:
-                invoice = Invoice(
-                    id=str(uuid.uuid4()),
-                    subscription_id=subscription.id,
-                    stripe_invoice_id=invoice_data['id'],
-                    amount_paid=invoice_data['amount_paid'],
-                    amount_due=invoice_data['amount_due'],
-                    currency=invoice_data['currency'],
-                    status=invoice_data['status'],
-                    invoice_date=datetime.fromtimestamp(invoice_data['created']),
-                    paid_date=datetime.utcnow(),
-                    invoice_number=invoice_data.get('number'),
-                    description=invoice_data.get('description', '')
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[Invoice.stripe_invoice_id],
+                    set_={
+                        "status": stmt.excluded.status,
+                        "amount_paid": stmt.excluded.amount_paid,
+                        "paid_date": stmt.excluded.paid_date,
+                        "updated_at": func.now(),
+                    },
                 )
-                db.add(invoice)
-            else:
-                invoice.status = invoice_data['status']
-                invoice.amount_paid = invoice_data['amount_paid']
-                invoice.paid_date = datetime.utcnow()
+            )
             
-            await db.commit()
             logger.info(f"Payment succeeded for subscription {subscription_id}")
     
     @staticmethod
@@ -331,31 +429,38 @@ class StripeService:
         if not subscription_id:
             return
         
-        # Find subscription
+        # Count the attempt and advance dunning in one atomic UPDATE; SET expressions see the pre-update row
+        now = datetime.utcnow()
+        attempt = func.coalesce(Subscription.failed_payment_count, 0) + 1
+        dunning_status_type = Subscription.dunning_status.type
         result = await db.execute(
-            select(Subscription).where(Subscription.stripe_subscription_id == subscription_id)
+            update(Subscription)
+            .where(Subscription.stripe_subscription_id == subscription_id)
+            .values(
+                status=SubscriptionStatus.PAST_DUE,
+                failed_payment_count=attempt,
+                dunning_status=case(
+                    (attempt == 1, literal(DunningStatus.FIRST_ATTEMPT, dunning_status_type)),
+                    (attempt == 2, literal(DunningStatus.SECOND_ATTEMPT, dunning_status_type)),
+                    else_=literal(DunningStatus.FINAL_ATTEMPT, dunning_status_type),
+                ),
+                dunning_start_date=case(
+                    (attempt == 1, now),
+                    else_=Subscription.dunning_start_date,
+                ),
+                next_dunning_date=case(
+                    (attempt == 1, now + timedelta(days=3)),
+                    (attempt == 2, now + timedelta(days=7)),
+                    else_=now + timedelta(days=14),
+                ),
+            )
+            .returning(Subscription.failed_payment_count)
+            .execution_options(synchronize_session=False)
         )
-        subscription = result.scalar_one_or_none()
+        failed_count = result.scalar_one_or_none()
         
-        if subscription:
-            # Update subscription
-            subscription.status = SubscriptionStatus.PAST_DUE
-            subscription.failed_payment_count += 1
-            
-            # Update dunning status
-            if subscription.failed_payment_count == 1:
-                subscription.dunning_status = DunningStatus.FIRST_ATTEMPT
-                subscription.dunning_start_date = datetime.utcnow()
-                subscription.next_dunning_date = datetime.utcnow() + timedelta(days=3)
-            elif subscription.failed_payment_count == 2:
-                subscription.dunning_status = DunningStatus.SECOND_ATTEMPT
-                subscription.next_dunning_date = datetime.utcnow() + timedelta(days=7)
-            elif subscription.failed_payment_count >= 3:
-                subscription.dunning_status = DunningStatus.FINAL_ATTEMPT
-                subscription.next_dunning_date = datetime.utcnow() + timedelta(days=14)
-            
-            await db.commit()
-            logger.info(f"Payment failed for subscription {subscription_id}, attempt {subscription.failed_payment_count}")
+        if failed_count is not None:
+            logger.info(f"Payment failed for subscription {subscription_id}, attempt {failed_count}")
     
     @staticmethod
     async def _handle_payment_action_required(event: Dict[str, Any], db: AsyncSession):
@@ -366,15 +471,11 @@ class StripeService:
         if not subscription_id:
             return
         
-        # Find subscription
-        result = await db.execute(
-            select(Subscription).where(Subscription.stripe_subscription_id == subscription_id)
-        )
-        subscription = result.scalar_one_or_none()
-        
-        if subscription:
-            subscription.status = SubscriptionStatus.INCOMPLETE
-            await db.commit()
+        if await StripeService._update_subscription(
+            db,
+            Subscription.stripe_subscription_id == subscription_id,
+            status=SubscriptionStatus.INCOMPLETE,
+        ):
             logger.info(f"Payment action required for subscription {subscription_id}")
     
     @staticmethod
@@ -387,31 +488,101 @@ class StripeService:
             logger.error("No organization_id in subscription metadata")
             return
         
-        # Send trial ending notification
+        # Collect the admins to notify; the caller queues the emails only once the transaction commits
+        result = await db.execute(
+            select(User.email).where(
+                User.organization_id == organization_id,
+                User.role == UserRole.ADMIN,
+                User.is_active == True,
+            )
+        )
+        trial_end = subscription_data.get('trial_end')
+        trial_end_label = (
+            datetime.fromtimestamp(trial_end, tz=timezone.utc).strftime('%B %d, %Y') if trial_end else None
+        )
+        notices = db.info.setdefault(_TRIAL_NOTICES_KEY, [])
+        notices.extend((email, trial_end_label) for email in result.scalars())
         logger.info(f"Trial ending for organization {organization_id}")
-        # TODO: Send email notification
+    
+    @staticmethod
+    def subscription_cache_key(subscription_id: str) -> str:
+        return f"stripe_sub:{subscription_id}"
+    
+    @staticmethod
+    def event_subscription_id(event: Dict[str, Any]) -> Optional[str]:
+        """Stripe subscription id an event refers to, if any"""
+        obj = event['data']['object']
+        if event['type'].startswith('customer.subscription.'):
+            return obj.get('id')
+        return obj.get('subscription')
+    
+    @staticmethod
+    async def _get_cached_stripe(key: str, ttl: int, loader) -> Dict[str, Any]:
+        """Read a Stripe object from Redis, loading and storing it on a miss"""
+        redis = get_redis()
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception:
+            pass
+        obj = await asyncio.to_thread(loader)
+        if isinstance(obj, stripe.StripeObject):
+            obj = obj.to_dict_recursive()
+        try:
+            await redis.set(key, json.dumps(obj), ex=ttl)
+        except Exception:
+            pass
+        return obj
     
     @staticmethod
     async def get_subscription_usage(subscription_id: str) -> Dict[str, Any]:
         """Get subscription usage data"""
         try:
-            usage = stripe.Subscription.retrieve(subscription_id)
+            prices: Dict[str, Dict[str, Any]] = {}
+            
+            def load_subscription() -> Dict[str, Any]:
+                # Prices live in their own, longer-lived cache entries
+                sub = stripe.Subscription.retrieve(subscription_id).to_dict_recursive()
+                for item in sub['items']['data']:
+                    prices[item['price']['id']] = item['price']
+                    item['price'] = item['price']['id']
+                return sub
+            
+            usage = await StripeService._get_cached_stripe(
+                StripeService.subscription_cache_key(subscription_id),
+                _SUBSCRIPTION_CACHE_TTL,
+                load_subscription,
+            )
+            items = []
+            for item in usage['items']['data']:
+                price_id = item['price']
+                price = prices.get(price_id)
+                if price is None:
+                    price = await StripeService._get_cached_stripe(
+                        f"stripe_price:{price_id}",
+                        _PRICE_CACHE_TTL,
+                        lambda: stripe.Price.retrieve(price_id),
+                    )
+                else:
+                    try:
+                        await get_redis().set(f"stripe_price:{price_id}", json.dumps(price), ex=_PRICE_CACHE_TTL)
+                    except Exception:
+                        pass
+                items.append({
+                    "price_id": price_id,
+                    "quantity": item['quantity'],
+                    "unit_amount": price['unit_amount'],
+                    "currency": price['currency']
+                })
             return {
-                "subscription_id": usage.id,
-                "status": usage.status,
-                "current_period_start": usage.current_period_start,
-                "current_period_end": usage.current_period_end,
-                "trial_end": usage.trial_end,
-                "cancel_at_period_end": usage.cancel_at_period_end,
-                "items": [
-                    {
-                        "price_id": item.price.id,
-                        "quantity": item.quantity,
-                        "unit_amount": item.price.unit_amount,
-                        "currency": item.price.currency
-                    }
-                    for item in usage.items.data
-                ]
+                "subscription_id": usage['id'],
+                "status": usage['status'],
+                "current_period_start": usage['current_period_start'],
+                "current_period_end": usage['current_period_end'],
+                "trial_end": usage['trial_end'],
+                "cancel_at_period_end": usage['cancel_at_period_end'],
+                "items": items
             }
         except Exception as e:
             logger.error(f"Failed to get subscription usage: {e}")
@@ -427,7 +598,8 @@ class StripeService:
     ) -> str:
         """Create a Stripe checkout session"""
         try:
-            session = stripe.checkout.Session.create(
+            session = await asyncio.to_thread(
+                stripe.checkout.Session.create,
                 customer=customer_id,
                 payment_method_types=['card'],
                 line_items=[{
@@ -454,7 +626,8 @@ class StripeService:
     async def create_portal_session(customer_id: str, return_url: str) -> str:
         """Create a Stripe customer portal session"""
         try:
-            session = stripe.billing_portal.Session.create(
+            session = await asyncio.to_thread(
+                stripe.billing_portal.Session.create,
                 customer=customer_id,
                 return_url=return_url
             )
@@ -462,3 +635,15 @@ class StripeService:
         except Exception as e:
             logger.error(f"Failed to create portal session: {e}")
             raise
+
+
+# Webhook event type -> handler; types not listed are acknowledged and dropped
+_EVENT_HANDLERS: Dict[str, Callable[[Dict[str, Any], AsyncSession], Awaitable[None]]] = {
+    'customer.subscription.created': StripeService._handle_subscription_created,
+    'customer.subscription.updated': StripeService._handle_subscription_updated,
+    'customer.subscription.deleted': StripeService._handle_subscription_deleted,
+    'invoice.payment_succeeded': StripeService._handle_payment_succeeded,
+    'invoice.payment_failed': StripeService._handle_payment_failed,
+    'invoice.payment_action_required': StripeService._handle_payment_action_required,
+    'customer.subscription.trial_will_end': StripeService._handle_trial_will_end,
+}
@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+
+from ..core.celery_app import celery_app
+from ..core.config import settings
+from ..services.email_service import send_email, send_report_email, send_trial_notice_email
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    bind=True,
+    name="email.send_goal_reminder",
+    max_retries=3,
+    default_retry_delay=60,
+    rate_limit=settings.CELERY_EMAIL_RATE_LIMIT,
+)
+def send_goal_email(self, to_email: str, goal_title: str, message: str) -> None:
+    """Deliver a goal reminder email, retrying on SMTP failure"""
+    subject = f"Goal Reminder: {goal_title}"
+    if not send_email(to_email, subject, message):
+        logger.warning(f"Goal reminder email to {to_email} failed, retrying")
+        raise self.retry()
+
+
+@celery_app.task(
+    bind=True,
+    name="email.send_project_report",
+    max_retries=3,
+    default_retry_delay=60,
+    rate_limit=settings.CELERY_EMAIL_RATE_LIMIT,
+)
+def send_project_report_email(self, to_email: str, share_link: str) -> None:
+    """Deliver a scheduled project report link, retrying on SMTP failure"""
+    if not send_report_email(to_email, share_link):
+        logger.warning(f"Project report email to {to_email} failed, retrying")
+        raise self.retry()
+
+
+@celery_app.task(
+    bind=True,
+    name="email.send_trial_ending",
+    max_retries=6,
+    default_retry_delay=60,
+    rate_limit=settings.CELERY_EMAIL_RATE_LIMIT,
+)
+def send_trial_ending_email(self, to_email: str, trial_end: Optional[str] = None) -> None:
+    """Warn an organization admin that their trial is ending, retrying on SMTP failure"""
+    if not send_trial_notice_email(to_email, trial_end):
+        logger.warning(f"Trial ending email to {to_email} failed, retrying")
+        raise self.retry()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis import Redis
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from ..core.celery_app import celery_app
+from ..core.config import settings
+from ..services.stripe_service import StripeService
+from .email_tasks import send_trial_ending_email
+
+logger = logging.getLogger(__name__)
+
+# Redis list the webhook endpoint buffers verified events on for batch draining
+PENDING_EVENTS_KEY = "stripe:pending_events"
+
+# Claimed batches stay in their own list until committed; the zset records when each was claimed
+_PROCESSING_KEY_PREFIX = "stripe:processing_events:"
+_PROCESSING_BATCHES_KEY = "stripe:processing_batches"
+
+# A batch still unreleased after this long is assumed lost with its worker and handed back
+_BATCH_VISIBILITY_TIMEOUT = 300
+
+# Plain LRANGE/LTRIM/RPUSH keep this working on any Redis with scripting (no LPOP count / LMOVE)
+_CLAIM_BATCH_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items == 0 then return items end
+redis.call('LTRIM', KEYS[1], #items, -1)
+redis.call('RPUSH', KEYS[2], unpack(items))
+redis.call('ZADD', KEYS[3], ARGV[2], KEYS[2])
+return items
+"""
+
+_RELEASE_BATCH_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], KEYS[1])
+"""
+
+_REQUEUE_STALLED_SCRIPT = """
+local stalled = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, key in ipairs(stalled) do
+  local items = redis.call('LRANGE', key, 0, -1)
+  if #items > 0 then redis.call('RPUSH', KEYS[2], unpack(items)) end
+  redis.call('DEL', key)
+  redis.call('ZREM', KEYS[1], key)
+end
+return #stalled
+"""
+
+# Each task runs in a fresh event loop, so pooled asyncpg connections can't be reused across tasks.
+# Always the primary DATABASE_URL, never a replica, since every event writes.
+_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+_SessionLocal = async_sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Loop-independent client, safe to share between worker threads
+_redis = Redis.from_url(settings.REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+_claim_batch = _redis.register_script(_CLAIM_BATCH_SCRIPT)
+_release_batch = _redis.register_script(_RELEASE_BATCH_SCRIPT)
+_requeue_stalled = _redis.register_script(_REQUEUE_STALLED_SCRIPT)
+
+
+def _invalidate_subscription(subscription_id: str) -> None:
+    try:
+        _redis.delete(StripeService.subscription_cache_key(subscription_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached subscription {subscription_id}: {e}")
+
+
+class _SubscriptionBusy(Exception):
+    """Another worker holds the lock for this subscription"""
+
+
+def _send_trial_notices(notices: List[Tuple[str, Optional[str]]]) -> None:
+    for email, trial_end in notices:
+        send_trial_ending_email.delay(email, trial_end)
+
+
+async def _apply_event(event: Dict[str, Any], subscription_id: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    # One transaction per event on the primary: every handler write commits or rolls back together
+    async with _SessionLocal() as db:
+        async with db.begin():
+            if subscription_id and _engine.dialect.name == "postgresql":
+                # Serialize events per subscription; the lock is released when the transaction ends
+                locked = await db.scalar(
+                    text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+                    {"key": f"stripe_sub:{subscription_id}"},
+                )
+                if not locked:
+                    raise _SubscriptionBusy(subscription_id)
+            await StripeService.handle_event(event, db)
+        return StripeService.pop_trial_ending_notices(db)
+
+
+async def _apply_events(
+    events: List[Dict[str, Any]], subscription_ids: Iterable[str]
+) -> List[Tuple[str, Optional[str]]]:
+    # The whole batch commits once, so a burst costs one WAL flush instead of one per event
+    async with _SessionLocal() as db:
+        async with db.begin():
+            if _engine.dialect.name == "postgresql":
+                # Sorted so two batches can't take the same locks in opposite order
+                for subscription_id in sorted(subscription_ids):
+                    await db.execute(
+                        text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                        {"key": f"stripe_sub:{subscription_id}"},
+                    )
+            for event in events:
+                await StripeService.handle_event(event, db)
+        return StripeService.pop_trial_ending_notices(db)
+
+
+@celery_app.task(
+    bind=True,
+    name="stripe.process_event",
+    max_retries=5,
+    autoretry_for=(SQLAlchemyError,),
+    retry_backoff=True,
+)
+def process_stripe_event(self, event: Dict[str, Any]) -> None:
+    """Apply a verified Stripe webhook event, retrying on database errors"""
+    logger.info(f"Processing Stripe event {event.get('id')} ({event.get('type')})")
+    subscription_id = StripeService.event_subscription_id(event)
+    # Invalidate on both sides of the commit so a concurrent read can't re-cache the old state
+    if subscription_id:
+        _invalidate_subscription(subscription_id)
+    try:
+        notices = asyncio.run(_apply_event(event, subscription_id))
+    except _SubscriptionBusy:
+        # Lock contention is short-lived, so allow more quick retries than for DB errors
+        raise self.retry(countdown=1, max_retries=30)
+    if subscription_id:
+        _invalidate_subscription(subscription_id)
+    # Only after commit, so a rolled-back or retried event never emails twice
+    _send_trial_notices(notices)
+
+
+@celery_app.task(name="stripe.process_event_batch")
+def process_stripe_events_batch() -> None:
+    """Apply up to STRIPE_WEBHOOK_BATCH_SIZE buffered Stripe events in one transaction.
+
+    Also runs on a beat schedule, so events buffered without a successful
+    trigger and batches orphaned by a dead worker are still picked up.
+    """
+    now = time.time()
+    stalled = _requeue_stalled(
+        keys=[_PROCESSING_BATCHES_KEY, PENDING_EVENTS_KEY],
+        args=[now - _BATCH_VISIBILITY_TIMEOUT],
+    )
+    if stalled:
+        logger.warning(f"Requeued {stalled} stalled Stripe event batches")
+    
+    # Events move to a per-batch processing list instead of being popped, so a crash can't lose them
+    processing_key = f"{_PROCESSING_KEY_PREFIX}{uuid.uuid4().hex}"
+    raw = _claim_batch(
+        keys=[PENDING_EVENTS_KEY, processing_key, _PROCESSING_BATCHES_KEY],
+        args=[settings.STRIPE_WEBHOOK_BATCH_SIZE, now],
+    )
+    if not raw:
+        # An earlier trigger already drained the buffer
+        return
+    events = sorted((json.loads(r) for r in raw), key=lambda e: e.get('created', 0))
+    subscription_ids = {sid for sid in map(StripeService.event_subscription_id, events) if sid}
+    for subscription_id in subscription_ids:
+        _invalidate_subscription(subscription_id)
+    try:
+        notices = asyncio.run(_apply_events(events, subscription_ids))
+    except Exception as e:
+        # Don't let one bad event sink the batch; each gets its own retries instead
+        logger.warning(f"Stripe batch of {len(events)} events failed ({e}), requeueing individually")
+        for event in events:
+            process_stripe_event.apply_async(args=[event], queue=settings.STRIPE_WEBHOOK_QUEUE)
+        _release_batch(keys=[processing_key, _PROCESSING_BATCHES_KEY])
+        return
+    _release_batch(keys=[processing_key, _PROCESSING_BATCHES_KEY])
+    for subscription_id in subscription_ids:
+        _invalidate_subscription(subscription_id)
+    _send_trial_notices(notices)
+    logger.info(f"Applied {len(events)} Stripe events in one batch")
@@ -0,0 +1,91 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.db.database import Base
+from app.models.goal import Goal, GoalReminder, GoalStatus, ReminderInterval
+from app.models.notification import Notification, NotificationPriority, NotificationType
+from app.models.user import User
+from app.services import goal_reminder_service as reminder_module
+from app.services.goal_reminder_service import GoalReminderService
+
+
+@pytest_asyncio.fixture
+async def tenant_db(monkeypatch):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", echo=False, poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_tenant_session(org_id):
+        return Session()
+
+    monkeypatch.setattr(reminder_module.tenant_manager, "get_tenant_session", get_tenant_session)
+    sent = []
+    monkeypatch.setattr(reminder_module.send_goal_email, "delay", lambda *args: sent.append(args))
+
+    yield Session, sent
+    await engine.dispose()
+
+
+async def _add_goal(Session, end_date, reminder_at=None):
+    now = datetime.now(timezone.utc)
+    async with Session() as session:
+        user = User(email="owner@example.com", username="owner", first_name="O", last_name="W", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        goal = Goal(
+            title="Close deals", start_date=now - timedelta(days=10), end_date=end_date,
+            status=GoalStatus.IN_PROGRESS, target_value=10, current_value=4,
+            created_by=user.id, organization_id="org1",
+        )
+        goal.members.append(user)
+        session.add(goal)
+        await session.flush()
+        if reminder_at is not None:
+            session.add(GoalReminder(goal_id=goal.id, interval=ReminderInterval.DAILY, next_reminder_at=reminder_at))
+        await session.commit()
+        return goal.id
+
+
+@pytest.mark.asyncio
+async def test_reminder_tick_notifies_once_and_advances(tenant_db):
+    Session, sent = tenant_db
+    now = datetime.now(timezone.utc)
+    goal_id = await _add_goal(Session, now + timedelta(days=20), reminder_at=now - timedelta(minutes=1))
+
+    service = GoalReminderService()
+    await service.process_due_reminders("org1")
+    await service.process_due_reminders("org1")
+
+    assert sent == [("owner@example.com", "Close deals", sent[0][2])]
+    async with Session() as session:
+        reminder = (await session.execute(select(GoalReminder).where(GoalReminder.goal_id == goal_id))).scalar_one()
+        assert reminder.last_sent_at is not None
+        assert reminder.next_reminder_at.replace(tzinfo=timezone.utc) > now
+        notifications = (await session.execute(select(Notification))).scalars().all()
+        assert len(notifications) == 1
+        assert notifications[0].notification_type == NotificationType.REMINDER
+        assert notifications[0].context_data["completion_percentage"] == pytest.approx(40.0)
+
+
+@pytest.mark.asyncio
+async def test_overdue_tick_marks_goal_and_notifies(tenant_db):
+    Session, _ = tenant_db
+    goal_id = await _add_goal(Session, datetime.now(timezone.utc) - timedelta(days=1))
+
+    await GoalReminderService().update_overdue_goals("org1")
+
+    async with Session() as session:
+        goal = await session.get(Goal, goal_id)
+        assert goal.status == GoalStatus.OVERDUE
+        notifications = (await session.execute(select(Notification))).scalars().all()
+        assert [(n.priority, n.category) for n in notifications] == [(NotificationPriority.HIGH, "goal_overdue")]
@@ -0,0 +1,105 @@
+import os
+import pytest
+
+from app.core import redis as redis_module
+from app.services.pdf_service import PDFService, _fmt_date, _number_to_words
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(redis_module, "get_redis", lambda: client)
+    return client
+
+
+def _report(generated_at):
+    return {
+        "project": {"name": "Apollo", "status": "active", "owner": "Ada"},
+        "tasks": {"todo": 3, "done": 5},
+        "invoices": {"Invoiced": 100.0, "Paid": 40.0, "Outstanding": 60.0},
+        "generated_at": generated_at,
+    }
+
+
+@pytest.mark.asyncio
+async def test_render_cached_hits_despite_new_generated_at(fake_redis, monkeypatch):
+    service = PDFService()
+    renders = []
+    original = service.generate_project_report_pdf
+
+    def counting(data, org=None):
+        renders.append(data)
+        return original(data, org=org)
+
+    monkeypatch.setattr(service, "generate_project_report_pdf", counting)
+
+    first = await service.render_cached("project_report", _report("2024-01-01T10:00:00.123456"), org={})
+    second = await service.render_cached("project_report", _report("2024-01-01T10:05:00.654321"), org={})
+
+    assert len(renders) == 1
+    assert len(fake_redis.store) == 1
+    assert first.getvalue() == second.getvalue()
+    assert first.getvalue().startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+async def test_render_cached_misses_after_logo_replaced(fake_redis, tmp_path):
+    from PIL import Image
+
+    logo = tmp_path / "logo.png"
+    Image.new("RGB", (120, 40), (200, 30, 30)).save(logo)
+    org = {"name": "Acme", "settings": {}, "branding": {"logo_url": str(logo)}}
+    service = PDFService()
+
+    await service.render_cached("project_report", _report("now"), org=org)
+    await service.render_cached("project_report", _report("now"), org=org)
+    assert len(fake_redis.store) == 1
+
+    Image.new("RGB", (120, 40), (30, 30, 200)).save(logo)
+    stat = os.stat(logo)
+    os.utime(logo, (stat.st_atime, stat.st_mtime + 10))
+    await service.render_cached("project_report", _report("now"), org=org)
+    assert len(fake_redis.store) == 2
+
+
+@pytest.mark.asyncio
+async def test_render_cached_rejects_unknown_kind(fake_redis):
+    with pytest.raises(ValueError):
+        await PDFService().render_cached("receipt", {})
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2024-03-05", "05-03-2024"),
+    ("2024-03-05T10:20:00", "05-03-2024"),
+    ("2024-03-05T10:20:00Z", "05-03-2024"),
+    ("2024-3-5", "05-03-2024"),  # unpadded dates still go through strptime
+    ("2024-02-30", "2024-02-30"),
+    ("not a date", "not a date"),
+])
+def test_fmt_date(raw, expected):
+    assert _fmt_date(raw) == expected
+
+
+@pytest.mark.parametrize("number, expected", [
+    (0, "Zero Dirhams"),
+    (15, "Fifteen Dirhams"),
+    (115, "One Hundred Fifteen Dirhams"),
+    (1000, "One Thousand Dirhams"),
+    (1234, "One Thousand Two Hundred Thirty Four Dirhams"),
+    (999999, "Nine Hundred Ninety Nine Thousand Nine Hundred Ninety Nine Dirhams"),
+    (1000000, "1000000 Dirhams"),
+    (-5, " Dirhams"),
+])
+def test_number_to_words(number, expected):
+    assert _number_to_words(number) == expected
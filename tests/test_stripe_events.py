@@ -0,0 +1,171 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+import stripe
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.core.config import settings
+from app.db.database import Base
+from app.models.subscription import Subscription, SubscriptionStatus, SubscriptionTier
+from app.services import stripe_service as service_module
+from app.services.stripe_service import StripeService
+from app.tasks import stripe_tasks
+
+
+class FakeAsyncRedis:
+    """Just enough of redis.asyncio for the webhook claim path"""
+
+    def __init__(self):
+        self.store = {}
+        self.lists = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, created, ttl):
+        # Mirrors _NEWER_EVENT_SCRIPT
+        if int(created) < int(self.store.get(key, 0)):
+            return 0
+        self.store[key] = created
+        return 1
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(service_module, "get_redis", lambda: client)
+    return client
+
+
+def _event(event_id, event_type, created, obj):
+    return {"id": event_id, "type": event_type, "created": created, "data": {"object": obj}}
+
+
+def _subscription_updated(event_id, created, status="active"):
+    return _event(event_id, "customer.subscription.updated", created, {
+        "id": "sub_1", "status": status, "metadata": {"organization_id": "org1"},
+    })
+
+
+def _payment_failed(event_id, created):
+    return _event(event_id, "invoice.payment_failed", created, {"id": "in_1", "subscription": "sub_1"})
+
+
+@pytest.mark.asyncio
+async def test_claim_event_rejects_duplicate_delivery(fake_redis):
+    event = _payment_failed("evt_1", 100)
+
+    assert await StripeService._claim_event(event) is True
+    assert await StripeService._claim_event(event) is False
+
+
+@pytest.mark.asyncio
+async def test_claim_event_rejects_stale_subscription_snapshot(fake_redis):
+    assert await StripeService._claim_event(_subscription_updated("evt_new", 200)) is True
+    assert await StripeService._claim_event(_subscription_updated("evt_old", 100)) is False
+    assert await StripeService._claim_event(_subscription_updated("evt_newer", 300)) is True
+
+
+@pytest.mark.asyncio
+async def test_webhook_releases_claim_when_enqueue_fails(fake_redis, monkeypatch):
+    event = _payment_failed("evt_1", 100)
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_BATCH_SIZE", 1)
+    monkeypatch.setattr(stripe.Webhook, "construct_event", lambda payload, sig, secret: stripe.StripeObject.construct_from(json.loads(payload), "k"))
+
+    def broker_down(**kwargs):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(stripe_tasks.process_stripe_event, "apply_async", broker_down)
+    with pytest.raises(ConnectionError):
+        await StripeService.process_webhook(json.dumps(event).encode(), "sig")
+    assert "stripe:evt:evt_1" not in fake_redis.store
+
+    # Stripe's redelivery is accepted once the broker is back
+    queued = []
+    monkeypatch.setattr(stripe_tasks.process_stripe_event, "apply_async", lambda **kwargs: queued.append(kwargs))
+    result = await StripeService.process_webhook(json.dumps(event).encode(), "sig")
+    assert result["status"] == "queued"
+    assert queued[0]["args"][0]["id"] == "evt_1"
+
+
+@pytest.fixture
+def task_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Base.metadata.tables["subscriptions"]])
+        async with Session() as db, db.begin():
+            db.add(Subscription(
+                organization_id="org1", stripe_subscription_id="sub_1", stripe_customer_id="cus_1",
+                stripe_price_id="price_1", tier=list(SubscriptionTier)[0], status=SubscriptionStatus.ACTIVE,
+                current_period_start=datetime.utcnow(), current_period_end=datetime.utcnow(),
+                amount=100, failed_payment_count=0,
+            ))
+
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(setup())
+    monkeypatch.setattr(stripe_tasks, "_engine", engine)
+    monkeypatch.setattr(stripe_tasks, "_SessionLocal", Session)
+    monkeypatch.setattr(stripe_tasks, "_invalidate_subscription", lambda subscription_id: None)
+    yield Session
+    asyncio.run(engine.dispose())
+
+
+def _load_subscription(Session):
+    async def load():
+        async with Session() as db:
+            return (await db.execute(select(Subscription))).scalar_one()
+    return asyncio.run(load())
+
+
+def test_failing_batch_rolls_back_and_requeues_each_event(task_db, monkeypatch):
+    pending = [json.dumps(_payment_failed("evt_ok", 100)), json.dumps(_subscription_updated("evt_bad", 200, "bogus"))]
+    released, requeued = [], []
+    monkeypatch.setattr(stripe_tasks, "_requeue_stalled", lambda keys, args: 0)
+    monkeypatch.setattr(stripe_tasks, "_claim_batch", lambda keys, args: pending)
+    monkeypatch.setattr(stripe_tasks, "_release_batch", lambda keys: released.append(keys[0]))
+    monkeypatch.setattr(stripe_tasks.process_stripe_event, "apply_async", lambda args, queue: requeued.append(args[0]))
+
+    stripe_tasks.process_stripe_events_batch()
+
+    # The good event was rolled back with the bad one, then both were handed to the single-event task
+    subscription = _load_subscription(task_db)
+    assert subscription.failed_payment_count == 0
+    assert subscription.status == SubscriptionStatus.ACTIVE
+    assert [event["id"] for event in requeued] == ["evt_ok", "evt_bad"]
+    assert len(released) == 1 and released[0].startswith(stripe_tasks._PROCESSING_KEY_PREFIX)
+
+    # Retried alone, the good event now commits
+    asyncio.run(stripe_tasks._apply_event(requeued[0], "sub_1"))
+    subscription = _load_subscription(task_db)
+    assert subscription.failed_payment_count == 1
+    assert subscription.status == SubscriptionStatus.PAST_DUE
+
+
+def test_batch_applies_events_in_created_order(task_db, monkeypatch):
+    pending = [json.dumps(_payment_failed("evt_2", 200)), json.dumps(_subscription_updated("evt_1", 100, "active"))]
+    monkeypatch.setattr(stripe_tasks, "_requeue_stalled", lambda keys, args: 0)
+    monkeypatch.setattr(stripe_tasks, "_claim_batch", lambda keys, args: pending)
+    monkeypatch.setattr(stripe_tasks, "_release_batch", lambda keys: None)
+
+    stripe_tasks.process_stripe_events_batch()
+
+    # Sorted by created, so the payment failure lands after the snapshot and wins
+    subscription = _load_subscription(task_db)
+    assert subscription.failed_payment_count == 1
+    assert subscription.status == SubscriptionStatus.PAST_DUE